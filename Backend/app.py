@@ -1,9 +1,14 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
 import asyncio
+import atexit
+import hashlib
 import json
 import os
 import sys
+import threading
+import time
+from urllib.parse import urlparse
 
 # Add the web_intelligence_agent directory to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'web_intelligence_agent'))
@@ -12,15 +17,29 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'web_intelligence_agent'
 from web_intelligence_agent.main import (
     load_user_profile,
     determine_targets,
-    crawl_websites_async,
-    extract_text_and_metadata,
-    configure_gemini,
-    analyze_with_gemini
+    configure_gemini
 )
+from web_intelligence_agent.pipeline import run_pipeline
+from web_intelligence_agent.llm_scheduler import AnalysisScheduler
+from web_intelligence_agent.analysis_cache import AnalysisCache
+from web_intelligence_agent.crawl_state import CrawlStateStore
+from web_intelligence_agent.crawler_pool import CrawlerPool
+from web_intelligence_agent.fetcher import HttpFetcher
+from web_intelligence_agent.frontier import CrawlFrontier
+from web_intelligence_agent.dedup import deduplicate_results, split_merged_items
+from web_intelligence_agent.result_store import ResultStore, profile_fingerprint
 from web_intelligence_agent.scoring_agent import (
     score_item,
-    filter_results
+    filter_results,
+    BatchScorer,
+    IncrementalScorer
 )
+from web_intelligence_agent.personalization import rerank_results
+from web_intelligence_agent.metrics import registry as metrics_registry, start_trace, summarize_trace
+from web_intelligence_agent.semantic_scoring import EmbeddingIndex, SemanticScorer
+from jobs import JobManager, JobManagerClosed
+from feeds import CursorError, FeedCache
+from refresh_scheduler import RefreshScheduler, acquire_process_lock
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
@@ -30,11 +49,456 @@ GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 if GEMINI_API_KEY:
     configure_gemini(GEMINI_API_KEY)
 
-# Cache for storing analysis results
-analysis_cache = {
-    'results': None,
-    'timestamp': None
-}
+# Directory of the SQLite stores and embeddings (point it at a writable volume in production)
+DATA_DIR = os.environ.get("AURA_DATA_DIR", os.path.join(os.path.dirname(__file__), 'web_intelligence_agent'))
+os.makedirs(DATA_DIR, exist_ok=True)
+
+# Seconds a shutting-down server waits for queued and running jobs before cancelling them
+JOB_DRAIN_TIMEOUT = float(os.environ.get("JOB_DRAIN_TIMEOUT", 60))
+
+# 'profile' analyzes each page for the requesting profile; 'shared' analyzes each page once for every user
+# (no profile in the prompt) and personalizes afterwards by scoring and an optional batched re-rank
+ANALYSIS_MODE = os.environ.get("ANALYSIS_MODE", "profile")
+
+# Adds a Server-Timing header with the time spent in each stage to every response
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "").lower() in ('1', 'true', 'yes')
+
+# Token budget of multi-page Gemini requests packing short pages together (0 analyzes every page on its own)
+GEMINI_BATCH_TOKENS = int(os.environ.get("GEMINI_BATCH_TOKENS", 0))
+
+# One rate-limited Gemini client shared by every analysis request
+gemini_scheduler = AnalysisScheduler(
+    requests_per_minute=int(os.environ.get("GEMINI_REQUESTS_PER_MINUTE", 60)),
+    tokens_per_minute=int(os.environ.get("GEMINI_TOKENS_PER_MINUTE", 1000000))
+)
+
+# Persistent cache of Gemini analyses keyed on page text, profile, model and prompt version
+llm_cache = AnalysisCache(
+    os.path.join(DATA_DIR, 'analysis_cache.db'),
+    ttl_seconds=int(os.environ.get("ANALYSIS_CACHE_TTL_SECONDS", 24 * 3600)),
+    max_entries=int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", 5000))
+)
+
+# ETag / Last-Modified / fingerprint of every crawled page, used to skip unchanged sites
+crawl_state_store = CrawlStateStore(
+    os.path.join(DATA_DIR, 'crawl_state.db')
+)
+
+# Analysis and scoring runs, kept per profile and per run
+result_store = ResultStore(
+    os.path.join(DATA_DIR, 'results.db')
+)
+
+# Warm headless browsers shared by every crawl of the job loop, recycled after CRAWLER_MAX_PAGES pages
+# or when the browsers use more than CRAWLER_MAX_MEMORY_MB (0: no memory limit, which also needs psutil)
+crawler_pool = CrawlerPool(
+    size=int(os.environ.get("CRAWLER_POOL_SIZE", 1)),
+    pages_per_crawler=int(os.environ.get("CRAWLER_PAGES_PER_BROWSER", 5)),
+    max_pages=int(os.environ.get("CRAWLER_MAX_PAGES", 200)),
+    max_memory_mb=int(os.environ.get("CRAWLER_MAX_MEMORY_MB", 0)) or None
+)
+
+# Plain-HTTP fetch tier tried before the browser (HTTP_FETCH_TIER=0 renders every page in the browser)
+http_fetcher = HttpFetcher() if os.environ.get("HTTP_FETCH_TIER", "1").lower() in ('1', 'true', 'yes') else None
+
+# Sub-page discovery below each target site (CRAWL_DEPTH=0 only analyzes the target pages themselves)
+CRAWL_DEPTH = int(os.environ.get("CRAWL_DEPTH", 1))
+CRAWL_PAGES_PER_SITE = int(os.environ.get("CRAWL_PAGES_PER_SITE", 6))
+CRAWL_MAX_PAGES = int(os.environ.get("CRAWL_MAX_PAGES", 60))
+CRAWL_TIME_BUDGET = float(os.environ.get("CRAWL_TIME_BUDGET_SECONDS", 120))
+
+# Per-category personalized feeds of the latest scoring runs, served from memory for the most recent profiles
+feed_cache = FeedCache(result_store, max_profiles=int(os.environ.get("FEED_CACHE_MAX_PROFILES", 256)))
+# Largest page a client can request from a personalized feed
+FEED_MAX_LIMIT = int(os.environ.get("FEED_MAX_LIMIT", 500))
+
+# Cosine similarity from which semantic scoring counts an interest as matched (unset: the embedder's calibrated one)
+SEMANTIC_SIMILARITY_THRESHOLD = float(os.environ.get("SEMANTIC_SIMILARITY_THRESHOLD") or 0) or None
+
+# Item embeddings for semantic scoring, loaded on first use
+semantic_index = None
+semantic_index_lock = threading.Lock()
+
+def scorer_factory(scoring_mode):
+    """
+    Returns the function building a profile's scorer for a scoring mode ('keyword' or 'semantic')
+    """
+    global semantic_index
+    if scoring_mode != 'semantic':
+        return BatchScorer
+    with semantic_index_lock:
+        if semantic_index is None:
+            semantic_index = EmbeddingIndex(
+                os.path.join(DATA_DIR, 'embeddings.npz')
+            )
+    return lambda user_profile: SemanticScorer(user_profile, semantic_index,
+                                               similarity_threshold=SEMANTIC_SIMILARITY_THRESHOLD)
+
+# Per-interest match columns of recent analysis runs, so threshold and profile changes re-score incrementally
+incremental_scorer = IncrementalScorer()
+
+# Background executor running crawl + LLM analysis jobs on its own event loop
+job_manager = JobManager(max_concurrent_jobs=int(os.environ.get("MAX_CONCURRENT_JOBS", 2)))
+
+# Serializes writes to shared JSON files
+results_write_lock = threading.Lock()
+
+def write_json_atomic(path, data):
+    """
+    Writes JSON to a temporary file and renames it over path, so readers never see a partial file
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with results_write_lock:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, path)
+
+def analysis_request_key(kind, user_profile, target_urls, **options):
+    """
+    Fingerprints an analysis request (including options such as the threshold) so identical
+    concurrent requests share one job
+    """
+    payload = json.dumps({
+        'kind': kind,
+        'profile': user_profile,
+        'targets': sorted(target_urls),
+        'options': options
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def import_saved_results():
+    """
+    Imports analysis_results.json / final_results.json into an empty result store
+    """
+    if not result_store.is_empty():
+        return
+    agent_dir = os.path.join(os.path.dirname(__file__), 'web_intelligence_agent')
+    analysis_run_id = None
+    for kind, file_name in (('analysis', 'analysis_results.json'), ('scoring', 'final_results.json')):
+        path = os.path.join(agent_dir, file_name)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                run_id = result_store.save_run(kind, json.load(f), parent_run_id=analysis_run_id)
+            if kind == 'analysis':
+                analysis_run_id = run_id
+
+import_saved_results()
+
+def save_analysis_results(all_analysis_results, user_profile):
+    """
+    Saves web intelligence results as a new analysis run (shared if user_profile is None)
+    """
+    profile_key = profile_fingerprint(user_profile) if user_profile is not None else None
+    return result_store.save_run('analysis', all_analysis_results, profile_key=profile_key)
+
+def save_final_results(filtered_results, user_profile, threshold, analysis_run_id=None, scoring_mode='keyword'):
+    """
+    Saves scoring results as a new scoring run and refreshes the personalized feeds
+    """
+    profile_key = profile_fingerprint(user_profile)
+    run_id = result_store.save_run(
+        'scoring',
+        filtered_results,
+        profile_key=profile_key,
+        threshold=threshold,
+        parent_run_id=analysis_run_id,
+        scoring_mode=scoring_mode
+    )
+    feed_cache.on_scoring_run(profile_key)
+    return run_id
+
+def latest_run(kind, user_profile=None, profile_key=None):
+    """
+    Returns the latest run of a kind, preferring runs for the given profile
+    """
+    run = None
+    if user_profile is not None:
+        run = result_store.latest_run(kind, profile_fingerprint(user_profile))
+    if run is None:
+        run = result_store.latest_run(kind, profile_key)
+    return run
+
+def latest_results(kind, user_profile=None, profile_key=None):
+    """
+    Returns (run, results) for the latest run of a kind, preferring runs for the given profile
+    """
+    run = latest_run(kind, user_profile, profile_key)
+    if run is None:
+        return None, None
+    return run, result_store.load_results(run['id'])
+
+def page_analysis_inputs(user_profile, keywords, analysis_mode):
+    """
+    Returns the (profile, keywords) pages are analyzed with: none of the user's in shared mode,
+    so every user gets the same prompts and cached analyses
+    """
+    if analysis_mode == 'shared':
+        return None, determine_targets({})[1]
+    return user_profile, keywords
+
+def make_frontier(keywords):
+    """
+    Returns the frontier discovering the articles below a run's target pages, or None when discovery is off
+    """
+    if CRAWL_DEPTH <= 0:
+        return None
+    return CrawlFrontier(
+        keywords,
+        max_depth=CRAWL_DEPTH,
+        max_pages=CRAWL_PAGES_PER_SITE,
+        max_pages_total=CRAWL_MAX_PAGES,
+        time_budget=CRAWL_TIME_BUDGET
+    )
+
+def result_publisher(job, frontier):
+    """
+    Returns the on_result callback publishing each page's result; discovered sub-pages raise the job's total
+    """
+    def publish(analysis_result):
+        if frontier is not None:
+            job.set_total(max(job.total or 0, frontier.scheduled))
+        job.publish('result', analysis_result)
+    return publish
+
+async def intelligence_job(job, user_profile, target_urls, keywords, analysis_mode='profile'):
+    """
+    Crawls and analyzes the target websites, publishing each page's result as soon as it is ready
+    """
+    job.set_total(len(target_urls))
+    analysis_profile, page_keywords = page_analysis_inputs(user_profile, keywords, analysis_mode)
+    frontier = make_frontier(page_keywords)
+    all_analysis_results = await run_pipeline(
+        target_urls,
+        analysis_profile,
+        analyze_workers=gemini_scheduler.max_concurrency,
+        on_result=result_publisher(job, frontier),
+        on_item=lambda url, category, item: job.publish('item', {'url': url, 'category': category, 'item': item}),
+        model=gemini_scheduler,
+        cache=llm_cache,
+        state_store=crawl_state_store,
+        keywords=page_keywords,
+        batch_tokens=GEMINI_BATCH_TOKENS,
+        crawler_pool=crawler_pool,
+        fetcher=http_fetcher,
+        frontier=frontier
+    )
+    # Merge copies of the same story published by several sources
+    all_analysis_results = await asyncio.to_thread(deduplicate_results, all_analysis_results)
+    run_id = save_analysis_results(all_analysis_results, analysis_profile)
+    return {
+        'run_id': run_id,
+        'data': all_analysis_results,
+        'target_urls': target_urls,
+        'keywords': keywords
+    }
+
+async def full_analysis_job(job, user_profile, target_urls, keywords, threshold, scoring_mode='keyword',
+                            analysis_mode='profile', rerank=False):
+    """
+    Runs web intelligence (or reuses saved results in simulation mode) followed by scoring,
+    and optionally a batched Gemini re-rank of the scored items
+    """
+    if GEMINI_API_KEY:
+        intelligence = await intelligence_job(job, user_profile, target_urls, keywords, analysis_mode)
+        all_analysis_results = intelligence['data']
+        analysis_run_id = intelligence['run_id']
+    else:
+        # SIMULATION MODE: no Gemini key, reuse the latest saved analysis run
+        print(" SIMULATION MODE: Loading saved analysis results...")
+        analysis_run = result_store.latest_run('analysis')
+        analysis_run_id = analysis_run['id'] if analysis_run else None
+        all_analysis_results = result_store.load_results(analysis_run_id) if analysis_run else []
+        all_analysis_results = await asyncio.to_thread(deduplicate_results, all_analysis_results)
+        job.set_total(len(all_analysis_results))
+        for analysis_result in all_analysis_results:
+            job.publish('result', analysis_result)
+
+    # Step 2: Run scoring agent
+    filtered_results = await asyncio.to_thread(
+        filter_results, all_analysis_results, user_profile, threshold,
+        scorer=scorer_factory(scoring_mode)(user_profile)
+    )
+    if rerank and GEMINI_API_KEY:
+        filtered_results = await rerank_results(
+            filtered_results, user_profile, model=gemini_scheduler, cache=llm_cache
+        )
+    save_final_results(filtered_results, user_profile, threshold, analysis_run_id, scoring_mode)
+
+    return {
+        'data': {
+            'raw_analysis': all_analysis_results,
+            'filtered_results': filtered_results
+        },
+        'metadata': {
+            'target_urls': target_urls,
+            'keywords': keywords,
+            'threshold': threshold,
+            'scoring_mode': scoring_mode,
+            'analysis_mode': analysis_mode,
+            'reranked': bool(rerank and GEMINI_API_KEY)
+        }
+    }
+
+async def refresh_job(job, user_profile, urls, target_urls, keywords, threshold=1, scoring_mode='keyword'):
+    """
+    Re-analyzes some sources and saves a complete analysis + scoring run, reusing the latest results of the others
+
+    The scoring run keeps the threshold and scoring mode of the profile's latest
+    scoring run; threshold and scoring_mode only apply to profiles without one.
+    """
+    job.set_total(len(urls))
+    analysis_profile, page_keywords = page_analysis_inputs(user_profile, keywords, ANALYSIS_MODE)
+    frontier = make_frontier(page_keywords)
+    fresh_results = await run_pipeline(
+        urls,
+        analysis_profile,
+        analyze_workers=gemini_scheduler.max_concurrency,
+        on_result=result_publisher(job, frontier),
+        on_item=lambda url, category, item: job.publish('item', {'url': url, 'category': category, 'item': item}),
+        model=gemini_scheduler,
+        cache=llm_cache,
+        state_store=crawl_state_store,
+        keywords=page_keywords,
+        batch_tokens=GEMINI_BATCH_TOKENS,
+        crawler_pool=crawler_pool,
+        fetcher=http_fetcher,
+        frontier=frontier
+    )
+    fresh_by_url = {result['url']: result for result in fresh_results}
+    _, previous_results = await asyncio.to_thread(latest_results, 'analysis', user_profile)
+    all_analysis_results, errors = await asyncio.to_thread(
+        merge_refreshed_results, fresh_by_url, previous_results or [], urls, target_urls
+    )
+    analysis_run_id = save_analysis_results(all_analysis_results, analysis_profile)
+
+    scoring_run = await asyncio.to_thread(result_store.latest_run, 'scoring', profile_fingerprint(user_profile))
+    if scoring_run is not None:
+        if scoring_run['threshold'] is not None:
+            threshold = scoring_run['threshold']
+        scoring_mode = scoring_run['scoring_mode'] or scoring_mode
+    filtered_results = await asyncio.to_thread(
+        filter_results, all_analysis_results, user_profile, threshold,
+        scorer=scorer_factory(scoring_mode)(user_profile)
+    )
+    run_id = save_final_results(filtered_results, user_profile, threshold, analysis_run_id, scoring_mode)
+    return {
+        'run_id': run_id,
+        'analysis_run_id': analysis_run_id,
+        'errors': errors
+    }
+
+def merge_refreshed_results(fresh_by_url, previous_results, urls, target_urls):
+    """
+    Merges the results of refreshed urls into the previous analysis run and deduplicates them
+
+    Returns (results, {url: error or None}); a url the pipeline returned no result for counts as failed.
+    """
+    errors = {url: fresh_by_url[url].get('error') if url in fresh_by_url else 'No result returned for this page'
+              for url in urls}
+    # The previous run was deduplicated: its merged copies go back to their sources before merging,
+    # so a story dropped by a refreshed site survives in the sites that were not refreshed
+    previous_by_url = {result['url']: result for result in split_merged_items(previous_results)}
+
+    # A page that failed this time keeps its previous analysis
+    all_analysis_results = []
+    for url, result in fresh_by_url.items():
+        if result.get('error') and url in previous_by_url:
+            result = previous_by_url[url]
+        all_analysis_results.append(result)
+    # Sites that were not refreshed (or whose target page failed) keep their previous pages and sub-pages
+    target_sites = {urlparse(url).netloc for url in target_urls}
+    refreshed_sites = {urlparse(url).netloc for url in urls if not errors[url]}
+    for url, result in previous_by_url.items():
+        site = urlparse(url).netloc
+        if url not in fresh_by_url and site in target_sites and site not in refreshed_sites:
+            all_analysis_results.append(result)
+    return deduplicate_results(all_analysis_results), errors
+
+def load_default_profile_and_targets():
+    """
+    Returns (user_profile, target_urls, keywords) for the saved user profile
+    """
+    profile_path = os.path.join(os.path.dirname(__file__), 'web_intelligence_agent', 'user_profile.json')
+    user_profile = load_user_profile(profile_path)
+    target_urls, keywords = determine_targets(user_profile)
+    return user_profile, target_urls, keywords
+
+def scheduled_refresh(urls):
+    """
+    Refreshes the given sources through the job manager and returns {url: error or None}
+    """
+    user_profile, target_urls, keywords = load_default_profile_and_targets()
+    urls = [url for url in urls if url in target_urls]
+    job = job_manager.submit(
+        'refresh', refresh_job, user_profile, urls, target_urls, keywords,
+        dedupe_key=analysis_request_key('refresh', user_profile, urls)
+    )
+    while not job.done:
+        job.wait_for_events(len(job.events) - 1, timeout=5)
+    if job.status == 'failed':
+        raise RuntimeError(job.error)
+    return job.result['errors']
+
+# Background daemon re-crawling each source on its own schedule (REFRESH_ENABLED=1, needs GEMINI_API_KEY)
+REFRESH_ENABLED = os.environ.get("REFRESH_ENABLED", "").lower() in ('1', 'true', 'yes')
+refresh_scheduler = RefreshScheduler(
+    scheduled_refresh,
+    sources_function=lambda: load_default_profile_and_targets()[1],
+    tick=float(os.environ.get("REFRESH_TICK_SECONDS", 30))
+)
+
+def job_accepted(job):
+    """
+    Builds the 202 response returned when a job is submitted
+    """
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'shared': job.shared_with > 0,
+        'status_url': f'/api/jobs/{job.id}',
+        'events_url': f'/api/jobs/{job.id}/events'
+    }), 202
+
+def server_closing_response():
+    """
+    Builds the 503 response returned when a job is submitted while the server drains its jobs
+    """
+    return jsonify({
+        'success': False,
+        'error': 'The server is shutting down, retry on another instance'
+    }), 503
+
+@app.before_request
+def start_request_timing():
+    g.request_started = time.perf_counter()
+    g.request_spans = start_trace()
+
+@app.after_request
+def record_request_timing(response):
+    """
+    Records the request latency per route and, if enabled, adds the Server-Timing header
+    """
+    started = getattr(g, 'request_started', None)
+    if started is None:
+        return response
+    duration = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics_registry.observe(
+        'aura_http_request_seconds', duration, route=route, method=request.method, status=str(response.status_code)
+    )
+    if SERVER_TIMING:
+        timings = [f"{stage};dur={stats['total_ms']}" for stage, stats in summarize_trace(g.request_spans).items()]
+        timings.append(f"total;dur={duration * 1000:.3f}")
+        response.headers['Server-Timing'] = ', '.join(timings)
+    return response
+
+def last_successful_run_age():
+    """
+    Returns the number of seconds since the latest analysis run was saved, or None
+    """
+    run = result_store.latest_run('analysis')
+    return round(time.time() - run['created_at'], 1) if run else None
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -44,9 +508,25 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'message': 'AURA Financial Assistant API is running',
-        'gemini_configured': GEMINI_API_KEY is not None
+        'gemini_configured': GEMINI_API_KEY is not None,
+        'queue_depth': job_manager.queue_depth(),
+        'last_successful_run_age_seconds': last_successful_run_age()
     }), 200
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Prometheus metrics: stage and route latency histograms, page, LLM and cache counters
+    """
+    metrics_registry.set_gauge('aura_job_queue_depth', job_manager.queue_depth())
+    pool_stats = crawler_pool.stats()
+    metrics_registry.set_gauge('aura_crawler_pool_browsers', len(pool_stats['crawlers']))
+    metrics_registry.set_gauge('aura_crawler_pool_active_pages', pool_stats['active_pages'])
+    run_age = last_successful_run_age()
+    if run_age is not None:
+        metrics_registry.set_gauge('aura_last_successful_run_age_seconds', run_age)
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/user/profile', methods=['GET'])
 def get_user_profile():
     """
@@ -82,8 +562,7 @@ def update_user_profile():
             'user_profile.json'
         )
         
-        with open(profile_path, 'w') as f:
-            json.dump(profile_data, f, indent=4)
+        write_json_atomic(profile_path, profile_data)
         
         return jsonify({
             'success': True,
@@ -98,7 +577,7 @@ def update_user_profile():
 @app.route('/api/intelligence/analyze', methods=['POST'])
 def run_web_intelligence():
     """
-    Run the web intelligence agent to analyze websites
+    Submit a web intelligence job that analyzes websites in the background
     """
     try:
         if not GEMINI_API_KEY:
@@ -122,80 +601,126 @@ def run_web_intelligence():
         
         # Determine target URLs
         target_urls, keywords = determine_targets(user_profile)
-        
-        # Crawl websites
-        scraped_data = async_to_sync(crawl_websites_async)(target_urls)
-        
-        all_analysis_results = []
-        
-        # Process each crawled website
-        for result in scraped_data:
-            if result.success:
-                # Extract text and metadata
-                extracted_data = extract_text_and_metadata(result.markdown.raw_markdown)
-                
-                # Analyze content with Gemini
-                analysis_result = async_to_sync(analyze_with_gemini)(extracted_data['text'], user_profile)
-                
-                # Add URL to the analysis result
-                analysis_result['url'] = result.url
-                analysis_result['title'] = extracted_data['title']
-                
-                all_analysis_results.append(analysis_result)
-            else:
-                all_analysis_results.append({
-                    'url': result.url,
-                    'error': result.error_message,
-                    'news': [],
-                    'opportunities': [],
-                    'threats': []
-                })
-        
-        # Save to cache
-        analysis_cache['results'] = all_analysis_results
-        analysis_cache['timestamp'] = asyncio.get_event_loop().time()
-        
-        # Save results to file
-        results_path = os.path.join(
-            os.path.dirname(__file__),
-            'web_intelligence_agent',
-            'analysis_results.json'
+        analysis_mode = request.json.get('analysis_mode', ANALYSIS_MODE) if request.json else ANALYSIS_MODE
+        
+        # Shared analyses do not depend on the profile, so every user's request joins the same job
+        job = job_manager.submit(
+            'analyze', intelligence_job, user_profile, target_urls, keywords, analysis_mode,
+            dedupe_key=analysis_request_key(
+                'analyze', user_profile if analysis_mode != 'shared' else None, target_urls,
+                analysis_mode=analysis_mode
+            )
         )
-        with open(results_path, 'w') as f:
-            json.dump(all_analysis_results, f, indent=4)
-        
-        return jsonify({
-            'success': True,
-            'data': all_analysis_results,
-            'target_urls': target_urls,
-            'keywords': keywords
-        }), 200
+        return job_accepted(job)
         
+    except JobManagerClosed:
+        return server_closing_response()
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """
+    Get the status, progress and (once finished) the result of a job
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': f'Job {job_id} not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': job.to_dict()
+    }), 200
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """
+    Stream a job's progress as Server-Sent Events: one 'result' event per analyzed URL and 'status' events
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': f'Job {job_id} not found'
+        }), 404
+    
+    # Reconnecting EventSource clients resume after the last event they received
+    try:
+        last_event_id = max(-1, int(request.headers.get('Last-Event-ID', -1)))
+    except ValueError:
+        last_event_id = -1
+    
+    def generate():
+        after = last_event_id
+        while True:
+            events = job.wait_for_events(after, timeout=15)
+            for event in events:
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+                after = event['id']
+            if job.done and after >= len(job.events) - 1:
+                break
+            if not events:
+                yield ": keep-alive\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/intelligence/cache', methods=['GET'])
+def get_analysis_cache_stats():
+    """
+    Get hit/miss statistics of the Gemini analysis cache
+    """
+    return jsonify({
+        'success': True,
+        'data': llm_cache.stats()
+    }), 200
+
+@app.route('/api/crawler/pool', methods=['GET'])
+def get_crawler_pool_stats():
+    """
+    Get the utilization of the crawler pool and the pages rendered by each of its browsers
+    """
+    return jsonify({
+        'success': True,
+        'data': crawler_pool.stats()
+    }), 200
+
+@app.route('/api/crawler/tiers', methods=['GET'])
+def get_fetch_tiers():
+    """
+    Get the fetch tier (plain HTTP or browser) recorded for each URL and the HTTP tier's fallback counts
+    """
+    return jsonify({
+        'success': True,
+        'data': {
+            'enabled': http_fetcher is not None,
+            'urls': crawl_state_store.tiers(),
+            'http': http_fetcher.stats() if http_fetcher is not None else None
+        }
+    }), 200
+
 @app.route('/api/intelligence/results', methods=['GET'])
 def get_intelligence_results():
     """
     Get the latest web intelligence analysis results
     """
     try:
-        results_path = os.path.join(
-            os.path.dirname(__file__),
-            'web_intelligence_agent',
-            'analysis_results.json'
-        )
+        run, results = latest_results('analysis', profile_key=request.args.get('profile_key'))
         
-        if os.path.exists(results_path):
-            with open(results_path, 'r') as f:
-                results = json.load(f)
-            
+        if run is not None:
             return jsonify({
                 'success': True,
-                'data': results
+                'data': results,
+                'run_id': run['id']
             }), 200
         else:
             return jsonify({
@@ -228,41 +753,38 @@ def run_scoring_agent():
             )
             user_profile = load_user_profile(profile_path)
         
-        # Get threshold from request or use default
+        # Get threshold and scoring mode ('keyword' or 'semantic') from request or use defaults
         threshold = request.json.get('threshold', 1) if request.json else 1
+        scoring_mode = request.json.get('mode', 'keyword') if request.json else 'keyword'
         
-        # Load analysis results
-        results_path = os.path.join(
-            os.path.dirname(__file__),
-            'web_intelligence_agent',
-            'analysis_results.json'
-        )
+        # Latest analysis run (for this profile if it has any)
+        analysis_run = latest_run('analysis', user_profile)
         
-        if not os.path.exists(results_path):
+        if analysis_run is None:
             return jsonify({
                 'success': False,
                 'error': 'No analysis results found. Run /api/intelligence/analyze first.'
             }), 404
         
-        with open(results_path, 'r') as f:
-            analysis_results = json.load(f)
-        
-        # Filter and score results
-        filtered_results = filter_results(analysis_results, user_profile, threshold)
+        # Filter and score results, reusing the interest matches already computed for this run
+        filtered_results = incremental_scorer.filter(
+            analysis_run['id'],
+            lambda: deduplicate_results(result_store.load_results(analysis_run['id'])),
+            user_profile,
+            threshold,
+            mode=scoring_mode,
+            scorer_factory=scorer_factory(scoring_mode)
+        )
         
         # Save filtered results
-        final_results_path = os.path.join(
-            os.path.dirname(__file__),
-            'web_intelligence_agent',
-            'final_results.json'
-        )
-        with open(final_results_path, 'w') as f:
-            json.dump(filtered_results, f, indent=4)
+        run_id = save_final_results(filtered_results, user_profile, threshold, analysis_run['id'], scoring_mode)
         
         return jsonify({
             'success': True,
             'data': filtered_results,
-            'threshold': threshold
+            'threshold': threshold,
+            'mode': scoring_mode,
+            'run_id': run_id
         }), 200
         
     except Exception as e:
@@ -277,19 +799,13 @@ def get_scoring_results():
     Get the latest scoring results
     """
     try:
-        final_results_path = os.path.join(
-            os.path.dirname(__file__),
-            'web_intelligence_agent',
-            'final_results.json'
-        )
+        run, results = latest_results('scoring', profile_key=request.args.get('profile_key'))
         
-        if os.path.exists(final_results_path):
-            with open(final_results_path, 'r') as f:
-                results = json.load(f)
-            
+        if run is not None:
             return jsonify({
                 'success': True,
-                'data': results
+                'data': results,
+                'run_id': run['id']
             }), 200
         else:
             return jsonify({
@@ -303,17 +819,40 @@ def get_scoring_results():
             'error': str(e)
         }), 500
 
+@app.route('/api/runs', methods=['GET'])
+def get_run_history():
+    """
+    Get the history of analysis and scoring runs (filter with ?kind=, ?profile_key=, ?limit=)
+    """
+    try:
+        runs = result_store.list_runs(
+            kind=request.args.get('kind'),
+            profile_key=request.args.get('profile_key'),
+            limit=request.args.get('limit', 20, type=int)
+        )
+        return jsonify({
+            'success': True,
+            'data': runs,
+            'count': len(runs)
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/intelligence/full-analysis', methods=['POST'])
 def run_full_analysis():
     """
-    Run both web intelligence and scoring agents in sequence (SIMULATION MODE)
+    Submit a job running both web intelligence and scoring agents in sequence
     """
     try:
-        import time
-        
         # Get user profile
         user_profile_data = request.json.get('user_profile') if request.json else None
         threshold = request.json.get('threshold', 1) if request.json else 1
+        scoring_mode = request.json.get('mode', 'keyword') if request.json else 'keyword'
+        analysis_mode = request.json.get('analysis_mode', ANALYSIS_MODE) if request.json else ANALYSIS_MODE
+        rerank = bool(request.json.get('rerank', False)) if request.json else False
         
         if user_profile_data:
             user_profile = user_profile_data
@@ -325,61 +864,21 @@ def run_full_analysis():
             )
             user_profile = load_user_profile(profile_path)
         
-        # SIMULATION MODE: Wait 20 seconds to simulate analysis
-        print(" SIMULATION MODE: Analyzing web sources...")
-        time.sleep(20)
-        print(" SIMULATION MODE: Analysis complete! Loading results...")
-        
         # Get target URLs for metadata
         target_urls, keywords = determine_targets(user_profile)
         
-        # Load existing analysis results
-        analysis_results_path = os.path.join(
-            os.path.dirname(__file__),
-            'web_intelligence_agent',
-            'analysis_results.json'
-        )
-        
-        # Check if results exist
-        if os.path.exists(analysis_results_path):
-            with open(analysis_results_path, 'r') as f:
-                all_analysis_results = json.load(f)
-        else:
-            all_analysis_results = []
-        
-        # Step 2: Run scoring agent
-        filtered_results = filter_results(all_analysis_results, user_profile, threshold)
-        
-        # Save results
-        results_path = os.path.join(
-            os.path.dirname(__file__),
-            'web_intelligence_agent',
-            'analysis_results.json'
-        )
-        with open(results_path, 'w') as f:
-            json.dump(all_analysis_results, f, indent=4)
-        
-        final_results_path = os.path.join(
-            os.path.dirname(__file__),
-            'web_intelligence_agent',
-            'final_results.json'
+        job = job_manager.submit(
+            'full-analysis', full_analysis_job, user_profile, target_urls, keywords, threshold, scoring_mode,
+            analysis_mode, rerank,
+            dedupe_key=analysis_request_key(
+                'full-analysis', user_profile, target_urls, threshold=threshold, scoring_mode=scoring_mode,
+                analysis_mode=analysis_mode, rerank=rerank
+            )
         )
-        with open(final_results_path, 'w') as f:
-            json.dump(filtered_results, f, indent=4)
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'raw_analysis': all_analysis_results,
-                'filtered_results': filtered_results
-            },
-            'metadata': {
-                'target_urls': target_urls,
-                'keywords': keywords,
-                'threshold': threshold
-            }
-        }), 200
+        return job_accepted(job)
         
+    except JobManagerClosed:
+        return server_closing_response()
     except Exception as e:
         import traceback
         error_traceback = traceback.format_exc()
@@ -390,134 +889,118 @@ def run_full_analysis():
             'traceback': error_traceback
         }), 500
 
-@app.route('/api/news/personalized', methods=['GET'])
-def get_personalized_news():
+@app.route('/api/refresh/status', methods=['GET'])
+def get_refresh_status():
     """
-    Get personalized news from the latest analysis
+    Get the refresh schedule of every source
+    """
+    return jsonify({
+        'success': True,
+        'data': {
+            'enabled': refresh_scheduler.thread is not None,
+            'sources': refresh_scheduler.status()
+        }
+    }), 200
+
+def personalized_feed(category):
+    """
+    Serves one page of a precomputed personalized feed, with ETag / If-None-Match support
     """
     try:
-        final_results_path = os.path.join(
-            os.path.dirname(__file__),
-            'web_intelligence_agent',
-            'final_results.json'
+        limit = request.args.get('limit', request.args.get('top'))
+        limit = int(limit) if limit is not None else None
+        if limit is not None and not 1 <= limit <= FEED_MAX_LIMIT:
+            return jsonify({
+                'success': False,
+                'error': f'limit must be between 1 and {FEED_MAX_LIMIT}'
+            }), 400
+        page = feed_cache.page(
+            category,
+            profile_key=request.args.get('profile_key'),
+            limit=limit,
+            cursor=request.args.get('cursor')
         )
         
-        if os.path.exists(final_results_path):
-            with open(final_results_path, 'r') as f:
-                results = json.load(f)
-            
-            # Aggregate all news items
-            all_news = []
-            for result in results:
-                for news_item in result.get('news', []):
-                    news_item['source_url'] = result.get('url', '')
-                    all_news.append(news_item)
-            
-            # Sort by score (if available)
-            all_news.sort(key=lambda x: x.get('score', 0), reverse=True)
-            
-            return jsonify({
+        if page is not None:
+            response = jsonify({
                 'success': True,
-                'data': all_news,
-                'count': len(all_news)
-            }), 200
+                'data': page['items'],
+                'count': len(page['items']),
+                'total': page['total'],
+                'next_cursor': page['next_cursor']
+            })
+            response.set_etag(page['etag'])
+            # Answers 304 Not Modified when the client already has this page
+            return response.make_conditional(request)
         else:
             return jsonify({
                 'success': False,
                 'error': 'No results found. Run analysis first.'
             }), 404
             
+    except CursorError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'limit must be an integer'
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/news/personalized', methods=['GET'])
+def get_personalized_news():
+    """
+    Get personalized news from the latest analysis
+    """
+    return personalized_feed('news')
+
 @app.route('/api/opportunities/personalized', methods=['GET'])
 def get_personalized_opportunities():
     """
     Get personalized opportunities from the latest analysis
     """
-    try:
-        final_results_path = os.path.join(
-            os.path.dirname(__file__),
-            'web_intelligence_agent',
-            'final_results.json'
-        )
-        
-        if os.path.exists(final_results_path):
-            with open(final_results_path, 'r') as f:
-                results = json.load(f)
-            
-            # Aggregate all opportunities
-            all_opportunities = []
-            for result in results:
-                for opp in result.get('opportunities', []):
-                    opp['source_url'] = result.get('url', '')
-                    all_opportunities.append(opp)
-            
-            # Sort by score
-            all_opportunities.sort(key=lambda x: x.get('score', 0), reverse=True)
-            
-            return jsonify({
-                'success': True,
-                'data': all_opportunities,
-                'count': len(all_opportunities)
-            }), 200
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'No results found. Run analysis first.'
-            }), 404
-            
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return personalized_feed('opportunities')
 
 @app.route('/api/threats/personalized', methods=['GET'])
 def get_personalized_threats():
     """
     Get personalized threats from the latest analysis
     """
-    try:
-        final_results_path = os.path.join(
-            os.path.dirname(__file__),
-            'web_intelligence_agent',
-            'final_results.json'
-        )
-        
-        if os.path.exists(final_results_path):
-            with open(final_results_path, 'r') as f:
-                results = json.load(f)
-            
-            # Aggregate all threats
-            all_threats = []
-            for result in results:
-                for threat in result.get('threats', []):
-                    threat['source_url'] = result.get('url', '')
-                    all_threats.append(threat)
-            
-            # Sort by score
-            all_threats.sort(key=lambda x: x.get('score', 0), reverse=True)
-            
-            return jsonify({
-                'success': True,
-                'data': all_threats,
-                'count': len(all_threats)
-            }), 200
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'No results found. Run analysis first.'
-            }), 404
-            
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return personalized_feed('threats')
+
+# Outcome of the one shutdown_app call that drains the jobs
+shutdown_lock = threading.Lock()
+shutdown_state = {}
+
+def shutdown_app(timeout=JOB_DRAIN_TIMEOUT):
+    """
+    Graceful shutdown: stops the refresh daemon, drains the jobs still queued or running and closes the browsers
+
+    Only the first call drains; later and concurrent calls wait for it and return its number of cancelled jobs.
+    """
+    with shutdown_lock:
+        if 'cancelled' not in shutdown_state:
+            refresh_scheduler.stop(timeout=5)
+            cancelled = job_manager.shutdown(timeout, cleanup=crawler_pool.close)
+            if cancelled:
+                print(f"Cancelled {cancelled} unfinished job(s) at shutdown")
+            shutdown_state['cancelled'] = cancelled
+        return shutdown_state['cancelled']
+
+# Start the refresh daemon once: in the serving process, not in the debug reloader's parent process,
+# and in a single worker when several serve the app (the first one to take the lock)
+if REFRESH_ENABLED and GEMINI_API_KEY and (__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    if acquire_process_lock(os.path.join(DATA_DIR, 'refresh.lock')):
+        refresh_scheduler.start()
 
 if __name__ == '__main__':
+    # Development server; in production run gunicorn -c gunicorn.conf.py wsgi:app
+    atexit.register(shutdown_app)
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'web_intelligence_agent'))
+
+from main import crawl_websites_async
+
+# Simulated response delay (seconds) for each stub site, mirroring our slowest targets
+SITE_DELAYS = [1.0, 1.5, 2.0, 2.5, 3.0]
+
+def make_handler(delay):
+    """
+    Builds a request handler that answers every GET after a fixed delay.
+    """
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            body = f"<html><head><title>Stub {delay}s</title></head><body><p>Stub page</p></body></html>".encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+def start_stub_servers(delays):
+    """
+    Starts one local HTTP server per delay, each on its own port (and so its own host).
+    """
+    servers = []
+    for delay in delays:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(delay))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+async def time_crawl(urls, max_concurrency):
+    """
+    Returns the wall-clock time of one crawl run.
+    """
+    start = time.perf_counter()
+    results = await crawl_websites_async(urls, max_concurrency=max_concurrency)
+    elapsed = time.perf_counter() - start
+    failed = [r.url for r in results if not r.success]
+    if failed:
+        print(f"  failed: {failed}")
+    return elapsed
+
+async def main():
+    """
+    Compares sequential and concurrent crawling against local stub sites.
+    """
+    servers = start_stub_servers(SITE_DELAYS)
+    urls = [f"http://127.0.0.1:{server.server_address[1]}/" for server in servers]
+    try:
+        sequential = await time_crawl(urls, max_concurrency=1)
+        concurrent = await time_crawl(urls, max_concurrency=len(urls))
+    finally:
+        for server in servers:
+            server.shutdown()
+
+    print(f"Sites: {len(urls)} (slowest stub: {max(SITE_DELAYS)}s, sum: {sum(SITE_DELAYS)}s)")
+    print(f"Sequential crawl: {sequential:.2f}s")
+    print(f"Concurrent crawl: {concurrent:.2f}s")
+    print(f"Speedup: {sequential / concurrent:.2f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
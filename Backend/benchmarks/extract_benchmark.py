@@ -0,0 +1,79 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'web_intelligence_agent'))
+
+from main import extract_text_and_metadata
+from extractor import extract_page
+
+def estimate_tokens(text):
+    """
+    Roughly estimates the number of LLM tokens in a text (about 4 characters per token).
+    """
+    return len(text) // 4
+
+def synthetic_page(paragraphs=400):
+    """
+    Builds a news-portal-like page with heavy navigation, scripts and footer boilerplate.
+    """
+    nav = ''.join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(80))
+    scripts = ''.join(f'<script>window.tracker{i} = {{"id": {i}, "events": []}};</script>' for i in range(30))
+    body = ''.join(
+        f'<article><h2>Article {i}</h2><p>The central bank kept its key interest rate at 7.50% '
+        f'while inflation eased to {5 + i % 3}.{i % 10}% and the Tunindex gained {i % 4}.{i % 7}%.</p></article>'
+        for i in range(paragraphs)
+    )
+    return (f'<html><head><title>Synthetic portal</title><meta name="description" content="Synthetic page">'
+            f'{scripts}</head><body><header><nav><ul>{nav}</ul></nav></header><main>{body}</main>'
+            f'<footer><nav><ul>{nav}</ul></nav><p>Copyright</p></footer></body></html>')
+
+def load_pages(pages_dir, extensions=('.html', '.htm', '.md')):
+    """
+    Loads the saved pages with the given extensions from a directory (empty if there are none).
+    """
+    pages = {}
+    if pages_dir and os.path.isdir(pages_dir):
+        for name in sorted(os.listdir(pages_dir)):
+            if name.endswith(extensions):
+                with open(os.path.join(pages_dir, name), 'r', encoding='utf-8', errors='replace') as f:
+                    pages[name] = f.read()
+    return pages
+
+def time_extractor(extractor, content, repeat):
+    """
+    Returns the mean time per call in milliseconds and the extracted result.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = extractor(content)
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+def main():
+    """
+    Compares extract_text_and_metadata with extract_page on saved pages (by default the fixtures in pages/).
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pages_dir', nargs='?', default=os.path.join(os.path.dirname(__file__), 'pages'),
+                        help='directory of saved .html/.md pages (e.g. from crawl4ai result.html or result.markdown)')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--synthetic', action='store_true',
+                        help='benchmark a generated page instead of saved pages')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        pages = {'synthetic.html': synthetic_page()}
+    else:
+        pages = load_pages(args.pages_dir)
+        if not pages:
+            parser.error(f"no saved pages found in {args.pages_dir} (use --synthetic for a generated page)")
+    print(f"{'page':<32}{'bs4 ms':>10}{'fast ms':>10}{'speedup':>10}{'bs4 tok':>10}{'fast tok':>10}")
+    for name, content in pages.items():
+        old_ms, old = time_extractor(extract_text_and_metadata, content, args.repeat)
+        new_ms, new = time_extractor(extract_page, content, args.repeat)
+        print(f"{name[:31]:<32}{old_ms:>10.2f}{new_ms:>10.2f}{old_ms / new_ms:>9.1f}x"
+              f"{estimate_tokens(old['text']):>10}{estimate_tokens(new['text']):>10}")
+
+if __name__ == "__main__":
+    main()
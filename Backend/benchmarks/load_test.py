@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, 'web_intelligence_agent'))
+
+from result_store import ResultStore, profile_fingerprint
+from scoring_agent import filter_results
+from main import load_user_profile
+
+# (weight, method, path, body) of the requests mixed by every client thread
+REQUEST_MIX = [
+    (4, 'GET', '/api/news/personalized?limit=20', None),
+    (3, 'GET', '/api/opportunities/personalized?limit=20', None),
+    (3, 'GET', '/api/threats/personalized?limit=20', None),
+    (2, 'GET', '/api/health', None),
+    (1, 'GET', '/api/intelligence/results', None),
+    (1, 'POST', '/api/scoring/filter', {'threshold': 1}),
+    (1, 'POST', '/api/intelligence/full-analysis', {'threshold': 1})
+]
+
+SOURCE_TEXT = ('{topic} in Tunisia: the central bank, fintech lenders, real estate developers and '
+               'AI startups reported new figures this quarter for {topic}.')
+TOPICS = ['fintech', 'AI', 'real estate', 'inflation', 'banking', 'tourism', 'energy', 'exports']
+
+def seed_store(data_dir, sources, items_per_category):
+    """
+    Fills a scratch data directory with one analysis run and its scoring run for the default profile.
+
+    This is the stand-in backend: the server answers from these runs and, with
+    no Gemini key, its full-analysis jobs re-score them instead of crawling.
+    """
+    store = ResultStore(os.path.join(data_dir, 'results.db'))
+    user_profile = load_user_profile(os.path.join(BACKEND_DIR, 'web_intelligence_agent', 'user_profile.json'))
+    analysis_results = []
+    for source in range(sources):
+        analysis = {'url': f"https://source-{source}.example/"}
+        for category in ('news', 'opportunities', 'threats'):
+            analysis[category] = [
+                {'title': f"{category} {source}-{index}: {TOPICS[(source + index) % len(TOPICS)]}",
+                 'content': SOURCE_TEXT.format(topic=TOPICS[(source * 3 + index) % len(TOPICS)])}
+                for index in range(items_per_category)
+            ]
+        analysis_results.append(analysis)
+    analysis_run_id = store.save_run('analysis', analysis_results)
+    store.save_run('scoring', filter_results(analysis_results, user_profile, 1),
+                   profile_key=profile_fingerprint(user_profile), threshold=1, parent_run_id=analysis_run_id)
+
+def start_server(server, port, workers, threads, data_dir):
+    """
+    Starts the app on port in a child process, with no Gemini key and the scratch data directory.
+    """
+    env = dict(os.environ, AURA_DATA_DIR=data_dir, GEMINI_API_KEY='', REFRESH_ENABLED='0',
+               WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads), BIND=f"127.0.0.1:{port}",
+               GUNICORN_ACCESS_LOG='', JOB_DRAIN_TIMEOUT='10')
+    if server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+    else:
+        # Flask's threaded development server, for comparison
+        command = [sys.executable, '-c',
+                   f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/api/health", timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError(f"{server} exited with code {process.returncode}")
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{server} did not start within 60 seconds")
+
+def run_level(base_url, clients, duration, seed):
+    """
+    Runs clients threads issuing the request mix for duration seconds; returns the level's report.
+    """
+    weights = [weight for weight, *_ in REQUEST_MIX]
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(client_id):
+        nonlocal errors
+        session = requests.Session()
+        chooser = random.Random(seed + client_id)
+        local_latencies = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            _, method, path, body = chooser.choices(REQUEST_MIX, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, json=body, timeout=30)
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            local_latencies.append(time.perf_counter() - start)
+            local_errors += failed
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    wall = time.perf_counter() - start
+    latencies_ms = np.array(latencies or [0.0]) * 1000
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_s': round(len(latencies) / wall, 1),
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies_ms, 95)), 2),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 2)
+    }
+
+def main():
+    """
+    Load-tests the served app at increasing client counts and reports the requests/s sustained under a p95 target.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--server', choices=['gunicorn', 'flask'], default='gunicorn')
+    parser.add_argument('--url', help='load-test an already running server instead of starting one')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=16, help='gunicorn threads per worker')
+    parser.add_argument('--port', type=int, default=5057)
+    parser.add_argument('--clients', default='1,4,16,32', help='comma-separated concurrent client counts')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per client count')
+    parser.add_argument('--target-p95-ms', type=float, default=100.0)
+    parser.add_argument('--sources', type=int, default=50, help='sources in the seeded analysis run')
+    parser.add_argument('--items', type=int, default=5, help='items per category and source')
+    parser.add_argument('--output', default='load_test.json')
+    args = parser.parse_args()
+
+    report = {
+        'config': {
+            'server': 'external' if args.url else args.server,
+            'workers': args.workers,
+            'threads': args.threads,
+            'duration_s': args.duration,
+            'target_p95_ms': args.target_p95_ms,
+            'sources': args.sources,
+            'items_per_category': args.items,
+            'mix': [{'weight': weight, 'request': f"{method} {path}"} for weight, method, path, _ in REQUEST_MIX]
+        },
+        'levels': []
+    }
+    with tempfile.TemporaryDirectory() as data_dir:
+        process = None
+        base_url = args.url
+        if base_url is None:
+            seed_store(data_dir, args.sources, args.items)
+            process, base_url = start_server(args.server, args.port, args.workers, args.threads, data_dir)
+        try:
+            for clients in (int(count) for count in args.clients.split(',')):
+                print(f"{clients} clients for {args.duration:g}s...")
+                report['levels'].append(run_level(base_url, clients, args.duration, seed=clients * 1000))
+        finally:
+            if process is not None:
+                # SIGTERM: the workers drain their jobs and exit
+                process.terminate()
+                process.wait(timeout=60)
+
+    within_target = [level for level in report['levels'] if level['p95_ms'] <= args.target_p95_ms]
+    best = max(within_target, key=lambda level: level['requests_per_s'], default=None)
+    report['requests_per_s_at_target_p95'] = best['requests_per_s'] if best else None
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+
+    print(f"\n{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for level in report['levels']:
+        print(f"{level['clients']:>8}{level['requests_per_s']:>10.1f}{level['p50_ms']:>10.2f}"
+              f"{level['p95_ms']:>10.2f}{level['p99_ms']:>10.2f}{level['errors']:>8}")
+    if best:
+        print(f"\n{best['requests_per_s']} req/s with p95 <= {args.target_p95_ms:g} ms ({best['clients']} clients)")
+    else:
+        print(f"\nNo client count kept p95 under {args.target_p95_ms:g} ms")
+    print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
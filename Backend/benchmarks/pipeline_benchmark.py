@@ -0,0 +1,333 @@
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'web_intelligence_agent'))
+
+from main import crawl_websites_concurrent, extract_text_and_metadata, analyze_with_gemini
+from llm_scheduler import AnalysisScheduler, FakeGenerativeModel
+from fetcher import HttpFetcher
+from scoring_agent import filter_results
+from extract_benchmark import load_pages, synthetic_page
+
+USER_PROFILE = {
+    'interests': ['fintech', 'AI', 'real estate'],
+    'type': 'want to invest (take risk)',
+    'financial_data': {'owns': ['houses in Gabes', 'land', 'business']}
+}
+
+# Canned Gemini answer: a few items per page, some mentioning the profile's interests
+FAKE_ANALYSIS = {
+    'news': [
+        {'title': 'BCT keeps its key interest rate unchanged',
+         'content': 'The central bank held rates as inflation eased.'},
+        {'title': 'Fintech lending grows in Tunisia',
+         'content': 'Digital lenders doubled their fintech loan book.'}
+    ],
+    'opportunities': [
+        {'title': 'AI startup raises seed funding', 'content': 'An AI company opened a new funding round.'}
+    ],
+    'threats': [
+        {'title': 'Real estate prices fall in Gabes', 'content': 'Real estate demand slowed in the south.'}
+    ]
+}
+
+def percentile_summary(latencies, wall_seconds, peak_bytes, errors=0):
+    """
+    Summarizes per-operation latencies (seconds) as the report entry of one stage.
+    """
+    latencies_ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        'count': len(latencies),
+        'errors': errors,
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies_ms, 95)), 3),
+        'wall_s': round(wall_seconds, 4),
+        'throughput_per_s': round(len(latencies) / wall_seconds, 2) if wall_seconds > 0 else None,
+        'peak_memory_mb': round(peak_bytes / 2 ** 20, 2)
+    }
+
+def measure(function):
+    """
+    Runs function() and returns (its result, wall seconds, peak traced memory in bytes).
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = function()
+    finally:
+        wall = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, wall, peak
+
+def make_fixture_handler(pages):
+    """
+    Builds a request handler serving /page/<n> from the fixture pages, cycling over them.
+    """
+    contents = [content.encode('utf-8') for content in pages.values()]
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            try:
+                body = contents[int(self.path.rstrip('/').rsplit('/', 1)[-1]) % len(contents)]
+            except ValueError:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+def bench_crawl(urls, concurrency, fetcher=None):
+    """
+    Crawls the fixture server; latency is the time from the start of the run to each page's completion.
+
+    With a fetcher, pages go through the plain-HTTP tier and only thin ones are rendered in the browser.
+    """
+    async def run():
+        start = time.perf_counter()
+        completions = []
+        failures = 0
+        async for _, result in crawl_websites_concurrent(urls, max_concurrency=concurrency,
+                                                         per_host_limit=concurrency, fetcher=fetcher):
+            completions.append(time.perf_counter() - start)
+            failures += 0 if result.success else 1
+        return completions, failures
+
+    (completions, failures), wall, peak = measure(lambda: asyncio.run(run()))
+    return percentile_summary(completions, wall, peak, errors=failures)
+
+def bench_fetch_http(urls, concurrency, fetcher):
+    """
+    Fetches the fixture server with the plain-HTTP tier alone; pages it would hand to the browser count as errors.
+    """
+    def run():
+        start = time.perf_counter()
+        completions = []
+        failures = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            for result in concurrent.futures.as_completed([executor.submit(fetcher.fetch, url) for url in urls]):
+                completions.append(time.perf_counter() - start)
+                failures += 0 if result.result().success else 1
+        return completions, failures
+
+    (completions, failures), wall, peak = measure(run)
+    return percentile_summary(completions, wall, peak, errors=failures)
+
+def bench_extract(page_contents):
+    latencies = []
+
+    def run():
+        extracted = []
+        for content in page_contents:
+            start = time.perf_counter()
+            extracted.append(extract_text_and_metadata(content))
+            latencies.append(time.perf_counter() - start)
+        return extracted
+
+    extracted, wall, peak = measure(run)
+    return percentile_summary(latencies, wall, peak), extracted
+
+def bench_analyze(texts, gemini_latency, concurrency):
+    """
+    Analyzes every text with the fake Gemini model through a shared AnalysisScheduler.
+    """
+    scheduler = AnalysisScheduler(
+        model=FakeGenerativeModel(latency=gemini_latency, response=FAKE_ANALYSIS),
+        requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9, max_concurrency=concurrency
+    )
+    latencies = []
+
+    async def run():
+        slots = asyncio.Semaphore(concurrency)
+
+        async def analyze_one(text):
+            async with slots:
+                start = time.perf_counter()
+                analysis = await analyze_with_gemini(text, USER_PROFILE, model=scheduler)
+                latencies.append(time.perf_counter() - start)
+                return analysis
+
+        return await asyncio.gather(*(analyze_one(text) for text in texts))
+
+    analyses, wall, peak = measure(lambda: asyncio.run(run()))
+    return percentile_summary(latencies, wall, peak), analyses
+
+def bench_filter(analysis_results, repeat):
+    latencies = []
+
+    def run():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            filtered = filter_results(analysis_results, USER_PROFILE)
+            latencies.append(time.perf_counter() - start)
+        return filtered
+
+    filtered, wall, peak = measure(run)
+    return percentile_summary(latencies, wall, peak), filtered
+
+def load_app(store_dir):
+    """
+    Imports the Flask app with its data directory (stores, embeddings, locks) in store_dir.
+
+    The directory is set before the import because the app opens its stores
+    and imports the saved results at import time; the refresh daemon is off.
+    """
+    if 'app' in sys.modules:
+        raise RuntimeError('The app was already imported with another data directory')
+    os.environ['AURA_DATA_DIR'] = store_dir
+    os.environ['REFRESH_ENABLED'] = '0'
+    import app as app_module
+    return app_module
+
+ENDPOINTS = [
+    ('GET', '/api/health', None),
+    ('GET', '/api/intelligence/results', None),
+    ('POST', '/api/scoring/filter', {'threshold': 1}),
+    ('GET', '/api/news/personalized', None),
+    ('GET', '/api/opportunities/personalized?limit=20', None)
+]
+
+def bench_endpoints(app_module, analysis_results, filtered_results, repeat):
+    """
+    Times each endpoint through the Flask test client against a store holding this size's runs.
+    """
+    analysis_run_id = app_module.result_store.save_run('analysis', analysis_results)
+    app_module.save_final_results(filtered_results, USER_PROFILE, 1, analysis_run_id)
+    client = app_module.app.test_client()
+    report = {}
+    for method, path, body in ENDPOINTS:
+        latencies = []
+        errors = 0
+
+        def run():
+            nonlocal errors
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = client.open(path, method=method, json=body)
+                latencies.append(time.perf_counter() - start)
+                errors += 0 if response.status_code < 400 else 1
+
+        _, wall, peak = measure(run)
+        report[f"{method} {path}"] = percentile_summary(latencies, wall, peak, errors=errors)
+    return report
+
+def main():
+    """
+    Runs every pipeline stage and the Flask endpoints at several source counts and writes a JSON report.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fixtures', default=os.path.join(os.path.dirname(__file__), 'pages'),
+                        help='directory of saved .html pages replayed by the local server')
+    parser.add_argument('--sizes', default='5,50,500', help='comma-separated numbers of sources')
+    parser.add_argument('--gemini-latency', type=float, default=0.05, help='fake Gemini latency in seconds')
+    parser.add_argument('--concurrency', type=int, default=8, help='crawl and analysis concurrency')
+    parser.add_argument('--repeat', type=int, default=20, help='repetitions of the scoring and endpoint stages')
+    parser.add_argument('--skip-crawl', action='store_true',
+                        help='skip the browser crawl and the HTTP tier\'s browser fallback (no Chromium installed)')
+    parser.add_argument('--synthetic', action='store_true',
+                        help='replay generated pages of 20, 100 and 400 articles instead of the saved pages')
+    parser.add_argument('--output', default='pipeline_benchmark.json')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        pages = {f'synthetic-{size}.html': synthetic_page(size) for size in (20, 100, 400)}
+    else:
+        # The server replays rendered pages, so the markdown fixtures are left out
+        pages = load_pages(args.fixtures, extensions=('.html', '.htm'))
+        if not pages:
+            parser.error(f"no saved .html pages found in {args.fixtures} (use --synthetic for generated pages)")
+    page_contents = list(pages.values())
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_fixture_handler(pages))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    report = {
+        'config': {
+            'sizes': [int(size) for size in args.sizes.split(',')],
+            'fixtures': sorted(pages),
+            'gemini_latency_s': args.gemini_latency,
+            'concurrency': args.concurrency,
+            'repeat': args.repeat,
+            'python': platform.python_version(),
+            'note': 'peak_memory_mb is the peak of Python allocations traced during the stage'
+        },
+        'results': {}
+    }
+    with tempfile.TemporaryDirectory() as store_dir:
+        app_module = load_app(store_dir)
+        try:
+            for size in report['config']['sizes']:
+                print(f"Benchmarking {size} sources...")
+                stages = {}
+                urls = [f"{base_url}/page/{index}" for index in range(size)]
+                try:
+                    if args.skip_crawl:
+                        # No browser to fall back to: only the HTTP tier itself is timed
+                        stages['crawl_websites_http_tier'] = bench_fetch_http(urls, args.concurrency, HttpFetcher())
+                    else:
+                        stages['crawl_websites_http_tier'] = bench_crawl(urls, args.concurrency,
+                                                                         fetcher=HttpFetcher())
+                except Exception as e:
+                    stages['crawl_websites_http_tier'] = {'error': str(e)}
+                if args.skip_crawl:
+                    stages['crawl_websites_async'] = {'skipped': True}
+                else:
+                    try:
+                        stages['crawl_websites_async'] = bench_crawl(urls, args.concurrency)
+                    except Exception as e:
+                        stages['crawl_websites_async'] = {'error': str(e)}
+                contents = [page_contents[index % len(page_contents)] for index in range(size)]
+                stages['extract_text_and_metadata'], extracted = bench_extract(contents)
+                stages['analyze_with_gemini'], analyses = bench_analyze(
+                    [page['text'][:6000] for page in extracted], args.gemini_latency, args.concurrency
+                )
+                analysis_results = [dict(analysis, url=url) for analysis, url in zip(analyses, urls)]
+                stages['filter_results'], filtered = bench_filter(analysis_results, args.repeat)
+                stages['endpoints'] = bench_endpoints(app_module, analysis_results, filtered, args.repeat)
+                report['results'][str(size)] = stages
+        finally:
+            server.shutdown()
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report['peak_rss_mb'] = round(max_rss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+
+    print(f"\n{'sources':>8}  {'stage':<48}{'p50 ms':>10}{'p95 ms':>10}{'ops/s':>10}{'peak MB':>9}")
+    for size, stages in report['results'].items():
+        rows = [(name, stats) for name, stats in stages.items() if name != 'endpoints']
+        rows += list(stages['endpoints'].items())
+        for name, stats in rows:
+            if 'p50_ms' not in stats:
+                print(f"{size:>8}  {name:<48}{stats.get('error', 'skipped')[:40]:>10}")
+                continue
+            print(f"{size:>8}  {name[:47]:<48}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                  f"{stats['throughput_per_s'] or 0:>10.1f}{stats['peak_memory_mb']:>9.1f}")
+    print(f"\nPeak RSS: {report['peak_rss_mb']} MB. Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
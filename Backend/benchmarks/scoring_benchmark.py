@@ -0,0 +1,172 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'web_intelligence_agent'))
+
+from scoring_agent import BatchScorer, score_item
+from semantic_scoring import EmbeddingIndex, SemanticScorer, make_embedder
+
+USER_PROFILE = {'interests': ['fintech', 'AI', 'real estate', 'startups', 'bourse de tunis']}
+
+FILLER = ('the central bank kept its key interest rate unchanged while inflation eased as the market '
+          'rallied on strong demand across banks insurers and regulators in tunisia').split()
+
+INTEREST_PHRASES = ['fintech', 'AI', 'real estate', 'startups', 'bourse de tunis']
+
+CALIBRATION_INTERESTS = ['fintech', 'AI', 'real estate', 'startups', 'crypto']
+
+# Hand-labelled (text, interests it is about) pairs; most relevant ones avoid the interest's own wording
+CALIBRATION_ITEMS = [
+    ('Mobile banking app adds instant digital payments between e-wallets', {'fintech'}),
+    ('Neobank licence granted to a payment startup by the central bank', {'fintech', 'startups'}),
+    ('Tunisian e-wallet passes one million users as digital payments grow', {'fintech'}),
+    ('Banks open their APIs to financial technology firms under new open banking rules', {'fintech'}),
+    ('Mobile money transfers double as merchants accept QR code payments', {'fintech'}),
+    ('Online lending platform offers instant micro-loans through a smartphone app', {'fintech'}),
+    ('Machine learning model cuts loan default prediction errors at a local bank', {'AI', 'fintech'}),
+    ('Generative AI assistants spread through customer service centres', {'AI'}),
+    ('Artificial intelligence research lab opens in Tunis with deep learning focus', {'AI'}),
+    ('Automation and machine learning reshape call centres in Sfax', {'AI'}),
+    ('Large language model trained on Tunisian Arabic released to developers', {'AI'}),
+    ('Deep learning system detects crop disease from drone images', {'AI'}),
+    ('Housing prices in Tunis rise as construction costs climb', {'real estate'}),
+    ('Mortgage rates ease, reviving demand for apartments and land', {'real estate'}),
+    ('Rental yields on seaside property attract foreign buyers', {'real estate'}),
+    ('New residential construction permits jump in Sousse and Monastir', {'real estate'}),
+    ('Promoteurs immobiliers face slowing sales of new housing units', {'real estate'}),
+    ('Land prices near Gabes climb after the new port project', {'real estate'}),
+    ('Venture capital fund raises 20 million dinars for early-stage companies', {'startups'}),
+    ('Seed funding round closes for a young logistics company founded in 2023', {'startups'}),
+    ('Startup Act label granted to 150 new companies this year', {'startups'}),
+    ('Entrepreneurship programme backs founders with grants and mentoring', {'startups'}),
+    ('Incubator launches accelerator for early-stage founders in agritech', {'startups'}),
+    ('Angel investors pour money into young tech companies in Tunis', {'startups'}),
+    ('Bitcoin trading volumes surge despite the regulator warning', {'crypto'}),
+    ('Blockchain tokens and digital assets to be supervised under a new law', {'crypto'}),
+    ('Cryptocurrency exchange fined for operating without authorisation', {'crypto'}),
+    ('Stablecoin remittances grow among Tunisians working abroad', {'crypto'}),
+    ('Ethereum price swings unsettle retail holders of digital assets', {'crypto'}),
+    ('Central bank keeps its key interest rate at 8 percent as inflation eases', set()),
+    ('Olive oil exports reach a record on strong European demand', set()),
+    ('Tourism receipts rise 12 percent over the summer season', set()),
+    ('Phosphate production recovers after months of strikes', set()),
+    ('Government bond auction draws strong demand from local banks', set()),
+    ('Dinar steadies against the euro ahead of the budget vote', set()),
+    ('Inflation slows to 6 percent on lower food prices', set()),
+    ('Drought threatens the cereal harvest in the north west', set()),
+    ('Insurers report higher premiums on car and health policies', set()),
+    ('Textile manufacturers lose orders to competitors in Asia', set()),
+    ('Budget deficit narrows as tax revenue beats forecasts', set()),
+    ('Stock exchange index closes higher led by banking shares', set()),
+    ('Electricity and gas tariffs raised for industrial users', set()),
+    ('IMF mission concludes talks on the reform programme', set()),
+    ('Trade deficit widens on higher energy imports', set()),
+    ('Public sector wage agreement signed with the unions', set()),
+]
+
+def synthetic_items(count, hit_rate=0.05, seed=42):
+    """
+    Builds LLM-style items from filler words, mentioning a profile interest in about hit_rate of the fields.
+    """
+    rng = random.Random(seed)
+
+    def text(words):
+        parts = rng.choices(FILLER, k=words)
+        if rng.random() < hit_rate:
+            parts.insert(rng.randrange(len(parts)), rng.choice(INTEREST_PHRASES))
+        return ' '.join(parts)
+
+    return [
+        {
+            'title': text(8).capitalize(),
+            'content': text(40),
+            'relevance': 'Synthetic item'
+        }
+        for _ in range(count)
+    ]
+
+def calibrate(embedder, thresholds):
+    """
+    Prints the precision, recall and F1 of SemanticScorer's interest matches on CALIBRATION_ITEMS per threshold.
+    """
+    items = [{'title': text} for text, _ in CALIBRATION_ITEMS]
+    labels = np.array([[interest in interests for interest in CALIBRATION_INTERESTS]
+                       for _, interests in CALIBRATION_ITEMS])
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = EmbeddingIndex(os.path.join(index_dir, 'embeddings.npz'), embedder=embedder)
+        print(f"Calibration of {embedder.name} on {labels.size} (item, interest) pairs, {labels.sum()} relevant")
+        print(f"{'threshold':>10}{'precision':>11}{'recall':>8}{'F1':>7}")
+        for threshold in thresholds:
+            scorer = SemanticScorer({'interests': CALIBRATION_INTERESTS}, index, similarity_threshold=threshold)
+            matches = scorer.match_matrix(items)
+            true_positives = (matches & labels).sum()
+            precision = true_positives / max(matches.sum(), 1)
+            recall = true_positives / labels.sum()
+            f1 = 2 * precision * recall / (precision + recall) if true_positives else 0.0
+            marker = '  <- default' if abs(threshold - embedder.similarity_threshold) < 1e-9 else ''
+            print(f"{threshold:>10.3f}{precision:>11.2f}{recall:>8.2f}{f1:>7.2f}{marker}")
+
+def semantic_timings(embedder, sizes, hit_rate):
+    """
+    Times SemanticScorer on a cold index, again on the warm index, and after adding 1% new items.
+    """
+    print(f"\n{'items':>8}{'cold s':>9}{'embedded':>10}{'warm s':>9}{'embedded':>10}{'+1% s':>8}{'embedded':>10}")
+    for size in sizes:
+        items = synthetic_items(size, hit_rate)
+        new_items = synthetic_items(max(1, size // 100), hit_rate, seed=7)
+        with tempfile.TemporaryDirectory() as index_dir:
+            index = EmbeddingIndex(os.path.join(index_dir, 'embeddings.npz'), embedder=embedder)
+            scorer = SemanticScorer(USER_PROFILE, index)
+            timings = []
+            for batch in (items, items, items + new_items):
+                embedded = index.embedded
+                start = time.perf_counter()
+                scorer.score_items(batch)
+                timings.append((time.perf_counter() - start, index.embedded - embedded))
+        print(f"{size:>8}" + ''.join(f"{seconds:>9.3f}{embedded:>10}" if column < 2 else f"{seconds:>8.3f}{embedded:>10}"
+                                     for column, (seconds, embedded) in enumerate(timings)))
+
+def main():
+    """
+    Compares per-item score_item with BatchScorer on synthetic corpora of increasing size.
+
+    With --semantic, calibrates SemanticScorer's similarity threshold on a
+    labelled set instead and times it on cold and warm embedding indexes.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--hit-rate', type=float, default=0.05,
+                        help='share of item fields mentioning one of the profile interests')
+    parser.add_argument('--semantic', action='store_true', help='calibrate and time the semantic scorer')
+    parser.add_argument('--model', default=os.environ.get('SEMANTIC_MODEL'),
+                        help='sentence-transformers model to use instead of the hashing embedder')
+    args = parser.parse_args()
+
+    if args.semantic:
+        embedder = make_embedder(args.model)
+        calibrate(embedder, np.arange(0.1, 0.5, 0.025))
+        semantic_timings(embedder, args.sizes, args.hit_rate)
+        return
+
+    print(f"{'items':>8}{'score_item s':>14}{'batch s':>10}{'speedup':>10}{'identical':>11}")
+    for size in args.sizes:
+        items = synthetic_items(size, args.hit_rate)
+
+        start = time.perf_counter()
+        reference = [score_item(item, USER_PROFILE) for item in items]
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = BatchScorer(USER_PROFILE).score_items(items).tolist()
+        batch_time = time.perf_counter() - start
+
+        print(f"{size:>8}{loop_time:>14.3f}{batch_time:>10.3f}{loop_time / batch_time:>9.1f}x{str(batch == reference):>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import base64
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+FEED_CATEGORIES = ('news', 'opportunities', 'threats')
+
+class CursorError(ValueError):
+    """
+    Raised for a malformed cursor or one that points into an older feed.
+    """
+
+def encode_cursor(run_id, offset):
+    return base64.urlsafe_b64encode(f"{run_id}:{offset}".encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        run_id, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        return int(run_id), int(offset)
+    except ValueError as e:
+        raise CursorError('Invalid cursor') from e
+
+class FeedCache:
+    """
+    Materialized per-category feeds of the latest scoring run, sorted by score and held in memory.
+
+    Feeds are rebuilt once when scoring results change (rebuild is called after
+    every scoring run) and, for other worker processes, when a check done at
+    most every check_interval seconds finds a newer run in the store. Feeds of
+    at most max_profiles profile keys are kept, the least recently used being
+    dropped (and rebuilt from the store if asked for again).
+    """
+
+    def __init__(self, result_store, check_interval=5.0, max_profiles=256):
+        self.result_store = result_store
+        self.check_interval = check_interval
+        self.max_profiles = max_profiles
+        self.lock = threading.Lock()
+        self.feeds = OrderedDict()
+        self.evictions = 0
+
+    def rebuild(self, profile_key=None):
+        """
+        Rebuilds the feeds of the latest scoring run (for one profile, or overall) and returns them.
+        """
+        run = self.result_store.latest_run('scoring', profile_key)
+        if run is None:
+            materialized = {'run_id': None, 'checked_at': time.time(), 'categories': {}}
+        else:
+            categories = {}
+            for category in FEED_CATEGORIES:
+                items = self.result_store.query_items(run['id'], category)
+                etag = hashlib.sha1(f"{run['id']}:{category}:{len(items)}".encode()).hexdigest()
+                categories[category] = {'items': items, 'etag': etag}
+            materialized = {'run_id': run['id'], 'checked_at': time.time(), 'categories': categories}
+        with self.lock:
+            self.feeds[profile_key] = materialized
+            self.feeds.move_to_end(profile_key)
+            while len(self.feeds) > self.max_profiles:
+                self.feeds.popitem(last=False)
+                self.evictions += 1
+        return materialized
+
+    def on_scoring_run(self, profile_key):
+        """
+        Refreshes the feeds affected by a new scoring run for profile_key.
+        """
+        self.rebuild(None)
+        if profile_key:
+            self.rebuild(profile_key)
+
+    def _current(self, profile_key):
+        with self.lock:
+            materialized = self.feeds.get(profile_key)
+            if materialized is not None:
+                self.feeds.move_to_end(profile_key)
+        if materialized is None:
+            return self.rebuild(profile_key)
+        if time.time() - materialized['checked_at'] > self.check_interval:
+            run = self.result_store.latest_run('scoring', profile_key)
+            if (run['id'] if run else None) != materialized['run_id']:
+                return self.rebuild(profile_key)
+            materialized['checked_at'] = time.time()
+        return materialized
+
+    def page(self, category, profile_key=None, limit=None, cursor=None):
+        """
+        Returns one page of a feed as a dict, or None if there are no scoring results yet.
+
+        Without limit the whole feed is returned. next_cursor is set when more
+        items follow; a cursor from an older feed or pointing outside it raises CursorError.
+        """
+        materialized = self._current(profile_key)
+        if materialized['run_id'] is None:
+            return None
+        feed = materialized['categories'][category]
+        offset = 0
+        if cursor:
+            cursor_run_id, offset = decode_cursor(cursor)
+            if cursor_run_id != materialized['run_id']:
+                raise CursorError('Cursor refers to an older feed; restart without a cursor')
+        items = feed['items']
+        if not 0 <= offset <= len(items):
+            raise CursorError('Cursor points outside the feed')
+        end = len(items) if limit is None else min(len(items), offset + max(0, limit))
+        return {
+            'run_id': materialized['run_id'],
+            'items': items[offset:end],
+            'total': len(items),
+            'next_cursor': encode_cursor(materialized['run_id'], end) if end < len(items) else None,
+            'etag': f"{feed['etag']}-{offset}-{end}"
+        }
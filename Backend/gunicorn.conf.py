@@ -0,0 +1,67 @@
+"""
+Gunicorn settings of the production server: gunicorn -c gunicorn.conf.py wsgi:app
+
+Each worker process imports the app once and keeps it for its lifetime: one
+background event loop running the analysis jobs, one rate-limited Gemini
+client and the SQLite stores are shared by all the worker's request threads.
+Requests only submit jobs or read stored results, so threads (gthread) rather
+than more processes is what scales the job-streaming (SSE) connections.
+
+Jobs live in the worker that accepted them: with WEB_CONCURRENCY > 1, route a
+client's /api/jobs/... requests to the same worker (sticky sessions), or keep
+one worker and raise GUNICORN_THREADS.
+"""
+import os
+import signal
+import sys
+import threading
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+# Server-Sent Event streams stay open for minutes; gthread's timeout only watches the worker heartbeat
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+keepalive = 5
+
+# Workers must not inherit the job loop thread of a preloaded app, so every worker imports it itself
+preload_app = False
+
+# Time a stopping worker is given to drain its jobs (JOB_DRAIN_TIMEOUT) before it is killed
+graceful_timeout = int(float(os.environ.get('JOB_DRAIN_TIMEOUT', 60))) + 15
+
+# Access log destination ('-' is stdout); set GUNICORN_ACCESS_LOG= to turn it off
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+
+def post_worker_init(worker):
+    """
+    Starts draining the worker's jobs as soon as it is asked to stop, while its open requests finish.
+
+    Without this the drain would only start once every request (including
+    job event streams waiting for those very jobs) had ended.
+    """
+    handle_exit = worker.handle_exit
+    worker.drain_thread = None
+
+    def drain_on_exit(sig, frame):
+        handle_exit(sig, frame)
+        if worker.drain_thread is None:
+            worker.drain_thread = threading.Thread(target=sys.modules['app'].shutdown_app, name='job-drain',
+                                                   daemon=True)
+            worker.drain_thread.start()
+
+    signal.signal(signal.SIGTERM, drain_on_exit)
+
+def worker_exit(server, worker):
+    """
+    Waits for the drain started on SIGTERM, or drains the worker's jobs itself when the worker stopped otherwise.
+    """
+    app = sys.modules.get('app')
+    if app is None:
+        return
+    drain_thread = getattr(worker, 'drain_thread', None)
+    if drain_thread is not None:
+        drain_thread.join(graceful_timeout)
+    # Returns the drain's outcome once it has run; only drains here if no SIGTERM started it
+    app.shutdown_app()
@@ -0,0 +1,227 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+
+from web_intelligence_agent.metrics import span, start_trace, summarize_trace
+
+class Job:
+    """
+    A submitted background analysis: its status, progress and the events it has published.
+    """
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.completed = 0
+        self.total = None
+        self.result = None
+        self.error = None
+        self.dedupe_key = None
+        self.shared_with = 0
+        self.events = []
+        self.spans = []
+        self.condition = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in ('succeeded', 'failed')
+
+    def set_total(self, total):
+        """
+        Sets the number of units (e.g. URLs) the job will process.
+        """
+        self.total = total
+
+    def publish(self, event, data=None):
+        """
+        Appends an event to the job's stream and wakes up its listeners.
+        """
+        with self.condition:
+            if event == 'result':
+                self.completed += 1
+            self.events.append({'id': len(self.events), 'event': event, 'data': data})
+            self.condition.notify_all()
+
+    def finish(self, status, error=None):
+        """
+        Marks the job succeeded or failed and publishes its final status event.
+
+        Both happen under the job's condition, so a listener that sees the job
+        done also sees the final event.
+        """
+        with self.condition:
+            self.error = error
+            self.finished_at = time.time()
+            self.status = status
+            self.events.append({'id': len(self.events), 'event': 'status', 'data': {'status': status, 'error': error}})
+            self.condition.notify_all()
+
+    def wait_for_events(self, after, timeout):
+        """
+        Returns the events with an id greater than after, waiting up to timeout seconds for new ones.
+        """
+        with self.condition:
+            if len(self.events) <= after + 1 and not self.done:
+                self.condition.wait(timeout)
+            return self.events[after + 1:]
+
+    def to_dict(self, include_result=True):
+        job = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'progress': {'completed': self.completed, 'total': self.total},
+            'shared_with': self.shared_with,
+            'trace': summarize_trace(self.spans)
+        }
+        if self.error:
+            job['error'] = self.error
+        if include_result and self.status == 'succeeded':
+            job['result'] = self.result
+        return job
+
+class JobManagerClosed(RuntimeError):
+    """
+    Raised when a job is submitted after the manager started shutting down.
+    """
+
+class JobManager:
+    """
+    Runs analysis jobs on a background thread with its own long-lived event loop.
+
+    Request handlers submit a coroutine function and get a Job back immediately,
+    so no request worker is held while crawling and calling Gemini. At most
+    max_concurrent_jobs run at once; the most recent max_jobs are kept for polling.
+
+    Jobs submitted with a dedupe_key are single-flight: while a job with the
+    same key is queued or running, submitting again returns that job instead of
+    starting a second, identical computation.
+    """
+
+    def __init__(self, max_concurrent_jobs=2, max_jobs=200):
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.inflight = {}
+        self.futures = set()
+        self.closed = False
+        self.lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, name='analysis-jobs', daemon=True)
+        self.thread.start()
+        self.slots = asyncio.run_coroutine_threadsafe(self._make_slots(), self.loop).result()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _make_slots(self):
+        return asyncio.Semaphore(self.max_concurrent_jobs)
+
+    def submit(self, kind, job_function, *args, dedupe_key=None, **kwargs):
+        """
+        Schedules job_function(job, *args, **kwargs) on the background loop and returns the Job.
+
+        If a job with the same dedupe_key is still in flight, that job is returned instead.
+        Raises JobManagerClosed once shutdown() has been called.
+        """
+        with self.lock:
+            if self.closed:
+                raise JobManagerClosed('The server is shutting down and does not accept new jobs')
+            if dedupe_key is not None and dedupe_key in self.inflight:
+                job = self.inflight[dedupe_key]
+                job.shared_with += 1
+                return job
+            job = Job(kind)
+            job.dedupe_key = dedupe_key
+            self.jobs[job.id] = job
+            if dedupe_key is not None:
+                self.inflight[dedupe_key] = job
+            self._prune()
+            future = asyncio.run_coroutine_threadsafe(self._run(job, job_function, args, kwargs), self.loop)
+            self.futures.add(future)
+        future.add_done_callback(self._forget)
+        return job
+
+    def _forget(self, future):
+        with self.lock:
+            self.futures.discard(future)
+
+    def shutdown(self, timeout=None, cleanup=None):
+        """
+        Stops accepting jobs, waits up to timeout seconds for the queued and running ones, then stops the loop.
+
+        Jobs still unfinished after timeout are cancelled and marked failed.
+        cleanup, a coroutine function, is run on the loop before it stops (e.g.
+        to close resources bound to it). Returns the number of jobs that had
+        to be cancelled.
+        """
+        with self.lock:
+            self.closed = True
+            futures = set(self.futures)
+        if futures:
+            print(f"Draining {len(futures)} analysis job(s)...")
+        _, pending = concurrent.futures.wait(futures, timeout=timeout)
+        for future in pending:
+            future.cancel()
+        # Give the cancelled jobs a moment to record their status before the loop stops
+        deadline = time.time() + 5
+        while pending and self.queue_depth() and time.time() < deadline:
+            time.sleep(0.05)
+        if cleanup is not None and self.loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(cleanup(), self.loop).result(30)
+            except Exception as e:
+                print(f"Error while cleaning up the job loop: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        return len(pending)
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def queue_depth(self):
+        """
+        Returns the number of jobs that are queued or running.
+        """
+        with self.lock:
+            return sum(1 for job in self.jobs.values() if not job.done)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        while len(self.jobs) > self.max_jobs and finished:
+            del self.jobs[finished.pop(0)]
+
+    async def _run(self, job, job_function, args, kwargs):
+        try:
+            async with self.slots:
+                job.status = 'running'
+                job.started_at = time.time()
+                job.publish('status', {'status': 'running'})
+                # Every stage timed while the job runs is recorded as one of its spans
+                job.spans = start_trace()
+                try:
+                    with span('job', kind=job.kind):
+                        job.result = await job_function(job, *args, **kwargs)
+                    status, error = 'succeeded', None
+                except Exception as e:
+                    print(f"ERROR in job {job.id}: {traceback.format_exc()}")
+                    status, error = 'failed', str(e)
+        except asyncio.CancelledError:
+            status, error = 'failed', 'Cancelled because the server shut down'
+        with self.lock:
+            if self.inflight.get(job.dedupe_key) is job:
+                del self.inflight[job.dedupe_key]
+        job.finish(status, error)
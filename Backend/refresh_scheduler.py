@@ -0,0 +1,167 @@
+import os
+import random
+import threading
+import time
+import traceback
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_REFRESH_INTERVAL = 3600
+
+# Refresh interval (seconds) and priority (higher is refreshed first) per source host
+SOURCE_SCHEDULES = {
+    'www.bct.gov.tn': {'interval': 6 * 3600, 'priority': 2},
+    'www.cmf.tn': {'interval': 6 * 3600, 'priority': 2},
+    'www.ilboursa.com': {'interval': 1800, 'priority': 3},
+    'www.leconomistemaghrebin.com': {'interval': 3600, 'priority': 1},
+    'www.forbes.com': {'interval': 4 * 3600, 'priority': 0}
+}
+
+# Lock files held by this process, kept open so their locks last as long as the process
+_held_locks = []
+
+def acquire_process_lock(path):
+    """
+    Takes an exclusive lock on path for the lifetime of the process; returns False if another process holds it.
+
+    Lets exactly one of several server workers run the refresh daemon. Where
+    file locks are unavailable (Windows) every caller gets the lock.
+    """
+    if fcntl is None:
+        return True
+    lock_file = open(path, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    lock_file.write(f"{os.getpid()}\n")
+    lock_file.flush()
+    _held_locks.append(lock_file)
+    return True
+
+class RefreshScheduler:
+    """
+    Background daemon that keeps re-crawling and re-analyzing sources on their own schedules.
+
+    Every tick seconds the source list is re-read from sources_function (if
+    given) and the sources that are due are handed, highest priority
+    first and at most max_batch at a time, to refresh_function(urls), which
+    returns {url: error or None}. A source is next due after its interval plus
+    or minus jitter (a fraction of it) so refreshes do not line up; a failing
+    source backs off exponentially from backoff_base up to backoff_max seconds.
+    """
+
+    def __init__(self, refresh_function, sources_function=None, tick=30.0, max_batch=5, jitter=0.1,
+                 backoff_base=60.0, backoff_max=6 * 3600, schedules=None):
+        self.refresh_function = refresh_function
+        self.sources_function = sources_function
+        self.tick = tick
+        self.max_batch = max_batch
+        self.jitter = jitter
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.schedules = SOURCE_SCHEDULES if schedules is None else schedules
+        self.sources = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def sync_sources(self, urls):
+        """
+        Schedules new sources (due immediately) and forgets sources that are no longer targeted.
+        """
+        with self.lock:
+            for url in urls:
+                if url not in self.sources:
+                    schedule = self.schedules.get(urlparse(url).netloc, {})
+                    self.sources[url] = {
+                        'url': url,
+                        'interval': schedule.get('interval', DEFAULT_REFRESH_INTERVAL),
+                        'priority': schedule.get('priority', 0),
+                        'next_due': time.time(),
+                        'failures': 0,
+                        'last_success': None,
+                        'last_error': None
+                    }
+            for url in set(self.sources) - set(urls):
+                del self.sources[url]
+
+    def due_sources(self, now=None):
+        """
+        Returns the URLs of the sources that are due, highest priority and most overdue first.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            due = [source for source in self.sources.values() if source['next_due'] <= now]
+        due.sort(key=lambda source: (-source['priority'], source['next_due']))
+        return [source['url'] for source in due[:self.max_batch]]
+
+    def record_result(self, url, error=None, now=None):
+        """
+        Schedules a source's next refresh after a success, or backs it off after a failure.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            source = self.sources.get(url)
+            if source is None:
+                return
+            if error:
+                source['failures'] += 1
+                source['last_error'] = error
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (source['failures'] - 1))
+            else:
+                source['failures'] = 0
+                source['last_error'] = None
+                source['last_success'] = now
+                delay = source['interval']
+            source['next_due'] = now + delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def run_once(self):
+        """
+        Refreshes the sources that are due now and returns their URLs.
+        """
+        if self.sources_function:
+            try:
+                self.sync_sources(self.sources_function())
+            except Exception:
+                print(f"ERROR reading the sources to refresh: {traceback.format_exc()}")
+        urls = self.due_sources()
+        if not urls:
+            return []
+        print(f"Scheduled refresh of {urls}")
+        try:
+            errors = self.refresh_function(urls)
+        except Exception as e:
+            print(f"ERROR in scheduled refresh: {traceback.format_exc()}")
+            errors = {url: str(e) for url in urls}
+        for url in urls:
+            self.record_result(url, errors.get(url))
+        return urls
+
+    def _run(self):
+        while not self.stopped.is_set():
+            self.run_once()
+            self.stopped.wait(self.tick)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='refresh-scheduler', daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout=None):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def status(self):
+        """
+        Returns the schedule of every source, soonest due first.
+        """
+        with self.lock:
+            sources = [dict(source) for source in self.sources.values()]
+        return sorted(sources, key=lambda source: source['next_due'])
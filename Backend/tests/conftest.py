@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, 'web_intelligence_agent'))
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """
+    The Flask app module, imported with a scratch data directory, no Gemini key and no refresh daemon.
+    """
+    os.environ['AURA_DATA_DIR'] = str(tmp_path_factory.mktemp('data'))
+    os.environ['GEMINI_API_KEY'] = ''
+    os.environ['REFRESH_ENABLED'] = '0'
+    import app
+    yield app
+    app.shutdown_app(timeout=5)
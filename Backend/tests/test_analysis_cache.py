@@ -0,0 +1,56 @@
+import analysis_cache
+from analysis_cache import AnalysisCache, make_analysis_key, make_cache_key
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+def test_cache_key_ignores_whitespace_but_not_profile_model_or_prompt():
+    profile = {'interests': ['fintech']}
+    key = make_cache_key('Rates  rise\n today', profile, 'model', 1)
+    assert key == make_cache_key('Rates rise today', profile, 'model', 1)
+    assert key != make_cache_key('Rates rise today', {'interests': ['AI']}, 'model', 1)
+    assert key != make_cache_key('Rates rise today', profile, 'other-model', 1)
+    assert key != make_cache_key('Rates rise today', profile, 'model', 2)
+    assert key != make_cache_key('Rates rise today', None, 'model', 1)
+
+def test_analysis_key_separates_profiles_and_shared_analysis():
+    keys = {make_analysis_key(profile, 'model', 1) for profile in ({'interests': ['fintech']}, {'interests': ['AI']},
+                                                                   None)}
+    assert len(keys) == 3
+    assert make_analysis_key(None, 'model', 1) != make_analysis_key(None, 'model', 2)
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(analysis_cache, 'time', clock)
+    cache = AnalysisCache(str(tmp_path / 'cache.db'), ttl_seconds=60)
+    cache.put('key', {'news': [{'title': 'A'}]})
+    clock.now += 59
+    assert cache.get('key') == {'news': [{'title': 'A'}]}
+    clock.now += 2
+    assert cache.get('key') is None
+    assert cache.stats()['entries'] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(analysis_cache, 'time', clock)
+    cache = AnalysisCache(str(tmp_path / 'cache.db'), max_entries=2)
+    for key in ('a', 'b'):
+        clock.now += 1
+        cache.put(key, {'key': key})
+    clock.now += 1
+    cache.get('a')
+    clock.now += 1
+    cache.put('c', {'key': 'c'})
+    assert cache.get('b') is None
+    assert cache.get('a') == {'key': 'a'} and cache.get('c') == {'key': 'c'}
+    assert cache.stats()['evictions'] == 1
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    AnalysisCache(path).put('key', {'news': []})
+    assert AnalysisCache(path).get('key') == {'news': []}
@@ -0,0 +1,56 @@
+import asyncio
+from types import SimpleNamespace
+
+from batching import PageBatcher
+from llm_scheduler import FakeGenerativeModel
+from pipeline import run_pipeline
+
+PROFILE = {'interests': ['fintech']}
+
+PAGE_TEXT = 'Fintech lenders in Tunisia doubled their loan book this quarter. ' * 5
+
+class PageFetcher:
+    """
+    HTTP tier stand-in serving the same short article at every url.
+    """
+
+    def fetch(self, url, state=None):
+        return SimpleNamespace(
+            url=url, success=True, error_message=None, html=f"<html><body><p>{PAGE_TEXT}</p></body></html>",
+            markdown=SimpleNamespace(raw_markdown=PAGE_TEXT),
+            extracted={'title': url, 'description': '', 'text': PAGE_TEXT},
+            response_headers={}, tier='http'
+        )
+
+def analyze_all(batcher, texts):
+    async def run():
+        tasks = [asyncio.ensure_future(batcher.analyze(text)) for text in texts]
+        await asyncio.sleep(0)
+        batcher.close()
+        return await asyncio.gather(*tasks)
+    return asyncio.run(run())
+
+def test_pages_missing_from_the_batch_response_fall_back():
+    response = {'p0': {'news': [{'title': 'First'}]}, 'p1': {'news': 'not a list'}}
+    batcher = PageBatcher(PROFILE, model=FakeGenerativeModel(latency=0, response=response))
+    results = analyze_all(batcher, ['first page', 'second page', 'third page'])
+    assert results == [{'news': [{'title': 'First'}], 'opportunities': [], 'threats': []}, None, None]
+    assert batcher.stats == {'batches': 1, 'batched_pages': 1, 'fallbacks': 2}
+
+def test_single_page_is_not_a_fallback():
+    model = FakeGenerativeModel(latency=0)
+    batcher = PageBatcher(PROFILE, model=model)
+    assert analyze_all(batcher, ['only page']) == [None]
+    assert model.calls == 0
+    assert batcher.stats == {'batches': 0, 'batched_pages': 0, 'fallbacks': 0}
+
+def test_malformed_batch_response_falls_back_to_per_page_requests():
+    # A single-page answer has no per-page ids, so the batch output cannot be split
+    model = FakeGenerativeModel(latency=0, response={'news': [{'title': 'Fintech lending grows'}],
+                                                     'opportunities': [], 'threats': []})
+    urls = ['https://news.example/a', 'https://news.example/b']
+    results = asyncio.run(run_pipeline(urls, PROFILE, model=model, fetcher=PageFetcher(),
+                                       batch_tokens=8000))
+    assert sorted(result['url'] for result in results) == urls
+    assert all([item['title'] for item in result['news']] == ['Fintech lending grows'] for result in results)
+    assert model.calls == 1 + len(urls)
@@ -0,0 +1,55 @@
+import asyncio
+
+from chunking import analyze_chunks, select_relevant_chunks, split_into_chunks
+from llm_scheduler import FakeGenerativeModel, estimate_tokens
+
+PROFILE = {'interests': ['fintech']}
+
+def sentences(count, word='filler'):
+    return ' '.join(f"Sentence {index} is about {word} topics of the day." for index in range(count))
+
+def test_chunks_respect_the_token_budget_and_keep_every_sentence():
+    text = sentences(60)
+    chunks = split_into_chunks(text, max_tokens=50)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 50 for chunk in chunks)
+    assert ' '.join(chunks) == text
+    assert all(chunk.endswith('.') for chunk in chunks)
+
+def test_oversized_sentence_is_cut_on_word_boundaries():
+    words = [f"word{index}" for index in range(400)]
+    chunks = split_into_chunks(' '.join(words), max_tokens=40)
+    assert len(chunks) > 1
+    assert ' '.join(chunks).split() == words
+
+def test_empty_text_has_no_chunks():
+    assert split_into_chunks('') == []
+    assert split_into_chunks(None) == []
+
+def test_relevant_chunks_are_ranked_by_matches_and_kept_in_order():
+    # Sentences of equal length, so each chunk holds exactly eight of them
+    chunks = [sentences(8, topic) for topic in ('weather sport', 'fintech rates', 'weather sport', 'weather rates')]
+    max_tokens = 8 * estimate_tokens(sentences(1, 'weather sport'))
+    text = ' '.join(chunks)
+    assert split_into_chunks(text, max_tokens) == chunks
+    selected = select_relevant_chunks(text, {'financial_news': ['rates']}, ['fintech'], max_tokens, top_k=2)
+    assert selected == [chunks[1], chunks[3]]
+
+def test_chunks_without_matches_keep_the_opening_ones():
+    chunks = [sentences(8, topic) for topic in ('weather', 'culture', 'science', 'cinemas')]
+    max_tokens = 8 * estimate_tokens(sentences(1, 'weather'))
+    assert split_into_chunks(' '.join(chunks), max_tokens) == chunks
+    assert select_relevant_chunks(' '.join(chunks), {}, [], max_tokens, top_k=2) == chunks[:2]
+
+def test_streamed_items_skip_titles_repeated_across_chunks():
+    model = FakeGenerativeModel(latency=0, response={
+        'news': [{'title': 'Fintech lending grows'}, {'title': 'BCT keeps its rate'}],
+        'opportunities': [], 'threats': [{'title': 'Fintech lending grows'}]
+    })
+    streamed = []
+    merged = asyncio.run(analyze_chunks(['first chunk', 'second chunk'], PROFILE, model=model,
+                                        on_item=lambda category, item: streamed.append((category, item['title']))))
+    assert model.calls == 2
+    assert sorted(streamed) == [('news', 'BCT keeps its rate'), ('news', 'Fintech lending grows'),
+                                ('threats', 'Fintech lending grows')]
+    assert [item['title'] for item in merged['news']] == ['Fintech lending grows', 'BCT keeps its rate']
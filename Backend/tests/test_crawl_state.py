@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+from crawl_state import CrawlStateStore
+from llm_scheduler import FakeGenerativeModel
+from pipeline import run_pipeline
+
+URL = 'https://news.example/markets'
+
+PAGE_TEXT = ('The central bank of Tunisia kept its key rate at 8 percent while fintech lenders and real estate '
+             'developers reported new figures for the quarter. ') * 10
+
+PROFILE_A = {'name': 'A', 'interests': ['fintech']}
+PROFILE_B = {'name': 'B', 'interests': ['real estate']}
+
+class StaticFetcher:
+    """
+    HTTP tier stand-in that always serves the same page.
+    """
+
+    def __init__(self):
+        self.fetches = 0
+
+    def fetch(self, url, state=None):
+        self.fetches += 1
+        return SimpleNamespace(
+            url=url, success=True, error_message=None, html=f"<html><body><p>{PAGE_TEXT}</p></body></html>",
+            markdown=SimpleNamespace(raw_markdown=PAGE_TEXT),
+            extracted={'title': 'Markets', 'description': '', 'text': PAGE_TEXT},
+            response_headers={}, tier='http'
+        )
+
+def analyze(state_store, user_profile, headline):
+    model = FakeGenerativeModel(latency=0, response={'news': [{'title': headline}], 'opportunities': [],
+                                                     'threats': []})
+    results = asyncio.run(run_pipeline([URL], user_profile, model=model, state_store=state_store,
+                                       fetcher=StaticFetcher()))
+    return results[0], model.calls
+
+def test_unchanged_page_reuses_only_the_same_profiles_analysis(tmp_path):
+    store = CrawlStateStore(str(tmp_path / 'crawl_state.db'))
+
+    result_a, calls = analyze(store, PROFILE_A, 'for A')
+    assert [item['title'] for item in result_a['news']] == ['for A'] and calls == 1
+
+    # Same unchanged page, other profile: analyzed for B rather than handed A's analysis
+    result_b, calls = analyze(store, PROFILE_B, 'for B')
+    assert [item['title'] for item in result_b['news']] == ['for B'] and calls == 1
+    assert not result_b.get('unchanged')
+
+    # Shared (profile-less) analyses are kept apart from both
+    shared, calls = analyze(store, None, 'shared')
+    assert [item['title'] for item in shared['news']] == ['shared'] and calls == 1
+
+    # Each profile now reuses its own analysis without calling Gemini
+    for profile, headline in ((PROFILE_A, 'for A'), (PROFILE_B, 'for B'), (None, 'shared')):
+        result, calls = analyze(store, profile, 'not expected')
+        assert result['unchanged'] and calls == 0
+        assert [item['title'] for item in result['news']] == [headline]
+
+def test_changed_content_drops_saved_analyses(tmp_path):
+    store = CrawlStateStore(str(tmp_path / 'crawl_state.db'))
+    store.record_crawl(URL, 'fingerprint-1')
+    store.save_analysis(URL, {'news': [{'title': 'old'}]}, 'key-a')
+    assert store.get(URL, 'key-a')['analysis'] == {'news': [{'title': 'old'}]}
+    assert store.get(URL, 'key-b')['analysis'] is None
+
+    assert not store.record_crawl(URL, 'fingerprint-1')
+    assert store.get(URL, 'key-a')['analysis'] is not None
+    assert store.record_crawl(URL, 'fingerprint-2')
+    assert store.get(URL, 'key-a')['analysis'] is None
+
+def test_links_and_tier_survive_as_json(tmp_path):
+    store = CrawlStateStore(str(tmp_path / 'crawl_state.db'))
+    store.record_crawl(URL, 'fingerprint-1', etag='"v1"')
+    store.record_links(URL, [['https://news.example/a', 'A']])
+    store.record_tier(URL, 'browser')
+    state = store.get(URL)
+    assert state['etag'] == '"v1"' and state['links'] == [['https://news.example/a', 'A']]
+    assert store.tiers() == {URL: 'browser'}
+    assert state['analysis'] is None
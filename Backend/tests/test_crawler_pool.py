@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import crawler_pool
+from crawler_pool import CrawlerPool, MAX_CONSECUTIVE_ERRORS
+
+class FakeCrawler:
+    def __init__(self):
+        self.closed = False
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+    async def arun(self, url, config=None):
+        return SimpleNamespace(url=url, success='fail' not in url, error_message=None)
+
+async def crawl(pool, urls):
+    results = []
+    for url in urls:
+        async with pool.lease() as crawler:
+            results.append(await crawler.arun(url=url))
+    return results
+
+def test_unsuccessful_results_retire_the_crawler():
+    pool = CrawlerPool(crawler_factory=FakeCrawler)
+
+    async def run():
+        await crawl(pool, ['https://ok.example/', 'https://fail.example/'])
+        first = pool.crawlers[0]
+        assert first['errors'] == 1
+        # A success resets the count; only consecutive failures retire the crawler
+        await crawl(pool, ['https://ok.example/'])
+        assert first['errors'] == 0
+        await crawl(pool, ['https://fail.example/'] * MAX_CONSECUTIVE_ERRORS)
+        assert first['crawler'].closed and first not in pool.crawlers
+        assert pool.stats()['recycled']['errors'] == 1
+        await pool.close()
+
+    asyncio.run(run())
+
+def test_exceptions_count_as_failures():
+    pool = CrawlerPool(crawler_factory=FakeCrawler)
+
+    async def run():
+        for _ in range(MAX_CONSECUTIVE_ERRORS):
+            with pytest.raises(RuntimeError):
+                async with pool.lease():
+                    raise RuntimeError('page crashed')
+        assert pool.stats()['recycled']['errors'] == 1
+        await pool.close()
+
+    asyncio.run(run())
+
+def test_pages_limit_recycles_and_pool_reuses_crawlers():
+    pool = CrawlerPool(size=1, max_pages=3, crawler_factory=FakeCrawler)
+
+    async def run():
+        await crawl(pool, [f"https://ok.example/{index}" for index in range(7)])
+        stats = pool.stats()
+        assert stats['started'] == 3 and stats['recycled']['pages'] == 2
+        await pool.close()
+
+    asyncio.run(run())
+
+def test_memory_check_only_counts_child_processes(monkeypatch):
+    psutil = pytest.importorskip('psutil')
+    # This test process has no browser children, however much memory it uses itself
+    assert crawler_pool.browser_memory_mb() == sum(
+        child.memory_info().rss for child in psutil.Process().children(recursive=True)
+    ) / 2 ** 20
+
+    pool = CrawlerPool(max_memory_mb=100, memory_check_interval=0, crawler_factory=FakeCrawler)
+    monkeypatch.setattr(crawler_pool, 'browser_memory_mb', lambda: 150.0)
+
+    async def run():
+        await crawl(pool, ['https://ok.example/'])
+        assert pool.stats()['recycled']['memory'] == 1
+        await pool.close()
+
+    asyncio.run(run())
@@ -0,0 +1,45 @@
+from dedup import cluster_items, deduplicate_results, shingles
+
+STORY = ('La Banque centrale de Tunisie a relevé son taux directeur de 50 points de base à 8,5 % mardi '
+         'pour freiner une inflation qui a atteint 10 % sur un an en janvier.')
+
+def site(url, *items):
+    return {'url': url, 'news': list(items), 'opportunities': [], 'threats': []}
+
+def test_shingles_ignore_case_and_accents():
+    assert shingles('Banque Centrale à Tunis') == shingles('banque centrale a tunis')
+    assert shingles('') == set()
+
+def test_near_duplicates_cluster_and_distinct_items_do_not():
+    items = [
+        {'title': 'BCT', 'content': STORY},
+        {'title': 'BCT', 'content': STORY.replace('mardi', 'ce mardi')},
+        {'title': 'Exports', 'content': "Les exportations d'huile d'olive atteignent un record historique cette saison."}
+    ]
+    clusters = sorted(sorted(cluster) for cluster in cluster_items(items))
+    assert clusters == [[0, 1], [2]]
+
+def test_deduplicate_keeps_longest_copy_with_provenance():
+    results = [
+        site('https://a.example/', {'title': 'Short', 'content': STORY}),
+        site('https://b.example/', {'title': 'Long', 'content': STORY + ' Détails supplémentaires.'}),
+        site('https://c.example/', {'title': 'Other', 'content': 'Le tourisme progresse de 12 % cet été.'})
+    ]
+    deduplicated = deduplicate_results(results)
+    assert deduplicated[0]['news'] == []
+    kept = deduplicated[1]['news'][0]
+    assert kept['title'] == 'Long'
+    assert kept['sources'] == [{'url': 'https://a.example/', 'title': 'Short'},
+                               {'url': 'https://b.example/', 'title': 'Long'}]
+    assert deduplicated[2]['news'] == results[2]['news']
+    # Input is left untouched and a second pass changes nothing
+    assert results[0]['news'][0]['title'] == 'Short'
+    assert deduplicate_results(deduplicated) == deduplicated
+
+def test_categories_are_deduplicated_separately():
+    results = [
+        {'url': 'https://a.example/', 'news': [{'title': 'A', 'content': STORY}], 'opportunities': [],
+         'threats': [{'title': 'A', 'content': STORY}]}
+    ]
+    deduplicated = deduplicate_results(results)
+    assert len(deduplicated[0]['news']) == 1 and len(deduplicated[0]['threats']) == 1
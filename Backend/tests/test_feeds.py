@@ -0,0 +1,68 @@
+import pytest
+
+from feeds import CursorError, FeedCache, encode_cursor
+from result_store import ResultStore
+
+def scoring_results(count):
+    return [{'url': 'https://source.example/',
+             'news': [{'title': f"News {index}", 'content': 'fintech', 'score': count - index} for index in range(count)],
+             'opportunities': [], 'threats': []}]
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.db'))
+    store.save_run('scoring', scoring_results(5), profile_key='profile-a', threshold=1)
+    return store
+
+def test_pages_follow_cursors(store):
+    cache = FeedCache(store)
+    first = cache.page('news', limit=2)
+    second = cache.page('news', limit=2, cursor=first['next_cursor'])
+    last = cache.page('news', limit=2, cursor=second['next_cursor'])
+    titles = [item['title'] for page in (first, second, last) for item in page['items']]
+    assert titles == [f"News {index}" for index in range(5)]
+    assert last['next_cursor'] is None
+
+@pytest.mark.parametrize('limit', ['0', '-2', '501'])
+def test_feed_route_rejects_limits_outside_bounds(app_module, limit):
+    client = app_module.app.test_client()
+    app_module.result_store.save_run('scoring', scoring_results(3), threshold=1)
+    app_module.feed_cache.rebuild(None)
+    response = client.get(f"/api/news/personalized?limit={limit}")
+    assert response.status_code == 400 and not response.get_json()['success']
+    assert client.get('/api/news/personalized?limit=1').get_json()['count'] == 1
+
+@pytest.mark.parametrize('offset', [-1, 6, 10 ** 6])
+def test_cursor_outside_the_feed_is_rejected(store, offset):
+    cache = FeedCache(store)
+    run_id = cache.page('news', limit=1)['run_id']
+    with pytest.raises(CursorError):
+        cache.page('news', limit=2, cursor=encode_cursor(run_id, offset))
+
+def test_malformed_and_stale_cursors_are_rejected(store):
+    cache = FeedCache(store)
+    run_id = cache.page('news', limit=1)['run_id']
+    for cursor in ('not base64!', encode_cursor(run_id, 'x'), encode_cursor(run_id - 1, 0)):
+        with pytest.raises(CursorError):
+            cache.page('news', cursor=cursor)
+
+def test_feeds_are_bounded_lru(store):
+    cache = FeedCache(store, max_profiles=3)
+    for profile_key in (None, 'profile-a', 'unknown-1'):
+        cache.page('news', profile_key=profile_key)
+    # Touching the overall feed keeps it while the least recently used profile is dropped
+    cache.page('news')
+    cache.page('news', profile_key='unknown-2')
+    assert list(cache.feeds) == ['unknown-1', None, 'unknown-2']
+    assert cache.evictions == 1
+    assert cache.page('news', profile_key='profile-a')['total'] == 5
+
+def test_feed_route_answers_400_for_bad_cursor(app_module):
+    client = app_module.app.test_client()
+    app_module.result_store.save_run('scoring', scoring_results(3), threshold=1)
+    app_module.feed_cache.rebuild(None)
+    run_id = app_module.feed_cache.page('news')['run_id']
+    response = client.get(f"/api/news/personalized?limit=1&cursor={encode_cursor(run_id, -3)}")
+    assert response.status_code == 400 and not response.get_json()['success']
+    response = client.get(f"/api/news/personalized?limit=1&cursor={encode_cursor(run_id, 1)}")
+    assert response.status_code == 200 and response.get_json()['count'] == 1
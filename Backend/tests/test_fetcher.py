@@ -0,0 +1,62 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetcher
+from fetcher import HttpFetcher
+
+ARTICLE = ('<html><head><title>Taux directeur</title></head><body><article><p>'
+           + 'La Banque centrale de Tunisie a relevé son taux directeur à 8 % pour freiner l\'inflation. ' * 12
+           + '</p></article></body></html>')
+
+PAGES = {
+    '/utf8': ('text/html; charset=utf-8', ARTICLE),
+    '/unknown-charset': ('text/html; charset=x-no-such-charset', ARTICLE),
+    '/no-charset': ('text/html', ARTICLE),
+    '/thin': ('text/html; charset=utf-8', '<html><body><div id="root"></div></body></html>')
+}
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        content_type, body = PAGES[self.path]
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+@pytest.mark.parametrize('path', ['/utf8', '/unknown-charset', '/no-charset'])
+def test_pages_decode_as_utf8_when_charset_is_missing_or_unknown(base_url, path):
+    result = HttpFetcher().fetch(base_url + path)
+    assert result.success and result.tier == 'http'
+    assert 'relevé' in result.extracted['text']
+
+def test_thin_page_falls_back_to_the_browser(base_url):
+    http_fetcher = HttpFetcher()
+    result = http_fetcher.fetch(base_url + '/thin')
+    assert not result.success and result.fallback == 'thin_content'
+    assert http_fetcher.stats()['fallbacks'] == {'thin_content': 1}
+
+def test_extraction_error_falls_back_instead_of_raising(base_url, monkeypatch):
+    def broken_extract(html):
+        raise ValueError('parser crashed')
+
+    monkeypatch.setattr(fetcher, 'extract_page', broken_extract)
+    result = HttpFetcher().fetch(base_url + '/utf8')
+    assert not result.success and result.fallback == 'extract_error'
+
+def test_request_error_falls_back():
+    result = HttpFetcher(timeout=1).fetch('http://127.0.0.1:9/')
+    assert not result.success and result.fallback == 'request_error'
@@ -0,0 +1,138 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from crawl_state import CrawlStateStore
+from frontier import BloomFilter, CrawlFrontier, extract_links, link_priority, normalize_url, site_of
+from main import crawl_websites_concurrent
+
+KEYWORDS = {'financial_news': ['banque', 'inflation'], 'regulations': ['circulaire']}
+
+def links(*paths, host='https://www.news.example'):
+    return [[f"{host}{path}", text] for path, text in paths]
+
+def test_normalize_url_drops_fragment_and_tracking_parameters():
+    assert normalize_url('HTTPS://News.Example/a?utm_source=x&id=3#top') == 'https://news.example/a?id=3'
+    assert normalize_url('https://news.example') == 'https://news.example/'
+    assert site_of('https://www.bct.gov.tn/page') == 'bct.gov.tn'
+
+def test_extract_links_keeps_same_site_links_only():
+    html = ('<base href="https://news.example/fr/">'
+            '<a href="article-1#x">Un article</a><a href="https://other.example/a">Other</a>'
+            '<a href="mailto:x@news.example">Mail</a><a href="/tags/banque">Banque</a>')
+    assert extract_links(html, 'https://news.example/') == [
+        ['https://news.example/fr/article-1', 'Un article'],
+        ['https://news.example/tags/banque', 'Banque']
+    ]
+
+def test_link_priority_prefers_articles_and_keywords():
+    assert link_priority('https://news.example/tags/banque', 'Banque', KEYWORDS) == 0
+    assert link_priority('https://news.example/', 'Accueil', KEYWORDS) == 0
+    article = link_priority('https://news.example/2025/01/hausse-des-prix', 'Hausse des prix', KEYWORDS)
+    keyword_article = link_priority('https://news.example/2025/01/inflation-record', "L'inflation au plus haut "
+                                    'depuis dix ans', KEYWORDS)
+    assert 0 < article < keyword_article
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    urls = [f"https://news.example/{index}" for index in range(1000)]
+    assert all(bloom.add(url) for url in urls)
+    assert all(url in bloom for url in urls)
+    assert not bloom.add(urls[0])
+    false_positives = sum(f"https://other.example/{index}" in bloom for index in range(10000))
+    assert false_positives < 300
+
+def test_seen_links_are_queued_once():
+    frontier = CrawlFrontier(KEYWORDS, max_depth=2, site_budgets={})
+    seed = 'https://www.news.example/'
+    frontier.add_seeds([seed])
+    found = links(('/2025/01/inflation-record', 'Inflation'), ('/2025/01/inflation-record', 'Again'), ('/', 'Home'))
+    frontier.add_links(seed, found)
+    frontier.add_links(seed, found)
+    assert frontier.stats()['discovered'] == 1
+    assert frontier.next_url() == 'https://www.news.example/2025/01/inflation-record'
+    assert frontier.next_url() is None
+
+def test_depth_and_page_budgets():
+    frontier = CrawlFrontier(KEYWORDS, max_depth=1, max_pages=3, site_budgets={})
+    seed = 'https://www.news.example/'
+    frontier.add_seeds([seed])
+    frontier.add_links(seed, links(*[(f"/2025/01/article-{index}", f"Article {index}") for index in range(5)]))
+    handed_out = [frontier.next_url(), frontier.next_url()]
+    # The seed counts towards the site's 3 pages
+    assert None not in handed_out and frontier.next_url() is None
+    # Pages at max_depth add nothing
+    frontier.add_links(handed_out[0], links(('/2025/02/deeper-article', 'Deeper')))
+    assert frontier.stats()['discovered'] == 5
+    assert frontier.stats()['pages_per_site'] == {'news.example': 3}
+
+def test_site_budgets_override_defaults_per_host():
+    frontier = CrawlFrontier(KEYWORDS, max_depth=1, max_pages=2,
+                             site_budgets={'bct.gov.tn': {'max_depth': 2, 'max_pages': 4}})
+    seed = 'https://www.bct.gov.tn/'
+    frontier.add_seeds([seed])
+    frontier.add_links(seed, links(('/circulaires/2025-01', 'Circulaire 2025-01'), host='https://www.bct.gov.tn'))
+    child = frontier.next_url()
+    frontier.add_links(child, links(('/circulaires/2025-01/annexe-circulaire', 'Annexe de la circulaire'),
+                                    host='https://www.bct.gov.tn'))
+    assert frontier.next_url() == 'https://www.bct.gov.tn/circulaires/2025-01/annexe-circulaire'
+
+def test_total_and_time_budgets():
+    frontier = CrawlFrontier(KEYWORDS, max_pages_total=2, site_budgets={})
+    frontier.add_seeds(['https://www.news.example/'])
+    frontier.add_links('https://www.news.example/', links(('/2025/01/article-a', 'A'), ('/2025/01/article-b', 'B')))
+    assert frontier.next_url() is not None and frontier.next_url() is None
+
+    expired = CrawlFrontier(KEYWORDS, time_budget=0, site_budgets={})
+    expired.add_seeds(['https://www.news.example/'])
+    expired.add_links('https://www.news.example/', links(('/2025/01/article-a', 'A')))
+    time.sleep(0.01)
+    assert expired.next_url() is None and expired.stats()['expired']
+
+def test_queue_keeps_the_best_links_when_full():
+    frontier = CrawlFrontier(KEYWORDS, max_queued=2, max_pages=10, site_budgets={})
+    seed = 'https://www.news.example/'
+    frontier.add_seeds([seed])
+    frontier.add_links(seed, links(('/2025/01/plain-a', 'A'), ('/2025/01/inflation-banque', 'Inflation et banque'),
+                                   ('/2025/01/plain-b', 'B')))
+    assert frontier.stats()['dropped'] == 1
+    assert frontier.next_url() == 'https://www.news.example/2025/01/inflation-banque'
+
+class SiteFetcher:
+    """
+    HTTP tier stand-in serving a seed page that links to three articles, and the articles themselves.
+    """
+
+    def __init__(self):
+        self.fetched = []
+
+    def fetch(self, url, state=None):
+        self.fetched.append(url)
+        if state is not None:
+            return SimpleNamespace(url=url, success=True, not_modified=True, error_message=None)
+        anchors = ''.join(f'<a href="/2025/01/inflation-{index}">Inflation {index}</a>' for index in range(3))
+        html = f"<html><body><p>{'Texte de la page. ' * 40}</p>{anchors}</body></html>"
+        return SimpleNamespace(url=url, success=True, error_message=None, html=html,
+                               markdown=SimpleNamespace(raw_markdown=html), extracted={'text': html},
+                               response_headers={'ETag': '"v1"'}, tier='http')
+
+def test_crawl_follows_the_frontier_and_reuses_links_of_unchanged_pages(tmp_path):
+    store = CrawlStateStore(str(tmp_path / 'crawl_state.db'))
+    seed = 'https://www.news.example/'
+
+    async def crawl(analysis_key):
+        frontier = CrawlFrontier(KEYWORDS, max_pages=3, site_budgets={})
+        fetcher = SiteFetcher()
+        crawled = []
+        async for url, result in crawl_websites_concurrent([seed], state_store=store, fetcher=fetcher,
+                                                           frontier=frontier, analysis_key=analysis_key):
+            crawled.append((url, getattr(result, 'unchanged', False)))
+            store.save_analysis(url, {'news': []}, analysis_key)
+        return crawled, fetcher.fetched
+
+    crawled, _ = asyncio.run(crawl('key'))
+    assert crawled[0] == (seed, False) and len(crawled) == 3
+    # Second run: the seed answers 304, yet its stored links still lead to the same sub-pages
+    crawled, fetched = asyncio.run(crawl('key'))
+    assert crawled[0] == (seed, True) and len(crawled) == 3
+    assert all(unchanged for _, unchanged in crawled) and len(fetched) == 3
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+from jobs import JobManager
+
+async def finished_job(job, value):
+    job.publish('result', {'value': value})
+    return value
+
+async def failing_job(job):
+    raise ValueError('boom')
+
+def wait(job):
+    while not job.done:
+        job.wait_for_events(len(job.events) - 1, timeout=5)
+
+def test_final_status_event_is_published_with_done():
+    manager = JobManager()
+    try:
+        for job_function, args, status in ((finished_job, (1,), 'succeeded'), (failing_job, (), 'failed')):
+            job = manager.submit('test', job_function, *args)
+            wait(job)
+            # A listener that sees the job done must already have its final event
+            assert job.events[-1]['event'] == 'status'
+            assert job.events[-1]['data']['status'] == status
+            assert job.finished_at is not None
+    finally:
+        manager.shutdown(timeout=5)
+
+def test_listener_never_misses_final_event():
+    manager = JobManager(max_concurrent_jobs=8)
+    try:
+        for _ in range(50):
+            job = manager.submit('test', finished_job, 1)
+            received = []
+
+            def listen():
+                after = -1
+                while True:
+                    events = job.wait_for_events(after, timeout=5)
+                    for event in events:
+                        received.append(event)
+                        after = event['id']
+                    if job.done and after >= len(job.events) - 1:
+                        break
+
+            listener = threading.Thread(target=listen)
+            listener.start()
+            listener.join(10)
+            assert received[-1]['event'] == 'status' and received[-1]['data']['status'] == 'succeeded'
+    finally:
+        manager.shutdown(timeout=5)
+
+def test_single_flight_shares_running_job():
+    manager = JobManager()
+    release = threading.Event()
+
+    async def slow_job(job):
+        await asyncio.to_thread(release.wait, 5)
+        return 'done'
+
+    try:
+        first = manager.submit('test', slow_job, dedupe_key='same')
+        second = manager.submit('test', slow_job, dedupe_key='same')
+        other = manager.submit('test', slow_job, dedupe_key='other')
+        assert second is first and first.shared_with == 1
+        assert other is not first
+        release.set()
+        wait(first)
+        wait(other)
+        # Once finished, the key is free for a fresh job
+        third = manager.submit('test', slow_job, dedupe_key='same')
+        assert third is not first
+        wait(third)
+        assert first.result == third.result == 'done'
+    finally:
+        manager.shutdown(timeout=5)
+
+def test_event_stream_ignores_malformed_last_event_id(app_module):
+    job = app_module.job_manager.submit('test', finished_job, 7)
+    wait(job)
+    client = app_module.app.test_client()
+    for header in ('not-a-number', '-5', ''):
+        response = client.get(f"/api/jobs/{job.id}/events", headers={'Last-Event-ID': header})
+        body = response.get_data(as_text=True)
+        assert response.status_code == 200
+        assert body.startswith('id: 0\n') and '"status": "succeeded"' in body
+
+    # A valid id resumes after that event
+    response = client.get(f"/api/jobs/{job.id}/events", headers={'Last-Event-ID': '1'})
+    assert response.get_data(as_text=True).startswith('id: 2\nevent: status')
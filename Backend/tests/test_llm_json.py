@@ -0,0 +1,44 @@
+import pytest
+
+from llm_json import IncrementalAnalysisParser, loads_tolerant, parse_analysis_response, strip_code_fence
+
+VALID = '{"news": [{"title": "A"}, {"title": "B"}], "opportunities": [], "threats": [{"title": "T"}]}'
+
+def test_strip_code_fence():
+    assert strip_code_fence(f"Here you go:\n```json\n{VALID}\n```\nDone") == VALID
+    assert strip_code_fence(f"```\n{VALID}") == VALID
+    assert strip_code_fence(f"  {VALID}  ") == VALID
+
+def test_loads_tolerant_accepts_json5():
+    pytest.importorskip('json5')
+    assert loads_tolerant("{'news': [{'title': 'A',},], // comment\n}") == {'news': [{'title': 'A'}]}
+
+def test_loads_tolerant_raises_value_error():
+    with pytest.raises(ValueError):
+        loads_tolerant('{"news": [')
+
+def test_parse_valid_response_fills_missing_categories():
+    parsed = parse_analysis_response('```json\n{"news": [{"title": "A"}]}\n```')
+    assert parsed == {'news': [{'title': 'A'}], 'opportunities': [], 'threats': []}
+
+def test_parse_truncated_response_keeps_complete_items():
+    truncated = '```json\n{"news": [{"title": "A"}, {"title": "B", "content": "cut off'
+    assert parse_analysis_response(truncated) == {'news': [{'title': 'A'}], 'opportunities': [], 'threats': []}
+
+def test_parse_skips_only_the_malformed_item():
+    broken = '{"news": [{"title": "A"}, {"title": "B" "x"}, {"title": "C"}], "threats": [{"title": "T"}]}'
+    parsed = parse_analysis_response(broken)
+    assert [item['title'] for item in parsed['news']] == ['A', 'C']
+    assert parsed['threats'] == [{'title': 'T'}]
+
+@pytest.mark.parametrize('piece_size', [1, 3, 7, 64])
+def test_incremental_parser_matches_whole_parse_for_any_split(piece_size):
+    text = '```json\n{"news": [{"title": "A \\"quoted\\" ] }"}, {"title": "B", "tags": ["x", "y"]}], ' \
+           '"opportunities": ["plain string"], "threats": []}\n```'
+    parser = IncrementalAnalysisParser()
+    streamed = []
+    for start in range(0, len(text), piece_size):
+        streamed.extend(parser.feed(text[start:start + piece_size]))
+    assert [category for category, _ in streamed] == ['news', 'news', 'opportunities']
+    assert parser.result() == parse_analysis_response(text)
+    assert parser.result()['news'][0]['title'] == 'A "quoted" ] }'
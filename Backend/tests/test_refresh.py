@@ -0,0 +1,103 @@
+import asyncio
+import sqlite3
+
+from dedup import deduplicate_results, split_merged_items
+from jobs import Job
+from result_store import ResultStore
+from scoring_agent import BatchScorer
+
+STORY = ('The central bank of Tunisia raised its key interest rate by 50 basis points to 8.5 percent on '
+         'Tuesday to curb inflation, which reached 10 percent in the year to January.')
+
+def site_result(url, *items):
+    return {'url': url, 'news': [dict(item) for item in items], 'opportunities': [], 'threats': []}
+
+def story(title, content=STORY):
+    return {'title': title, 'content': content}
+
+def titles(results, url):
+    return [item['title'] for result in results if result['url'] == url for item in result['news']]
+
+def test_split_merged_items_restores_each_source():
+    previous = deduplicate_results([
+        site_result('https://a.example/', story('Rate hike at the central bank', STORY + ' More detail.')),
+        site_result('https://b.example/', story('BCT raises its key rate'))
+    ])
+    assert titles(previous, 'https://b.example/') == []
+    split = split_merged_items(previous)
+    assert titles(split, 'https://a.example/') == ['Rate hike at the central bank']
+    assert titles(split, 'https://b.example/') == ['BCT raises its key rate']
+    assert all('sources' not in item for result in split for item in result['news'])
+    assert deduplicate_results(split) == previous
+
+def test_refresh_keeps_stories_of_sources_that_were_not_refreshed(app_module):
+    previous = deduplicate_results([
+        site_result('https://a.example/', story('Rate hike at the central bank', STORY + ' More detail.')),
+        site_result('https://b.example/', story('BCT raises its key rate'))
+    ])
+    # a.example is refreshed and no longer carries the story that the previous run kept in its result
+    fresh_a = site_result('https://a.example/', story('Olive oil exports hit a record', 'Exports reached a record'))
+    fresh_by_url = {'https://a.example/': fresh_a}
+    merged, errors = app_module.merge_refreshed_results(
+        fresh_by_url, previous, ['https://a.example/'], ['https://a.example/', 'https://b.example/']
+    )
+    assert errors == {'https://a.example/': None}
+    assert titles(merged, 'https://a.example/') == ['Olive oil exports hit a record']
+    assert titles(merged, 'https://b.example/') == ['BCT raises its key rate']
+
+def test_refresh_merges_duplicates_across_fresh_and_kept_sources(app_module):
+    previous = [site_result('https://b.example/', story('BCT raises its key rate'))]
+    fresh_by_url = {'https://a.example/': site_result('https://a.example/', story('Rate hike', STORY + ' More.'))}
+    merged, _ = app_module.merge_refreshed_results(
+        fresh_by_url, previous, ['https://a.example/'], ['https://a.example/', 'https://b.example/']
+    )
+    items = [item for result in merged for item in result['news']]
+    assert len(items) == 1
+    assert [source['url'] for source in items[0]['sources']] == ['https://a.example/', 'https://b.example/']
+
+def test_missing_and_failed_urls_are_errors_and_keep_previous_results(app_module):
+    previous = [site_result('https://a.example/', story('Old A', 'Olive oil exports')),
+                site_result('https://b.example/', story('Old B', 'Tourism receipts'))]
+    fresh_by_url = {'https://a.example/': {'url': 'https://a.example/', 'error': 'timeout', 'news': [],
+                                           'opportunities': [], 'threats': []}}
+    merged, errors = app_module.merge_refreshed_results(
+        fresh_by_url, previous, ['https://a.example/', 'https://b.example/'],
+        ['https://a.example/', 'https://b.example/']
+    )
+    assert errors['https://a.example/'] == 'timeout'
+    assert errors['https://b.example/']
+    assert titles(merged, 'https://a.example/') == ['Old A']
+    assert titles(merged, 'https://b.example/') == ['Old B']
+
+def test_refresh_rescores_with_the_latest_scoring_runs_threshold_and_mode(app_module, monkeypatch):
+    profile = {'name': 'Refresh', 'interests': ['olive oil', 'exports']}
+    fresh = site_result('https://a.example/', story('Olive oil exports hit a record', 'Olive oil exports grew'),
+                        story('Olive oil prices fall', 'Prices fell'))
+
+    async def fake_pipeline(urls, user_profile, **kwargs):
+        return [dict(fresh)]
+
+    modes = []
+    def fake_scorer_factory(scoring_mode):
+        modes.append(scoring_mode)
+        return BatchScorer
+
+    monkeypatch.setattr(app_module, 'run_pipeline', fake_pipeline)
+    monkeypatch.setattr(app_module, 'scorer_factory', fake_scorer_factory)
+    app_module.save_final_results([], profile, 2, scoring_mode='semantic')
+    asyncio.run(app_module.refresh_job(Job('refresh'), profile, ['https://a.example/'], ['https://a.example/'], []))
+    run, results = app_module.latest_results('scoring', profile)
+    assert modes == ['semantic']
+    assert (run['threshold'], run['scoring_mode']) == (2, 'semantic')
+    assert titles(results, 'https://a.example/') == ['Olive oil exports hit a record']
+
+def test_result_store_adds_the_scoring_mode_column(tmp_path):
+    db_path = str(tmp_path / 'results.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE runs (id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, profile_key TEXT, "
+                 "threshold REAL, parent_run_id INTEGER, created_at REAL NOT NULL)")
+    conn.commit()
+    conn.close()
+    store = ResultStore(db_path)
+    store.save_run('scoring', [], profile_key='profile-a', threshold=3, scoring_mode='semantic')
+    assert store.latest_run('scoring', 'profile-a')['scoring_mode'] == 'semantic'
@@ -0,0 +1,84 @@
+import random
+
+from scoring_agent import BatchScorer, IncrementalScorer, filter_results, score_item
+
+PROFILE = {'interests': ['fintech', 'AI', 'Real Estate', 'i̇zmir', 'fintech', '']}
+
+ITEMS = [
+    {},
+    {'title': None, 'summary': None, 'content': None},
+    {'title': '', 'content': ''},
+    {'title': 'Fintech lending grows'},
+    {'summary': 'REAL ESTATE prices fall', 'content': None},
+    # 'İ' lowercases to two characters, which shifts every later item in the corpus
+    {'title': 'İZMİR port expands', 'content': 'İ' * 12},
+    {'title': 'AI'},
+    {},
+    {'title': 'Les fintechs tunisiennes lèvent des fonds', 'content': 'Croissance à 5 %'},
+    {'content': 'said nothing'},
+    {'title': 'Straße', 'summary': 'ΟΔΟΣ', 'content': '💶 fintech 💶'},
+    {'title': 'real', 'content': 'estate'}
+]
+
+def test_batch_scores_match_score_item():
+    scores = BatchScorer(PROFILE).score_items(ITEMS).tolist()
+    assert scores == [score_item(item, PROFILE) for item in ITEMS]
+
+def test_batch_scores_match_score_item_on_random_text():
+    rng = random.Random(0)
+    alphabet = ['a', 'i', 'İ', 'I', 'ı', ' ', 'z', 'm', 'r', 'é', 'ß']
+    profile = {'interests': ['i̇z', 'ai', 'İ', 'mir', 'a a', '']}
+    items = [
+        {field: ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+         for field in ('title', 'summary', 'content') if rng.random() < 0.8}
+        for _ in range(500)
+    ]
+    scores = BatchScorer(profile).score_items(items).tolist()
+    assert scores == [score_item(item, profile) for item in items]
+
+def test_empty_inputs():
+    assert BatchScorer(PROFILE).score_items([]).tolist() == []
+    assert BatchScorer({'interests': []}).score_items(ITEMS).tolist() == [0] * len(ITEMS)
+    assert BatchScorer({}).score_items(ITEMS).tolist() == [score_item(item, {}) for item in ITEMS]
+
+def run_results(offset=0):
+    return [{'url': f"https://source{offset}.example/", 'news': ITEMS[:6], 'opportunities': ITEMS[6:],
+             'threats': []}]
+
+def counting_loader(results):
+    calls = []
+    def load():
+        calls.append(1)
+        return results
+    return load, calls
+
+def test_profile_changes_reuse_interest_columns():
+    scorer = IncrementalScorer()
+    results = run_results()
+    load, calls = counting_loader(results)
+    first = scorer.filter('run-1', load, {'interests': ['fintech', 'AI']}, threshold=1)
+    assert first == filter_results(results, {'interests': ['fintech', 'AI']}, threshold=1)
+    assert scorer.stats == {'runs_loaded': 1, 'columns_computed': 2, 'columns_reused': 0}
+
+    profile = {'interests': ['FinTech', 'real estate']}
+    assert scorer.filter('run-1', load, profile, threshold=2) == filter_results(results, profile, threshold=2)
+    assert len(calls) == 1
+    assert scorer.stats == {'runs_loaded': 1, 'columns_computed': 3, 'columns_reused': 1}
+
+def test_duplicate_interests_count_twice():
+    scorer = IncrementalScorer()
+    profile = {'interests': ['fintech', 'Fintech', 'AI']}
+    entry, scores = scorer.scores('run-1', lambda: run_results(), profile)
+    assert scores.tolist() == [score_item(item, profile) for item in entry['items']]
+    assert scorer.stats['columns_computed'] == 2
+
+def test_least_recently_used_runs_are_evicted():
+    scorer = IncrementalScorer(max_runs=2)
+    loads = {key: counting_loader(run_results(index)) for index, key in enumerate(('a', 'b', 'c'))}
+    profile = {'interests': ['fintech']}
+    for key in ('a', 'b', 'a', 'c'):
+        scorer.scores(key, loads[key][0], profile)
+    assert list(scorer.runs) == ['a', 'c']
+    scorer.scores('b', loads['b'][0], profile)
+    assert [len(loads[key][1]) for key in ('a', 'b', 'c')] == [1, 2, 1]
+    assert list(scorer.runs) == ['c', 'b']
@@ -0,0 +1,50 @@
+import time
+
+from semantic_scoring import EmbeddingIndex, HashingEmbedder, SemanticScorer
+
+PROFILE = {'interests': ['fintech', 'AI', 'real estate']}
+
+def make_items(count, offset=0):
+    return [{'title': f"Report {offset + index}", 'content': f"Quarterly figures {offset + index} from the central bank"}
+            for index in range(count)]
+
+def test_interest_matches_by_similarity(tmp_path):
+    index = EmbeddingIndex(str(tmp_path / 'embeddings.npz'), embedder=HashingEmbedder())
+    scorer = SemanticScorer(PROFILE, index)
+    scores = scorer.score_items([
+        {'title': 'Artificial intelligence lab opens with a deep learning focus'},
+        {'title': 'Olive oil exports reach a record'}
+    ])
+    assert scores.tolist() == [1, 0]
+    assert scorer.similarity_threshold == HashingEmbedder.similarity_threshold
+
+def test_only_new_items_are_embedded(tmp_path):
+    path = str(tmp_path / 'embeddings.npz')
+    index = EmbeddingIndex(path, embedder=HashingEmbedder())
+    scorer = SemanticScorer(PROFILE, index)
+    items = make_items(200)
+    first = scorer.score_items(items)
+    assert index.embedded == 200
+
+    assert (scorer.score_items(items) == first).all()
+    assert index.embedded == 200
+
+    scorer.score_items(items + make_items(5, offset=200))
+    assert index.embedded == 205
+
+    # A new process loads the saved embeddings instead of recomputing them
+    reloaded = EmbeddingIndex(path, embedder=HashingEmbedder())
+    assert (SemanticScorer(PROFILE, reloaded).score_items(items) == first).all()
+    assert reloaded.embedded == 0
+
+def test_scores_10k_items_under_a_second_on_a_warm_index(tmp_path):
+    index = EmbeddingIndex(str(tmp_path / 'embeddings.npz'), embedder=HashingEmbedder())
+    scorer = SemanticScorer(PROFILE, index)
+    items = make_items(10000)
+    scorer.score_items(items)
+
+    start = time.perf_counter()
+    scores = scorer.score_items(items)
+    elapsed = time.perf_counter() - start
+    assert len(scores) == 10000 and index.embedded == 10000
+    assert elapsed < 1.0
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+import pytest
+
+from jobs import JobManager, JobManagerClosed
+
+def test_shutdown_app_drains_once(app_module, monkeypatch):
+    manager = JobManager()
+    drains = []
+    shutdown = manager.shutdown
+
+    def counted_shutdown(*args, **kwargs):
+        drains.append(threading.current_thread().name)
+        return shutdown(*args, **kwargs)
+
+    monkeypatch.setattr(manager, 'shutdown', counted_shutdown)
+    monkeypatch.setattr(app_module, 'job_manager', manager)
+    monkeypatch.setattr(app_module, 'shutdown_state', {})
+    release = threading.Event()
+
+    async def slow_job(job):
+        await asyncio.to_thread(release.wait, 5)
+        return 'done'
+
+    job = manager.submit('test', slow_job)
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(app_module.shutdown_app(timeout=10)))
+               for _ in range(3)]
+    for caller in callers:
+        caller.start()
+    release.set()
+    for caller in callers:
+        caller.join(15)
+
+    assert len(drains) == 1
+    assert results == [0, 0, 0]
+    assert job.status == 'succeeded'
+    assert app_module.shutdown_app() == 0 and len(drains) == 1
+    with pytest.raises(JobManagerClosed):
+        manager.submit('test', slow_job)
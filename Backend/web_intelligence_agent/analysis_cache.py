@@ -0,0 +1,131 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+try:
+    from .metrics import registry
+except ImportError:
+    from metrics import registry
+
+def normalize_text(text):
+    """
+    Normalizes page text so whitespace-only changes don't invalidate cached analyses.
+    """
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+def make_cache_key(text, user_profile, model_name, prompt_version):
+    """
+    Builds the cache key for an analysis from everything that goes into its prompt.
+    """
+    payload = json.dumps({
+        'text': normalize_text(text),
+        'profile': user_profile,
+        'model': model_name,
+        'prompt_version': prompt_version
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def make_analysis_key(user_profile, model_name, prompt_version):
+    """
+    Builds the key under which a page's analysis is reused while the page is unchanged.
+
+    It covers everything in the prompt except the page text, so an analysis
+    made for one profile (or for the shared, profile-less analysis) is never
+    handed to another.
+    """
+    payload = json.dumps({
+        'profile': user_profile,
+        'model': model_name,
+        'prompt_version': prompt_version
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class AnalysisCache:
+    """
+    Persistent SQLite cache of Gemini analyses with TTL and LRU eviction.
+
+    Entries older than ttl_seconds are treated as misses, and once the cache
+    holds more than max_entries the least recently used ones are evicted.
+    """
+
+    def __init__(self, db_path, ttl_seconds=24 * 3600, max_entries=5000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_cache_accessed ON analysis_cache (accessed_at)")
+        self.conn.commit()
+
+    def get(self, key):
+        """
+        Returns the cached analysis for key, or None if it is missing or expired.
+        """
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self.conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                    self.conn.commit()
+                self.misses += 1
+                registry.inc('aura_cache_requests_total', result='miss')
+                return None
+            self.conn.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+        registry.inc('aura_cache_requests_total', result='hit')
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        """
+        Stores an analysis and evicts the least recently used entries beyond max_entries.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            overflow = self.conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self.conn.execute(
+                    "DELETE FROM analysis_cache WHERE key IN "
+                    "(SELECT key FROM analysis_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+            self.conn.commit()
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the current number of entries.
+        """
+        with self.lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': size,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds
+        }
@@ -0,0 +1,140 @@
+import asyncio
+import json
+
+try:
+    from .main import get_gemini_model, extract_json_from_markdown
+    from .llm_scheduler import estimate_tokens
+    from .chunking import ANALYSIS_CATEGORIES
+except ImportError:
+    from main import get_gemini_model, extract_json_from_markdown
+    from llm_scheduler import estimate_tokens
+    from chunking import ANALYSIS_CATEGORIES
+
+def build_batch_prompt(pages, user_profile):
+    """
+    Builds one analysis prompt for several pages, given as (page_id, text) pairs.
+    """
+    if user_profile is None:
+        instructions = """Extract all news, investment opportunities, and threats (risks for investors, businesses
+    or savers) from each of the following pages. Do not filter for any particular user."""
+    else:
+        instructions = f"""Analyze each of the following pages based on the user's profile and identify relevant news,
+    opportunities, and threats.
+
+    User Profile:
+    {json.dumps(user_profile, separators=(',', ':'))}"""
+    page_blocks = '\n\n'.join(f'<page id="{page_id}">\n{text}\n</page>' for page_id, text in pages)
+    example = ', '.join(f'"{page_id}": {{"news": [], "opportunities": [], "threats": []}}' for page_id, _ in pages[:2])
+    return f"""
+    {instructions}
+
+    Pages to Analyze:
+    {page_blocks}
+
+    Analyze every page separately and provide the analysis in a valid JSON format, with one entry per page id:
+    ```json
+    {{{example}}}
+    ```
+    """
+
+def parse_batch_response(text, page_ids):
+    """
+    Splits a batch response into {page_id: analysis}, leaving out pages whose entry is missing or malformed.
+    """
+    try:
+        parsed = extract_json_from_markdown(text) or json.loads(text)
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    results = {}
+    for page_id in page_ids:
+        analysis = parsed.get(page_id)
+        if isinstance(analysis, dict) and all(isinstance(analysis.get(c, []), list) for c in ANALYSIS_CATEGORIES):
+            results[page_id] = {category: analysis.get(category, []) for category in ANALYSIS_CATEGORIES}
+    return results
+
+async def analyze_batch(pages, user_profile, model=None):
+    """
+    Analyzes several pages in one Gemini request and returns {page_id: analysis} for the pages it could parse.
+    """
+    model = model or get_gemini_model()
+    response = await model.generate_content_async(build_batch_prompt(pages, user_profile))
+    return parse_batch_response(response.text, [page_id for page_id, _ in pages])
+
+class PageBatcher:
+    """
+    Packs short pages into multi-page Gemini requests under a token budget.
+
+    analyze(text) waits until the page's batch has been analyzed and returns
+    its analysis, or None when the batch output for that page could not be
+    parsed (or the batch held a single page), in which case the caller uses
+    the per-page path. A batch is sent once the next page would exceed
+    batch_tokens, linger seconds after its first page arrived, or on close().
+    """
+
+    def __init__(self, user_profile, model=None, batch_tokens=8000, linger=1.0):
+        self.user_profile = user_profile
+        self.model = model
+        self.batch_tokens = batch_tokens
+        self.linger = linger
+        self.overhead_tokens = estimate_tokens(build_batch_prompt([], user_profile))
+        self.pending = []
+        self.pending_tokens = self.overhead_tokens
+        self.timer = None
+        self.tasks = set()
+        self.next_id = 0
+        self.stats = {'batches': 0, 'batched_pages': 0, 'fallbacks': 0}
+
+    def fits(self, text):
+        """
+        Tells whether a page is short enough to share a batch with at least one other page.
+        """
+        return self.overhead_tokens + 2 * estimate_tokens(text) <= self.batch_tokens
+
+    async def analyze(self, text):
+        loop = asyncio.get_running_loop()
+        tokens = estimate_tokens(text)
+        if self.pending and self.pending_tokens + tokens > self.batch_tokens:
+            self._flush()
+        future = loop.create_future()
+        self.pending.append((f"p{self.next_id}", text, future))
+        self.next_id += 1
+        self.pending_tokens += tokens
+        if self.timer is None:
+            self.timer = loop.call_later(self.linger, self._flush)
+        return await future
+
+    def close(self):
+        """
+        Sends the pages still waiting for a batch.
+        """
+        self._flush()
+
+    def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        self.pending_tokens = self.overhead_tokens
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _run(self, batch):
+        results = {}
+        if len(batch) > 1:
+            try:
+                results = await analyze_batch([(page_id, text) for page_id, text, _ in batch],
+                                              self.user_profile, model=self.model)
+            except Exception as e:
+                print(f"Batch analysis of {len(batch)} pages failed, falling back to per-page requests: {e}")
+            self.stats['batches'] += 1
+            self.stats['batched_pages'] += len(results)
+            # A lone page never was a batch, so it is not counted as a fallback
+            self.stats['fallbacks'] += len(batch) - len(results)
+        for page_id, _, future in batch:
+            if not future.done():
+                future.set_result(results.get(page_id))
@@ -0,0 +1,115 @@
+import asyncio
+import re
+
+try:
+    from .main import analyze_with_gemini
+    from .llm_scheduler import estimate_tokens
+except ImportError:
+    from main import analyze_with_gemini
+    from llm_scheduler import estimate_tokens
+
+ANALYSIS_CATEGORIES = ('news', 'opportunities', 'threats')
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?;:])\s+')
+
+def split_into_chunks(text, max_tokens=1500):
+    """
+    Splits text into consecutive chunks of at most max_tokens, breaking on sentence boundaries.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for sentence in SENTENCE_BOUNDARY.split(text or ''):
+        sentence_tokens = estimate_tokens(sentence)
+        # A single oversized sentence is cut on word boundaries
+        if sentence_tokens > max_tokens:
+            words = sentence.split()
+            step = max(1, len(words) * max_tokens // sentence_tokens)
+            pieces = [' '.join(words[i:i + step]) for i in range(0, len(words), step)]
+        else:
+            pieces = [sentence]
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append(' '.join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append(' '.join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+def compile_relevance_terms(keywords=None, interests=None):
+    """
+    Compiles the keyword lists from determine_targets (and profile interests) into one regex.
+    """
+    terms = set()
+    for term_list in (keywords or {}).values():
+        terms.update(term.lower() for term in term_list)
+    terms.update(interest.lower() for interest in (interests or []))
+    if not terms:
+        return None
+    alternatives = '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(rf'\b(?:{alternatives})\b', re.IGNORECASE)
+
+def select_relevant_chunks(text, keywords=None, interests=None, max_tokens=1500, top_k=3):
+    """
+    Returns the top_k chunks of text with the most keyword matches, in their original order.
+
+    Chunks without any match rank by position, so pages with no keyword hits
+    still send their opening chunks.
+    """
+    chunks = split_into_chunks(text, max_tokens)
+    if len(chunks) <= top_k:
+        return chunks
+    pattern = compile_relevance_terms(keywords, interests)
+    scores = [len(pattern.findall(chunk)) if pattern else 0 for chunk in chunks]
+    ranked = sorted(range(len(chunks)), key=lambda i: (-scores[i], i))[:top_k]
+    return [chunks[i] for i in sorted(ranked)]
+
+def _item_key(item):
+    if isinstance(item, dict):
+        identity = item.get('title') or item.get('content') or ''
+    else:
+        identity = str(item)
+    return re.sub(r'\W+', ' ', identity).strip().lower()
+
+def merge_analysis_results(results):
+    """
+    Merges per-chunk analyses into one, dropping items whose normalized title repeats.
+    """
+    merged = {category: [] for category in ANALYSIS_CATEGORIES}
+    seen = {category: set() for category in ANALYSIS_CATEGORIES}
+    for result in results:
+        for category in ANALYSIS_CATEGORIES:
+            for item in result.get(category, []) or []:
+                key = _item_key(item)
+                if key and key in seen[category]:
+                    continue
+                seen[category].add(key)
+                merged[category].append(item)
+    return merged
+
+async def analyze_chunks(chunks, user_profile, model=None, on_item=None):
+    """
+    Analyzes each chunk with Gemini concurrently and merges the results.
+
+    on_item(category, item), if given, streams each chunk's items as they arrive,
+    skipping items whose normalized title was already streamed (as the merge drops them).
+    """
+    stream_item = None
+    if on_item is not None:
+        streamed = {category: set() for category in ANALYSIS_CATEGORIES}
+
+        def stream_item(category, item):
+            key = _item_key(item)
+            if key and key in streamed.setdefault(category, set()):
+                return
+            streamed[category].add(key)
+            on_item(category, item)
+
+    results = await asyncio.gather(*(
+        analyze_with_gemini(chunk, user_profile, model=model, on_item=stream_item) for chunk in chunks
+    ))
+    return merge_analysis_results(results)
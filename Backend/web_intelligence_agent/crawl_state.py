@@ -0,0 +1,150 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+def content_fingerprint(content):
+    """
+    Fingerprints page content, ignoring whitespace-only differences.
+    """
+    normalized = re.sub(r'\s+', ' ', content or '').strip()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+class CrawlStateStore:
+    """
+    Persistent per-URL crawl state: HTTP validators, content fingerprint and last analyses.
+
+    The ETag and Last-Modified values drive conditional requests, and the
+    fingerprint detects pages whose rendered content did not change. The last
+    analysis of each analysis key (see make_analysis_key: the profile, model and
+    prompt version it was made for) is kept so unchanged pages can reuse it
+    instead of being re-analyzed; a page's analyses are dropped when its content
+    changes. The fetch tier (plain HTTP or browser) so later crawls go straight to it, and
+    the page's links so sub-pages are still discovered below an unchanged page.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_state (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                fingerprint TEXT,
+                analysis TEXT,
+                checked_at REAL,
+                changed_at REAL
+            )
+        """)
+        columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(crawl_state)")}
+        for column, column_type in (('tier', 'TEXT'), ('tier_at', 'REAL'), ('links', 'TEXT')):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE crawl_state ADD COLUMN {column} {column_type}")
+        # The analysis column of crawl_state predates per-profile analyses and is no longer read
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_analyses (
+                url TEXT NOT NULL,
+                analysis_key TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                saved_at REAL NOT NULL,
+                PRIMARY KEY (url, analysis_key)
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, url, analysis_key=None):
+        """
+        Returns the stored state for url as a dict, or None if it was never crawled.
+
+        Its analysis is the one saved under analysis_key, or None.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM crawl_state WHERE url = ?", (url,)).fetchone()
+            analysis_row = None
+            if row is not None and analysis_key is not None:
+                analysis_row = self.conn.execute(
+                    "SELECT analysis FROM crawl_analyses WHERE url = ? AND analysis_key = ?", (url, analysis_key)
+                ).fetchone()
+        if row is None:
+            return None
+        state = dict(row)
+        state['analysis'] = json.loads(analysis_row['analysis']) if analysis_row else None
+        state['links'] = json.loads(state['links']) if state['links'] else None
+        return state
+
+    def record_crawl(self, url, fingerprint, etag=None, last_modified=None):
+        """
+        Records a fresh crawl of url and returns True if its content changed since the last one.
+        """
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT fingerprint FROM crawl_state WHERE url = ?", (url,)).fetchone()
+            changed = row is None or row['fingerprint'] != fingerprint
+            if row is None:
+                self.conn.execute(
+                    "INSERT INTO crawl_state (url, etag, last_modified, fingerprint, checked_at, changed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, fingerprint, now, now)
+                )
+            else:
+                self.conn.execute(
+                    "UPDATE crawl_state SET etag = ?, last_modified = ?, fingerprint = ?, checked_at = ?, "
+                    "changed_at = CASE WHEN ? THEN ? ELSE changed_at END WHERE url = ?",
+                    (etag, last_modified, fingerprint, now, changed, now, url)
+                )
+                if changed:
+                    self.conn.execute("DELETE FROM crawl_analyses WHERE url = ?", (url,))
+            self.conn.commit()
+        return changed
+
+    def record_not_modified(self, url):
+        """
+        Records that a conditional request for url returned 304 Not Modified.
+        """
+        with self.lock:
+            self.conn.execute("UPDATE crawl_state SET checked_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+
+    def record_tier(self, url, tier):
+        """
+        Records the fetch tier ('http' or 'browser') that last produced usable content for url.
+        """
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO crawl_state (url, tier, tier_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET tier = excluded.tier, tier_at = excluded.tier_at",
+                (url, tier, time.time())
+            )
+            self.conn.commit()
+
+    def record_links(self, url, links):
+        """
+        Stores the [url, anchor text] links found on a crawled page.
+        """
+        with self.lock:
+            self.conn.execute("UPDATE crawl_state SET links = ? WHERE url = ?", (json.dumps(links), url))
+            self.conn.commit()
+
+    def tiers(self):
+        """
+        Returns {url: tier} for every URL whose fetch tier is known.
+        """
+        with self.lock:
+            rows = self.conn.execute("SELECT url, tier FROM crawl_state WHERE tier IS NOT NULL").fetchall()
+        return {row['url']: row['tier'] for row in rows}
+
+    def save_analysis(self, url, analysis, analysis_key):
+        """
+        Stores the latest analysis of url under analysis_key so unchanged crawls for the same key can reuse it.
+        """
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO crawl_analyses (url, analysis_key, analysis, saved_at) VALUES (?, ?, ?, ?)",
+                (url, analysis_key, json.dumps(analysis), time.time())
+            )
+            self.conn.commit()
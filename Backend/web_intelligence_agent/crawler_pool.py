@@ -0,0 +1,251 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+from crawl4ai import AsyncWebCrawler
+
+try:
+    from .metrics import registry
+except ImportError:
+    from metrics import registry
+
+try:
+    import psutil
+except ImportError:  # psutil is optional; without it crawlers are only recycled by page count
+    psutil = None
+
+# Consecutive failed pages (exceptions or unsuccessful results) after which a crawler's browser is assumed broken
+MAX_CONSECUTIVE_ERRORS = 3
+
+def browser_memory_mb():
+    """
+    Returns the resident memory (MB) of this process's child processes (the browsers), or None without psutil.
+
+    The Python process itself is left out: its memory (stores, caches,
+    request threads) says nothing about the browsers, and recycling a
+    crawler would not reclaim it.
+    """
+    if psutil is None:
+        return None
+    total = 0
+    for child in psutil.Process(os.getpid()).children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / 2 ** 20
+
+class _OutcomeRecorder:
+    """
+    Leased view of a crawler that notes whether arun returned an unsuccessful result.
+    """
+
+    def __init__(self, crawler, outcome):
+        self._crawler = crawler
+        self._outcome = outcome
+
+    async def arun(self, *args, **kwargs):
+        result = await self._crawler.arun(*args, **kwargs)
+        if not getattr(result, 'success', True):
+            self._outcome['failed'] = True
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._crawler, name)
+
+class CrawlerPool:
+    """
+    Keeps warm AsyncWebCrawler instances (headless browsers) alive between crawls.
+
+    lease() hands out the least busy crawler; each one renders at most
+    pages_per_crawler pages at once and up to size crawlers are started on
+    demand, so the browser start-up cost is paid once per crawler rather than
+    once per run. A crawler is recycled (closed once its pages finish and
+    replaced on demand) after max_pages pages, after repeated errors, or, when
+    psutil is installed, when the browsers use more than max_memory_mb.
+
+    A pool belongs to the event loop it is first used on, like the browsers it holds.
+    """
+
+    def __init__(self, size=1, pages_per_crawler=5, max_pages=200, max_memory_mb=None,
+                 memory_check_interval=30.0, crawler_factory=AsyncWebCrawler):
+        self.size = size
+        self.pages_per_crawler = pages_per_crawler
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.memory_check_interval = memory_check_interval
+        self.crawler_factory = crawler_factory
+        self.crawlers = []
+        self.starting = 0
+        self.next_id = 0
+        self.loop = None
+        self.condition = None
+        self.closed = False
+        self.last_memory_check = time.time()
+        self.counters = {'leases': 0, 'waits': 0, 'wait_seconds': 0.0, 'started': 0, 'start_seconds': 0.0,
+                         'recycled': {'pages': 0, 'memory': 0, 'errors': 0}}
+
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+            self.condition = asyncio.Condition()
+        elif self.loop is not loop:
+            raise RuntimeError('CrawlerPool used from a different event loop than the one it was created on')
+
+    @asynccontextmanager
+    async def lease(self):
+        """
+        Yields a started crawler for one page; async with pool.lease() as crawler: await crawler.arun(...)
+
+        The page counts as failed if the block raises or if the crawler's
+        arun returns a result with success=False.
+        """
+        entry = await self._acquire()
+        outcome = {'failed': False}
+        crawler = _OutcomeRecorder(entry['crawler'], outcome)
+        try:
+            yield crawler
+        except BaseException:
+            outcome['failed'] = True
+            raise
+        finally:
+            await self._release(entry, outcome['failed'])
+
+    def _available(self):
+        candidates = [entry for entry in self.crawlers
+                      if not entry['retiring'] and entry['active'] < self.pages_per_crawler]
+        return min(candidates, key=lambda entry: entry['active'], default=None)
+
+    async def _acquire(self):
+        self._bind()
+        requested_at = time.perf_counter()
+        waited = False
+        while True:
+            async with self.condition:
+                if self.closed:
+                    raise RuntimeError('CrawlerPool is closed')
+                entry = self._available()
+                if entry is not None:
+                    entry['active'] += 1
+                    entry['pages'] += 1
+                    if entry['pages'] >= self.max_pages:
+                        self._retire(entry, 'pages')
+                    self.counters['leases'] += 1
+                    if waited:
+                        self.counters['waits'] += 1
+                        self.counters['wait_seconds'] += time.perf_counter() - requested_at
+                    return entry
+                start_new = len([e for e in self.crawlers if not e['retiring']]) + self.starting < self.size
+                if start_new:
+                    self.starting += 1
+                else:
+                    waited = True
+                    await self.condition.wait()
+                    continue
+            # Started outside the lock so leases of the other crawlers go on meanwhile
+            entry = None
+            try:
+                entry = await self._start_crawler()
+            finally:
+                async with self.condition:
+                    self.starting -= 1
+                    if entry is not None:
+                        self.crawlers.append(entry)
+                    self.condition.notify_all()
+
+    async def _start_crawler(self):
+        started = time.perf_counter()
+        crawler = self.crawler_factory()
+        await crawler.start()
+        duration = time.perf_counter() - started
+        self.counters['started'] += 1
+        self.counters['start_seconds'] += duration
+        registry.inc('aura_crawler_starts_total')
+        self.next_id += 1
+        print(f"Started crawler {self.next_id} in {duration:.2f}s")
+        return {'id': self.next_id, 'crawler': crawler, 'pages': 0, 'active': 0, 'errors': 0,
+                'started_at': time.time(), 'retiring': None}
+
+    def _retire(self, entry, reason):
+        if entry['retiring'] is None:
+            entry['retiring'] = reason
+            self.counters['recycled'][reason] += 1
+            registry.inc('aura_crawler_recycled_total', reason=reason)
+
+    def _check_memory(self):
+        if self.max_memory_mb is None or time.time() - self.last_memory_check < self.memory_check_interval:
+            return
+        self.last_memory_check = time.time()
+        memory_mb = browser_memory_mb()
+        if memory_mb is not None and memory_mb > self.max_memory_mb:
+            # Recycle the crawler that has rendered the most pages: its browser has grown the most
+            serving = [entry for entry in self.crawlers if entry['retiring'] is None]
+            if serving:
+                oldest = max(serving, key=lambda entry: entry['pages'])
+                print(f"Browsers use {memory_mb:.0f} MB (limit {self.max_memory_mb} MB), "
+                      f"recycling crawler {oldest['id']}")
+                self._retire(oldest, 'memory')
+
+    async def _release(self, entry, failed):
+        async with self.condition:
+            entry['active'] -= 1
+            entry['errors'] = entry['errors'] + 1 if failed else 0
+            if entry['errors'] >= MAX_CONSECUTIVE_ERRORS:
+                self._retire(entry, 'errors')
+            self._check_memory()
+            finished = [e for e in self.crawlers if e['retiring'] and e['active'] == 0]
+            for retired in finished:
+                self.crawlers.remove(retired)
+            self.condition.notify_all()
+        for retired in finished:
+            await self._close_crawler(retired)
+
+    async def _close_crawler(self, entry):
+        try:
+            await entry['crawler'].close()
+        except Exception as e:
+            print(f"Error closing crawler {entry['id']}: {e}")
+
+    async def close(self):
+        """
+        Closes every crawler; leases already handed out are left to finish first.
+        """
+        if self.condition is None:
+            return
+        async with self.condition:
+            self.closed = True
+            await self.condition.wait_for(lambda: all(entry['active'] == 0 for entry in self.crawlers))
+            crawlers, self.crawlers = self.crawlers, []
+        await asyncio.gather(*(self._close_crawler(entry) for entry in crawlers))
+
+    def stats(self):
+        """
+        Returns the pool's utilization and its per-crawler page counts.
+        """
+        now = time.time()
+        active = sum(entry['active'] for entry in self.crawlers)
+        capacity = self.size * self.pages_per_crawler
+        return {
+            'size': self.size,
+            'pages_per_crawler': self.pages_per_crawler,
+            'max_pages': self.max_pages,
+            'max_memory_mb': self.max_memory_mb,
+            'active_pages': active,
+            'utilization': round(active / capacity, 3) if capacity else None,
+            'leases': self.counters['leases'],
+            'waits': self.counters['waits'],
+            'avg_wait_ms': round(1000 * self.counters['wait_seconds'] / self.counters['waits'], 2)
+                           if self.counters['waits'] else 0.0,
+            'started': self.counters['started'],
+            'avg_start_ms': round(1000 * self.counters['start_seconds'] / self.counters['started'], 2)
+                            if self.counters['started'] else 0.0,
+            'recycled': dict(self.counters['recycled']),
+            'memory_mb': round(browser_memory_mb(), 1) if self.max_memory_mb is not None and psutil else None,
+            'crawlers': [
+                {'id': entry['id'], 'pages': entry['pages'], 'active': entry['active'],
+                 'age_s': round(now - entry['started_at'], 1), 'retiring': entry['retiring']}
+                for entry in self.crawlers
+            ]
+        }
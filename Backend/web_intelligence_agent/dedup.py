@@ -0,0 +1,176 @@
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+try:
+    from .scoring_agent import SCORED_FIELDS
+    from .metrics import span
+except ImportError:
+    from scoring_agent import SCORED_FIELDS
+    from metrics import span
+
+CATEGORIES = ('news', 'opportunities', 'threats')
+
+# 2^31 - 1; shingle hashes are reduced to 31 bits so (a * x + b) fits in uint64
+_MERSENNE_PRIME = (1 << 31) - 1
+
+_COMBINING_MARKS = re.compile(r'[\u0300-\u036f]')
+_WORD = re.compile(r'\w+')
+
+def _tokens(text):
+    # Accents are dropped so "à" and "a" produce the same shingles
+    text = text.lower()
+    if not text.isascii():
+        text = _COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', text))
+    return _WORD.findall(text)
+
+def shingles(text, size=3):
+    """
+    Returns the set of hashed word size-grams of a text (single words for very short texts).
+    """
+    tokens = _tokens(text)
+    if len(tokens) < size:
+        grams = tokens
+    else:
+        grams = [' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+    return {zlib.crc32(gram.encode('utf-8')) & _MERSENNE_PRIME for gram in grams}
+
+class MinHasher:
+    """
+    MinHash signatures with LSH banding for finding near-duplicate items.
+
+    Items whose signatures agree on all rows of at least one band become
+    candidates; with the defaults (16 bands of 4 rows) pairs above a Jaccard
+    similarity of about 0.5 are found with high probability.
+    """
+
+    def __init__(self, num_perm=64, bands=16, seed=1):
+        if num_perm % bands:
+            raise ValueError('num_perm must be a multiple of bands')
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        generator = np.random.RandomState(seed)
+        self.a = generator.randint(1, _MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self.b = generator.randint(0, _MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+
+    def signature(self, shingle_set):
+        """
+        Returns the MinHash signature of a set of shingles, or None for an empty set.
+        """
+        if not shingle_set:
+            return None
+        values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+        hashed = (np.outer(values, self.a) + self.b) % _MERSENNE_PRIME
+        return hashed.min(axis=0)
+
+    def band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+def item_text(item, fields=SCORED_FIELDS):
+    return ' '.join(item.get(field) or '' for field in fields)
+
+def _find(parents, index):
+    while parents[index] != index:
+        parents[index] = parents[parents[index]]
+        index = parents[index]
+    return index
+
+def cluster_items(items, threshold=0.5, hasher=None, fields=SCORED_FIELDS):
+    """
+    Groups near-duplicate items and returns the clusters as lists of item indices.
+
+    Each item is compared only with the first item of every LSH bucket it falls
+    into, and joined to it when their estimated Jaccard similarity reaches
+    threshold, so the work stays linear in the number of items.
+    """
+    hasher = hasher or MinHasher()
+    parents = list(range(len(items)))
+    signatures = [hasher.signature(shingles(item_text(item, fields))) for item in items]
+    buckets = {}
+    for index, signature in enumerate(signatures):
+        if signature is None:
+            continue
+        for key in hasher.band_keys(signature):
+            first = buckets.setdefault(key, index)
+            if first == index:
+                continue
+            root, first_root = _find(parents, index), _find(parents, first)
+            if root != first_root and np.mean(signature == signatures[first]) >= threshold:
+                parents[root] = first_root
+    clusters = {}
+    for index in range(len(items)):
+        clusters.setdefault(_find(parents, index), []).append(index)
+    return list(clusters.values())
+
+def _provenance(item, source_url):
+    return item.get('sources') or [{'url': source_url, 'title': item.get('title', '')}]
+
+def split_merged_items(analysis_results):
+    """
+    Rebuilds per-source results from deduplicated ones, using the provenance deduplicate_results recorded.
+
+    Every merged copy goes back to the result of its source URL (when that
+    result is present) as the kept item under the copy's own title; its
+    content is the kept item's, the copies having been near-duplicates. The
+    'sources' lists are dropped, so deduplicating the output merges the
+    copies again.
+    """
+    by_url = {result.get('url'): result for result in analysis_results}
+    split = [dict(result, **{category: [] for category in CATEGORIES}) for result in analysis_results]
+    split_by_url = {result.get('url'): result for result in split}
+    for result in analysis_results:
+        for category in CATEGORIES:
+            for item in result.get(category, []) or []:
+                item = dict(item)
+                sources = item.pop('sources', None) or []
+                split_by_url[result.get('url')][category].append(item)
+                for source in sources:
+                    if source.get('url') != result.get('url') and source.get('url') in by_url:
+                        split_by_url[source['url']][category].append(dict(item, title=source.get('title', '')))
+    return split
+
+def deduplicate_results(analysis_results, threshold=0.5, hasher=None):
+    """
+    Merges near-duplicate items across sources, per category.
+
+    Each cluster keeps one item (the one with the longest content, then the
+    earliest source) in its source's result; it gains a 'sources' list with
+    the URL and title of every copy. Running it again on its output is a no-op.
+    """
+    with span('dedup'):
+        return _merge_duplicates(analysis_results, threshold, hasher or MinHasher())
+
+def _merge_duplicates(analysis_results, threshold, hasher):
+    deduplicated = [dict(result, **{category: [] for category in CATEGORIES}) for result in analysis_results]
+    merged = 0
+    for category in CATEGORIES:
+        entries = [
+            (result_index, item)
+            for result_index, result in enumerate(analysis_results)
+            for item in result.get(category, []) or []
+        ]
+        clusters = cluster_items([item for _, item in entries], threshold, hasher)
+        keep = {}
+        for cluster in clusters:
+            representative = min(cluster, key=lambda index: (-len(entries[index][1].get('content') or ''), index))
+            if len(cluster) == 1:
+                keep[representative] = entries[representative][1]
+                continue
+            sources = []
+            for index in sorted(cluster):
+                result_index, item = entries[index]
+                for source in _provenance(item, analysis_results[result_index].get('url', '')):
+                    if source not in sources:
+                        sources.append(source)
+            keep[representative] = dict(entries[representative][1], sources=sources)
+            merged += len(cluster) - 1
+        # Kept items stay in their original source and order
+        for index, (result_index, _) in enumerate(entries):
+            if index in keep:
+                deduplicated[result_index][category].append(keep[index])
+    if merged:
+        print(f"De-duplication merged {merged} near-duplicate items")
+    return deduplicated
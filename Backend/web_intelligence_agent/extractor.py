@@ -0,0 +1,164 @@
+import re
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional; fall back to the standard library tokenizer
+    etree = None
+
+# Elements whose content is navigation, chrome or code rather than page text
+BOILERPLATE_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'iframe', 'nav', 'footer',
+                    'header', 'aside', 'form', 'button', 'select'}
+
+# Elements that end a block of text
+BLOCK_TAGS = {'p', 'div', 'section', 'article', 'li', 'ul', 'ol', 'br', 'tr', 'td', 'th', 'table',
+              'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre', 'main', 'dd', 'dt'}
+
+HTML_PATTERN = re.compile(r'<\s*(?:!doctype|html|head|body|div|p|title|meta)\b', re.IGNORECASE)
+MD_IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+MD_LINK = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+MD_BARE_URL = re.compile(r'<?https?://\S+>?')
+MD_HEADING = re.compile(r'^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$')
+MD_LIST_MARKER = re.compile(r'^\s*(?:[*+-]|\d+[.)])\s+')
+MD_EMPHASIS = re.compile(r'[*_`~]{1,3}')
+WHITESPACE = re.compile(r'\s+')
+
+class _PageTextCollector:
+    """
+    Parser target that collects title, meta description and visible text in a single pass.
+
+    It implements lxml's parser target interface (start/end/data/close); the
+    standard library fallback feeds it the same events.
+    """
+
+    def __init__(self):
+        self.title_parts = []
+        self.meta_description = ''
+        self.blocks = []
+        self.current = []
+        self.skip_depth = 0
+        self.in_title = False
+
+    def _end_block(self):
+        if self.current:
+            block = WHITESPACE.sub(' ', ''.join(self.current)).strip()
+            if block:
+                self.blocks.append(block)
+            self.current = []
+
+    def start(self, tag, attrib):
+        tag = tag.lower()
+        if tag in BOILERPLATE_TAGS:
+            self.skip_depth += 1
+        elif tag == 'title':
+            self.in_title = True
+        elif tag == 'meta' and not self.meta_description:
+            if (attrib.get('name') or attrib.get('property') or '').lower() in ('description', 'og:description'):
+                self.meta_description = (attrib.get('content') or '').strip()
+        if tag in BLOCK_TAGS:
+            self._end_block()
+
+    def end(self, tag):
+        tag = tag.lower()
+        if tag in BOILERPLATE_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag == 'title':
+            self.in_title = False
+        if tag in BLOCK_TAGS:
+            self._end_block()
+
+    def data(self, text):
+        if self.in_title:
+            self.title_parts.append(text)
+        elif not self.skip_depth:
+            self.current.append(text)
+
+    def close(self):
+        self._end_block()
+        return {
+            'title': WHITESPACE.sub(' ', ''.join(self.title_parts)).strip(),
+            'text': ' '.join(self.blocks),
+            'meta_description': self.meta_description
+        }
+
+class _StdlibAdapter(HTMLParser):
+    """
+    Feeds standard library tokenizer events into a _PageTextCollector.
+    """
+
+    def __init__(self, target):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, {k: v or '' for k, v in attrs})
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+def extract_from_html(html_content):
+    """
+    Extracts title, meta description and boilerplate-free text from HTML in one streaming pass.
+    """
+    collector = _PageTextCollector()
+    if etree is not None:
+        parser = etree.HTMLParser(target=collector, remove_comments=True)
+        try:
+            return etree.fromstring(html_content, parser)
+        except (etree.XMLSyntaxError, ValueError):
+            collector = _PageTextCollector()
+    adapter = _StdlibAdapter(collector)
+    adapter.feed(html_content)
+    adapter.close()
+    return collector.close()
+
+def extract_from_markdown(markdown_text):
+    """
+    Extracts the title and plain text from crawl4ai markdown, dropping link-only navigation lines.
+    """
+    title = ''
+    lines = []
+    seen = set()
+    for line in markdown_text.splitlines():
+        heading = MD_HEADING.match(line)
+        if heading:
+            line = heading.group(2)
+            if not title and len(heading.group(1)) == 1:
+                title = MD_LINK.sub(r'\1', line).strip()
+        without_links = MD_LINK.sub('', MD_IMAGE.sub('', line))
+        # Menu entries and link lists carry no text once their links are removed
+        if MD_LINK.search(line) and len(MD_LIST_MARKER.sub('', without_links).strip(' |*-')) < 3:
+            continue
+        line = MD_LINK.sub(r'\1', MD_IMAGE.sub('', line))
+        line = MD_BARE_URL.sub('', line)
+        line = MD_EMPHASIS.sub('', MD_LIST_MARKER.sub('', line))
+        line = WHITESPACE.sub(' ', line.replace('|', ' ')).strip()
+        # Headers and footers repeat on every page section; keep each line once
+        if len(line) < 2 or line in seen:
+            continue
+        seen.add(line)
+        lines.append(line)
+    return {
+        'title': title,
+        'text': ' '.join(lines),
+        'meta_description': ''
+    }
+
+def extract_page(content):
+    """
+    Extracts clean text and metadata from HTML or markdown content.
+
+    Returns the same fields as main.extract_text_and_metadata.
+    """
+    if not content:
+        return {'title': '', 'text': '', 'meta_description': ''}
+    if HTML_PATTERN.search(content[:4096]):
+        return extract_from_html(content)
+    return extract_from_markdown(content)
@@ -0,0 +1,166 @@
+import re
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from .extractor import extract_page
+    from .metrics import registry, span
+except ImportError:
+    from extractor import extract_page
+    from metrics import registry, span
+
+HTTP_TIER = 'http'
+BROWSER_TIER = 'browser'
+
+# Hosts whose tier is fixed instead of being detected: 'browser' for pages that only render with JavaScript
+SOURCE_TIERS = {
+    'www.forbes.com': BROWSER_TIER
+}
+
+# Pages with less extracted text than this are assumed to need JavaScript to render their content
+MIN_TEXT_CHARS = 500
+
+# Fallbacks caused by the page itself rather than the request, recorded so later crawls skip the HTTP tier
+QUALITY_FALLBACKS = ('thin_content', 'javascript_app')
+
+# A URL recorded as needing the browser is tried over plain HTTP again after this many seconds
+BROWSER_TIER_RECHECK_SECONDS = 7 * 24 * 3600
+
+# Empty single-page-app mount points and "please enable JavaScript" notices
+JS_APP_MARKERS = re.compile(
+    r'<div[^>]+id=["\'](?:root|app|__next|__nuxt)["\'][^>]*>\s*</div>|enable javascript|requires javascript',
+    re.IGNORECASE
+)
+
+USER_AGENT = 'Mozilla/5.0 (compatible; AuraFinancialAssistant/1.0)'
+
+def needs_browser(html, extracted, min_text_chars=MIN_TEXT_CHARS):
+    """
+    Content-quality check of a page fetched over plain HTTP: returns why it needs a browser, or None.
+    """
+    text_length = len(extracted['text'])
+    if text_length < min_text_chars:
+        return 'thin_content'
+    if text_length < 4 * min_text_chars and JS_APP_MARKERS.search(html):
+        return 'javascript_app'
+    return None
+
+def choose_tier(url, state, now=None):
+    """
+    Returns the tier to try first for url: its host's rule, else the tier recorded by earlier crawls, else HTTP.
+    """
+    rule = SOURCE_TIERS.get(urlparse(url).netloc)
+    if rule is not None:
+        return rule
+    if state is not None and state.get('tier') == BROWSER_TIER:
+        recorded_at = state.get('tier_at') or 0
+        if (now or time.time()) - recorded_at < BROWSER_TIER_RECHECK_SECONDS:
+            return BROWSER_TIER
+    return HTTP_TIER
+
+class HttpFetcher:
+    """
+    Fast crawl tier: fetches pages with a pooled keep-alive HTTP session and extracts them right away.
+
+    fetch() returns a result shaped like a crawl4ai result (plus the
+    extracted page) or, when the page turned out to need JavaScript or the
+    request failed, a result whose fallback field says why the browser
+    should render it instead. The session reuses up to pool_size connections
+    per host and accepts gzip/deflate responses.
+    """
+
+    def __init__(self, pool_size=20, timeout=15, max_bytes=5 * 2 ** 20, min_text_chars=MIN_TEXT_CHARS):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.min_text_chars = min_text_chars
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.5',
+            'Accept-Encoding': 'gzip, deflate'
+        })
+        self.lock = threading.Lock()
+        self.counts = {'fetched': 0, 'not_modified': 0, 'fallbacks': {}}
+
+    def _fallback(self, url, reason):
+        with self.lock:
+            self.counts['fallbacks'][reason] = self.counts['fallbacks'].get(reason, 0) + 1
+        registry.inc('aura_fetch_fallbacks_total', reason=reason)
+        return SimpleNamespace(url=url, success=False, fallback=reason, error_message=f"HTTP tier: {reason}")
+
+    def fetch(self, url, state=None):
+        """
+        Fetches url, sending the ETag / Last-Modified of state (if given) as a conditional request.
+        """
+        headers = {}
+        if state is not None:
+            if state.get('etag'):
+                headers['If-None-Match'] = state['etag']
+            if state.get('last_modified'):
+                headers['If-Modified-Since'] = state['last_modified']
+        with span('fetch_http'):
+            try:
+                with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                    if response.status_code == 304:
+                        with self.lock:
+                            self.counts['not_modified'] += 1
+                        return SimpleNamespace(url=url, success=True, not_modified=True, error_message=None)
+                    if response.status_code != 200:
+                        return self._fallback(url, f"status_{response.status_code}")
+                    content_type = response.headers.get('Content-Type', '')
+                    if 'html' not in content_type:
+                        return self._fallback(url, 'not_html')
+                    chunks = []
+                    size = 0
+                    for chunk in response.iter_content(64 * 1024):
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            return self._fallback(url, 'too_large')
+                        chunks.append(chunk)
+                    body = b''.join(chunks)
+                    response_headers = dict(response.headers)
+            except requests.RequestException:
+                return self._fallback(url, 'request_error')
+            # Without a declared charset, UTF-8 is far more likely on our sources than requests' ISO-8859-1 default
+            encoding = response.encoding if 'charset' in content_type.lower() else 'utf-8'
+            try:
+                html = body.decode(encoding or 'utf-8', errors='replace')
+            except LookupError:
+                # Unknown charset name in the Content-Type header
+                html = body.decode('utf-8', errors='replace')
+            try:
+                extracted = extract_page(html)
+            except Exception:
+                return self._fallback(url, 'extract_error')
+        reason = needs_browser(html, extracted, self.min_text_chars)
+        if reason is not None:
+            return self._fallback(url, reason)
+        with self.lock:
+            self.counts['fetched'] += 1
+        return SimpleNamespace(
+            url=url,
+            success=True,
+            error_message=None,
+            html=html,
+            # Fingerprinted by the crawl state, like the markdown of a rendered page
+            markdown=SimpleNamespace(raw_markdown=extracted['text']),
+            extracted=extracted,
+            response_headers=response_headers,
+            tier=HTTP_TIER
+        )
+
+    def stats(self):
+        with self.lock:
+            return {
+                'fetched': self.counts['fetched'],
+                'not_modified': self.counts['not_modified'],
+                'fallbacks': dict(self.counts['fallbacks'])
+            }
@@ -0,0 +1,252 @@
+import hashlib
+import heapq
+import math
+import re
+import time
+from html.parser import HTMLParser
+from urllib.parse import urldefrag, urljoin, urlparse, urlunparse, parse_qsl, urlencode
+
+# Depth and page budget per site (host without www.); sites not listed use the frontier's defaults
+SITE_BUDGETS = {
+    'bct.gov.tn': {'max_depth': 2, 'max_pages': 10},
+    'cmf.tn': {'max_depth': 2, 'max_pages': 10}
+}
+
+# Paths that look like articles, press releases and regulator notices
+ARTICLE_URL = re.compile(
+    r'/(?:19|20)\d{2}/\d{1,2}/'
+    r'|/(?:articles?|news|actualites?|communiques?|circulaires?|avis|publications?|decisions?|notes?)(?:[/-]|\.|$)'
+    r'|/[a-z0-9]+(?:-[a-z0-9]+){3,}/?(?:\.html?|\.php)?$'
+    r'|-\d{4,}(?:\.html?)?$',
+    re.IGNORECASE
+)
+
+# Navigation, account and media links that never lead to an article
+SKIPPED_URL = re.compile(
+    r'/(?:tags?|author|auteur|login|register|wp-login\.php|wp-admin|search|recherche|feed|share|print|contact|'
+    r'cart|compte|account)(?:/|$|\?)'
+    r'|\.(?:jpe?g|png|gif|svg|webp|ico|css|js|json|xml|zip|rar|pdf|docx?|xlsx?|mp3|mp4)$',
+    re.IGNORECASE
+)
+
+# Weight of a keyword match in a link's anchor text or URL, per keyword category of determine_targets
+CATEGORY_WEIGHTS = {'financial_news': 1.0, 'opportunities': 1.5, 'anomalies': 1.5, 'regulations': 1.5}
+
+# Links kept per page, in document order (menus and footers come on top of the article links)
+MAX_LINKS_PER_PAGE = 300
+
+TRACKING_PARAMS = re.compile(r'^(?:utm_\w+|fbclid|gclid|mc_cid|mc_eid)$')
+
+class BloomFilter:
+    """
+    Fixed-size set of strings with no false negatives and an error_rate chance of false positives.
+
+    Memory stays at about 1.44 * log2(1 / error_rate) bits per item up to
+    capacity items, however many URLs a crawl sees.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(self.hash_count)]
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def add(self, item):
+        """
+        Adds item and returns True if it was not (probably) already there.
+        """
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        return added
+
+def normalize_url(url):
+    """
+    Canonical form of a link used for the seen-URL check: no fragment, no tracking parameters, lowercase host.
+    """
+    url, _ = urldefrag(url)
+    parts = urlparse(url)
+    query = urlencode([(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                       if not TRACKING_PARAMS.match(key)])
+    return urlunparse((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', '', query, ''))
+
+def site_of(url):
+    """
+    Site key of a URL: its host without a leading www.
+    """
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+class _LinkCollector(HTMLParser):
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.links = []
+        self.href = None
+        self.text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'base':
+            self.base_url = urljoin(self.base_url, dict(attrs).get('href') or '')
+        elif tag == 'a':
+            self.href = dict(attrs).get('href')
+            self.text = []
+
+    def handle_data(self, data):
+        if self.href is not None:
+            self.text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self.href is not None:
+            if len(self.links) < MAX_LINKS_PER_PAGE:
+                self.links.append((self.href, ' '.join(' '.join(self.text).split())))
+            self.href = None
+
+def extract_links(html_content, base_url):
+    """
+    Returns the [url, anchor text] pairs of the page's links to its own site, absolute and normalized.
+    """
+    collector = _LinkCollector(base_url)
+    try:
+        collector.feed(html_content)
+        collector.close()
+    except Exception:
+        pass
+    site = site_of(base_url)
+    links = []
+    for href, text in collector.links:
+        href = href.strip()
+        if not href or href.startswith(('#', 'mailto:', 'javascript:', 'tel:')):
+            continue
+        url = normalize_url(urljoin(collector.base_url, href))
+        if url.startswith(('http://', 'https://')) and site_of(url) == site:
+            links.append([url, text])
+    return links
+
+def link_priority(url, anchor_text, keywords):
+    """
+    Scores a discovered link: article-like URL patterns and keyword matches in its anchor text or URL.
+
+    Links scoring 0 (navigation, media, unrelated sections) are not crawled.
+    """
+    path = urlparse(url).path
+    if SKIPPED_URL.search(path) or path in ('', '/'):
+        return 0.0
+    score = 2.0 if ARTICLE_URL.search(path) else 0.0
+    haystack = f"{anchor_text} {path.replace('-', ' ').replace('_', ' ')}".lower()
+    for category, words in (keywords or {}).items():
+        weight = CATEGORY_WEIGHTS.get(category, 1.0)
+        score += weight * sum(1 for word in words if word.lower() in haystack)
+    if score and len(anchor_text) >= 25:
+        # Headline-like anchors point to articles rather than section pages
+        score += 1.0
+    return score
+
+class CrawlFrontier:
+    """
+    Bounded, prioritized queue of the sub-pages to crawl below a run's seed pages.
+
+    add_links() queues the links of a crawled page that stay on its site,
+    are within the site's depth budget, have not been seen (Bloom filter) and
+    score above 0 with link_priority; next_url() returns the best queued link
+    whose site still has page budget. Each site may have at most max_depth
+    levels and max_pages pages including its seed (SITE_BUDGETS overrides
+    them per host), a run at most max_pages_total pages, and no page is
+    handed out after time_budget seconds. At most max_queued links are kept,
+    the lowest-priority ones being dropped first.
+    """
+
+    def __init__(self, keywords, max_depth=1, max_pages=6, max_pages_total=60, time_budget=120.0,
+                 max_queued=2000, site_budgets=None, bloom_capacity=100000):
+        self.keywords = keywords
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_pages_total = max_pages_total
+        self.max_queued = max_queued
+        self.site_budgets = SITE_BUDGETS if site_budgets is None else site_budgets
+        self.deadline = time.monotonic() + time_budget
+        self.seen = BloomFilter(bloom_capacity)
+        self.queue = []
+        self.depths = {}
+        self.pages_per_site = {}
+        self.sequence = 0
+        self.discovered = 0
+        self.dropped = 0
+
+    def _budget(self, url):
+        budget = self.site_budgets.get(site_of(url), {})
+        return budget.get('max_depth', self.max_depth), budget.get('max_pages', self.max_pages)
+
+    @property
+    def scheduled(self):
+        return len(self.depths)
+
+    def add_seeds(self, urls):
+        for url in urls:
+            self.seen.add(normalize_url(url))
+            self.depths[url] = 0
+            site = site_of(url)
+            self.pages_per_site[site] = self.pages_per_site.get(site, 0) + 1
+
+    def add_links(self, url, links):
+        """
+        Queues the worthwhile links ([url, anchor text] pairs) found on a crawled page.
+        """
+        depth = self.depths.get(url)
+        if depth is None:
+            return
+        max_depth, _ = self._budget(url)
+        if depth + 1 > max_depth:
+            return
+        for link, anchor_text in links:
+            if link in self.seen:
+                continue
+            priority = link_priority(link, anchor_text, self.keywords)
+            if priority <= 0:
+                continue
+            self.seen.add(link)
+            self.sequence += 1
+            self.discovered += 1
+            heapq.heappush(self.queue, (-priority, self.sequence, link, depth + 1))
+        if len(self.queue) > self.max_queued:
+            self.dropped += len(self.queue) - self.max_queued
+            self.queue = heapq.nsmallest(self.max_queued, self.queue)
+            heapq.heapify(self.queue)
+
+    def next_url(self):
+        """
+        Returns the next sub-page to crawl, or None when the queue or a budget is exhausted.
+        """
+        if self.scheduled >= self.max_pages_total or time.monotonic() > self.deadline:
+            return None
+        while self.queue:
+            _, _, url, depth = heapq.heappop(self.queue)
+            site = site_of(url)
+            _, max_pages = self._budget(url)
+            if self.pages_per_site.get(site, 0) >= max_pages:
+                continue
+            self.pages_per_site[site] = self.pages_per_site.get(site, 0) + 1
+            self.depths[url] = depth
+            return url
+        return None
+
+    def stats(self):
+        return {
+            'scheduled': self.scheduled,
+            'queued': len(self.queue),
+            'discovered': self.discovered,
+            'dropped': self.dropped,
+            'pages_per_site': dict(self.pages_per_site),
+            'expired': time.monotonic() > self.deadline
+        }
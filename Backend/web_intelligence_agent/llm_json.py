@@ -0,0 +1,165 @@
+import json
+import re
+
+try:
+    from .metrics import registry
+except ImportError:
+    from metrics import registry
+
+try:
+    import json5
+except ImportError:
+    json5 = None
+
+ANALYSIS_CATEGORIES = ('news', 'opportunities', 'threats')
+
+_CODE_FENCE = re.compile(r'```(?:json5?|JSON)?[ \t]*\n?')
+_CATEGORY_ARRAY = re.compile(r'"(news|opportunities|threats)"\s*:\s*\[')
+
+def strip_code_fence(text):
+    """
+    Returns the content of the first (possibly unterminated) markdown code block, or the text itself.
+    """
+    match = _CODE_FENCE.search(text)
+    if match is None:
+        return text.strip()
+    body = text[match.end():]
+    end = body.find('```')
+    return (body if end == -1 else body[:end]).strip()
+
+def loads_tolerant(text):
+    """
+    Parses JSON, falling back to json5 (trailing commas, comments, single quotes) when it is installed.
+
+    Raises ValueError when neither can parse the text.
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        if json5 is None:
+            raise
+    try:
+        return json5.loads(text)
+    except Exception as e:
+        raise ValueError(f"Invalid JSON: {e}") from e
+
+class IncrementalAnalysisParser:
+    """
+    Extracts news/opportunities/threats items from an LLM response as its text arrives.
+
+    feed() takes the next piece of the response and returns the (category,
+    item) pairs completed by it. Each array element is parsed on its own as
+    soon as its closing bracket or quote arrives, so items before a malformed
+    one (or a truncated tail) are never lost; an element that cannot be
+    parsed is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.position = 0
+        self.category = None
+        self.item_start = None
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.items = {category: [] for category in ANALYSIS_CATEGORIES}
+        self.skipped = 0
+
+    def feed(self, text):
+        self.buffer += text
+        completed = []
+        while self.position < len(self.buffer):
+            if self.category is None:
+                match = _CATEGORY_ARRAY.search(self.buffer, self.position)
+                if match is None:
+                    # Keep enough of the tail to match a key split across pieces
+                    self.position = max(self.position, len(self.buffer) - 32)
+                    break
+                self.category = match.group(1)
+                self.position = match.end()
+                continue
+            if self.item_start is None:
+                char = self.buffer[self.position]
+                if char == ']':
+                    self.category = None
+                elif char in '{["':
+                    self.item_start = self.position
+                    self.depth = 0 if char == '"' else 1
+                    self.in_string = char == '"'
+                self.position += 1
+                continue
+            item = self._scan_item()
+            if item is None:
+                break
+            category, value = item
+            if value is not None:
+                completed.append((category, value))
+        return completed
+
+    def _scan_item(self):
+        # Advances through the current element; returns (category, item) once it is complete
+        buffer = self.buffer
+        while self.position < len(buffer):
+            char = buffer[self.position]
+            self.position += 1
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 0:
+                        return self._complete_item()
+            elif char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    return self._complete_item()
+        return None
+
+    def _complete_item(self):
+        text = self.buffer[self.item_start:self.position]
+        self.item_start = None
+        category = self.category
+        try:
+            item = loads_tolerant(text)
+        except ValueError:
+            self.skipped += 1
+            return category, None
+        self.items[category].append(item)
+        return category, item
+
+    def result(self):
+        """
+        Returns the items parsed so far, by category.
+        """
+        return {category: list(items) for category, items in self.items.items()}
+
+def parse_analysis_response(text, parser=None):
+    """
+    Parses an analysis response into {'news': [...], 'opportunities': [...], 'threats': [...]}.
+
+    The whole (fenced) JSON is parsed tolerantly first; if that fails the
+    items are recovered one by one, keeping every valid item before the point
+    where the response breaks. parser, if given, already holds the items of a
+    streamed response.
+    """
+    body = strip_code_fence(text)
+    try:
+        parsed = loads_tolerant(body)
+        if isinstance(parsed, dict):
+            return {category: parsed.get(category, []) or [] for category in ANALYSIS_CATEGORIES}
+    except ValueError:
+        pass
+    registry.inc('aura_llm_json_parse_failures_total')
+    if parser is None:
+        parser = IncrementalAnalysisParser()
+        parser.feed(body)
+    recovered = parser.result()
+    recovered_count = sum(len(items) for items in recovered.values())
+    print(f"Recovered {recovered_count} items from a malformed Gemini response ({parser.skipped} skipped)")
+    return recovered
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+try:
+    from .main import get_gemini_model, analyze_with_gemini
+    from .metrics import registry
+except ImportError:
+    from main import get_gemini_model, analyze_with_gemini
+    from metrics import registry
+
+# HTTP status codes worth retrying: quota exhaustion and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+def estimate_tokens(text):
+    """
+    Roughly estimates the number of LLM tokens in a text (about 4 characters per token).
+    """
+    return max(1, len(text) // 4)
+
+def is_retryable_error(error):
+    """
+    Tells whether a Gemini API error is a quota or transient server error worth retrying.
+    """
+    code = getattr(error, 'code', None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS_CODES
+    return type(error).__name__ in ('ResourceExhausted', 'ServiceUnavailable', 'InternalServerError',
+                                    'DeadlineExceeded', 'TooManyRequests')
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a fixed rate per minute.
+
+    The bucket is guarded by a thread lock rather than asyncio primitives, so one
+    instance can be shared by every event loop and request thread.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.refill_per_second = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def try_acquire(self, amount):
+        """
+        Takes amount tokens if available, otherwise returns how many seconds to wait.
+        """
+        amount = min(amount, self.capacity)
+        with self.lock:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0
+            return (amount - self.tokens) / self.refill_per_second
+
+    def debit(self, amount):
+        """
+        Removes tokens that were used but not reserved up front; the balance may go negative.
+        """
+        with self.lock:
+            self._refill()
+            self.tokens -= amount
+
+    async def acquire(self, amount=1):
+        """
+        Waits until amount tokens are available and takes them.
+        """
+        while True:
+            wait = self.try_acquire(amount)
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+class AnalysisScheduler:
+    """
+    Shares one Gemini client across concurrent analyses under RPM and TPM budgets.
+
+    The scheduler exposes generate_content_async like a Gemini model, so it can
+    be passed wherever analyze_with_gemini accepts a model. Quota (429) and
+    transient 5xx errors are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, model=None, requests_per_minute=60, tokens_per_minute=1000000,
+                 max_concurrency=8, max_retries=5, base_delay=1.0, max_delay=30.0):
+        self.model = model
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+
+    def _get_model(self):
+        if self.model is None:
+            self.model = get_gemini_model()
+        return self.model
+
+    def backoff_delay(self, attempt):
+        """
+        Returns a full-jitter exponential backoff delay for the given retry attempt.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def generate_content_async(self, prompt, stream=False):
+        """
+        Sends a prompt once the rate budgets allow it, retrying quota and server errors.
+
+        With stream=True the streamed response is returned; errors raised while
+        it is being read are not retried.
+        """
+        prompt_tokens = estimate_tokens(prompt)
+        attempt = 0
+        while True:
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(prompt_tokens)
+            self.stats['requests'] += 1
+            registry.inc('aura_llm_tokens_total', prompt_tokens, kind='prompt')
+            try:
+                if stream:
+                    response = await self._get_model().generate_content_async(prompt, stream=True)
+                else:
+                    response = await self._get_model().generate_content_async(prompt)
+            except Exception as e:
+                if not is_retryable_error(e) or attempt >= self.max_retries:
+                    self.stats['failures'] += 1
+                    registry.inc('aura_llm_requests_total', outcome='failed')
+                    raise
+                delay = self.backoff_delay(attempt)
+                print(f"Gemini request failed ({e}), retrying in {delay:.1f}s...")
+                self.stats['retries'] += 1
+                registry.inc('aura_llm_requests_total', outcome='retried')
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            registry.inc('aura_llm_requests_total', outcome='succeeded')
+            if stream:
+                # Streamed responses only know their size once they have been read
+                return self._count_stream(response)
+            usage = getattr(response, 'usage_metadata', None)
+            total_tokens = getattr(usage, 'total_token_count', None)
+            if total_tokens and total_tokens > prompt_tokens:
+                self.token_bucket.debit(total_tokens - prompt_tokens)
+                registry.inc('aura_llm_tokens_total', total_tokens - prompt_tokens, kind='response')
+            else:
+                registry.inc('aura_llm_tokens_total', estimate_tokens(getattr(response, 'text', '') or ''),
+                             kind='response')
+            return response
+
+    async def _count_stream(self, response):
+        response_chars = 0
+        async for chunk in response:
+            response_chars += len(chunk.text or '')
+            yield chunk
+        response_tokens = max(1, response_chars // 4)
+        self.token_bucket.debit(response_tokens)
+        registry.inc('aura_llm_tokens_total', response_tokens, kind='response')
+
+    async def analyze_many(self, texts, user_profile):
+        """
+        Analyzes many texts at once, at most max_concurrency in flight, and returns results in input order.
+        """
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def analyze_one(text):
+            async with slots:
+                return await analyze_with_gemini(text, user_profile, model=self)
+
+        return await asyncio.gather(*(analyze_one(text) for text in texts))
+
+class FakeGenerativeModel:
+    """
+    Offline stand-in for a Gemini model with a fixed latency and canned response.
+
+    The first fail_times calls raise an error with the given status code, which
+    makes it possible to exercise the scheduler's retry path without the API.
+    Streamed responses arrive in pieces of chunk_chars characters spread over
+    the latency. response may also be a string, e.g. a malformed answer.
+    """
+
+    def __init__(self, latency=0.1, response=None, fail_times=0, fail_code=429, chunk_chars=64):
+        self.latency = latency
+        self.response = response or {"news": [], "opportunities": [], "threats": []}
+        self.fail_times = fail_times
+        self.fail_code = fail_code
+        self.chunk_chars = chunk_chars
+        self.calls = 0
+
+    async def _stream(self, text):
+        pieces = [text[start:start + self.chunk_chars] for start in range(0, len(text), self.chunk_chars)]
+        for piece in pieces:
+            await asyncio.sleep(self.latency / len(pieces))
+            yield SimpleNamespace(text=piece)
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.calls += 1
+        call_number = self.calls
+        if not stream:
+            await asyncio.sleep(self.latency)
+        if call_number <= self.fail_times:
+            error = RuntimeError(f"Fake Gemini error {self.fail_code}")
+            error.code = self.fail_code
+            raise error
+        body = self.response if isinstance(self.response, str) else json.dumps(self.response)
+        text = f"```json\n{body}\n```"
+        if stream:
+            return self._stream(text)
+        return SimpleNamespace(
+            text=text,
+            usage_metadata=SimpleNamespace(total_token_count=estimate_tokens(prompt) + estimate_tokens(text))
+        )
@@ -1,10 +1,35 @@
 import json
 import asyncio
 import os
+from contextlib import AsyncExitStack
+from types import SimpleNamespace
+from urllib.parse import urlparse
+import requests
 import google.generativeai as genai
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
 from bs4 import BeautifulSoup
 
+try:
+    from .crawl_state import content_fingerprint
+    from .llm_json import strip_code_fence, loads_tolerant, parse_analysis_response, IncrementalAnalysisParser
+    from .metrics import registry, span
+    from .fetcher import choose_tier, HTTP_TIER, BROWSER_TIER, QUALITY_FALLBACKS
+    from .frontier import extract_links
+except ImportError:
+    from crawl_state import content_fingerprint
+    from llm_json import strip_code_fence, loads_tolerant, parse_analysis_response, IncrementalAnalysisParser
+    from metrics import registry, span
+    from fetcher import choose_tier, HTTP_TIER, BROWSER_TIER, QUALITY_FALLBACKS
+    from frontier import extract_links
+
+GEMINI_MODEL_NAME = 'gemini-pro-latest'
+
+# Bump whenever the analysis prompt changes so cached analyses are invalidated
+ANALYSIS_PROMPT_VERSION = 2
+
+# Shared Gemini client, created on first use and reused by every analysis
+_gemini_model = None
+
 def load_user_profile(profile_path):
     """
     Loads the user profile from a JSON file.
@@ -43,22 +68,193 @@ def determine_targets(user_profile):
 
     return target_urls, keywords
 
-async def crawl_websites_async(urls):
+def _failed_crawl_result(url, error_message):
+    """
+    Builds a failed crawl result with the same shape as a crawl4ai result.
+    """
+    return SimpleNamespace(url=url, success=False, error_message=error_message, markdown=None, html='')
+
+def _unchanged_crawl_result(url):
+    """
+    Builds the crawl result for a page whose content has not changed since the last crawl.
+    """
+    return SimpleNamespace(url=url, success=True, unchanged=True, error_message=None, markdown=None, html='')
+
+def _count_page(result):
+    if getattr(result, 'unchanged', False):
+        status = 'unchanged'
+    else:
+        status = 'crawled' if result.success else 'failed'
+    registry.inc('aura_pages_total', status=status)
+    return result
+
+def is_not_modified(url, state):
+    """
+    Sends a conditional GET with the stored ETag / Last-Modified and tells whether the server answered 304.
+    """
+    headers = {}
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('last_modified'):
+        headers['If-Modified-Since'] = state['last_modified']
+    try:
+        with requests.get(url, headers=headers, timeout=10, stream=True) as response:
+            return response.status_code == 304
+    except requests.RequestException:
+        return False
+
+async def crawl_websites_concurrent(urls, max_concurrency=5, per_host_limit=1, deadline=None, state_store=None,
+                                    crawler_pool=None, fetcher=None, frontier=None, analysis_key=None):
+    """
+    Crawls a list of websites concurrently and yields (url, result) pairs in completion order.
+
+    At most max_concurrency pages are rendered at once and at most per_host_limit
+    per host. If deadline (in seconds) expires, the pages still running are
+    cancelled and yielded as failed results.
+
+    With a CrawlStateStore and an analysis_key (see make_analysis_key), pages
+    that have an analysis saved under that key and answer a conditional
+    request with 304 are not rendered at all, and those whose rendered content
+    has the same fingerprint as last time are yielded with unchanged=True.
+
+    With a CrawlerPool, pages are rendered by its warm browsers instead of a
+    browser started for this call.
+
+    With an HttpFetcher, pages are first fetched over plain HTTP and only
+    rendered in the browser when their host's rule, the tier recorded by an
+    earlier crawl (in the state store) or the fetcher's content check says
+    they need JavaScript.
+
+    With a CrawlFrontier, the links of every crawled page (or, for an
+    unchanged page, the links stored with its state) feed the frontier, and
+    the sub-pages it hands out are crawled and yielded like the seed urls.
+    """
+    crawler_cfg = CrawlerRunConfig(page_timeout=30000)
+    global_slots = asyncio.Semaphore(max(1, max_concurrency))
+    host_slots = {}
+    # Links of the crawled pages, handed to the frontier as each page is yielded
+    page_links = {}
+    browser_lock = asyncio.Lock()
+    browser = None
+
+    async with AsyncExitStack() as browser_stack:
+        async def render(url):
+            nonlocal browser
+            if crawler_pool is not None:
+                async with crawler_pool.lease() as pooled_crawler:
+                    return await pooled_crawler.arun(url=url, config=crawler_cfg)
+            # Started on the first page that needs it, so runs served by the HTTP tier never start a browser
+            async with browser_lock:
+                if browser is None:
+                    browser = await browser_stack.enter_async_context(AsyncWebCrawler())
+            return await browser.arun(url=url, config=crawler_cfg)
+
+        async def crawl_one(url):
+            host_slot = host_slots.setdefault(urlparse(url).netloc, asyncio.Semaphore(max(1, per_host_limit)))
+            async with host_slot:
+                async with global_slots:
+                    state = state_store.get(url, analysis_key) if state_store else None
+                    reusable = state is not None and state['analysis'] is not None
+                    tier = choose_tier(url, state) if fetcher is not None else BROWSER_TIER
+                    result = None
+                    if tier == HTTP_TIER:
+                        # The HTTP tier sends the validators itself, so a 304 costs a single request
+                        result = await asyncio.to_thread(fetcher.fetch, url, state if reusable else None)
+                        if getattr(result, 'not_modified', False):
+                            state_store.record_not_modified(url)
+                            page_links[url] = state['links']
+                            return url, _count_page(_unchanged_crawl_result(url))
+                        if result.success:
+                            if state_store is not None:
+                                state_store.record_tier(url, HTTP_TIER)
+                        else:
+                            if state_store is not None and result.fallback in QUALITY_FALLBACKS:
+                                state_store.record_tier(url, BROWSER_TIER)
+                            result = None
+                    elif reusable and (state['etag'] or state['last_modified']):
+                        if await asyncio.to_thread(is_not_modified, url, state):
+                            state_store.record_not_modified(url)
+                            page_links[url] = state['links']
+                            return url, _count_page(_unchanged_crawl_result(url))
+                    if result is None:
+                        tier = BROWSER_TIER
+                        with span('crawl'):
+                            try:
+                                result = await render(url)
+                            except Exception as e:
+                                result = _failed_crawl_result(url, str(e))
+                    registry.inc('aura_fetch_total', tier=tier)
+            if frontier is not None and result.success and getattr(result, 'html', None):
+                page_links[url] = await asyncio.to_thread(extract_links, result.html, url)
+            if state_store is not None and result.success:
+                headers = {k.lower(): v for k, v in (getattr(result, 'response_headers', None) or {}).items()}
+                changed = state_store.record_crawl(
+                    url,
+                    content_fingerprint(result.markdown.raw_markdown),
+                    etag=headers.get('etag'),
+                    last_modified=headers.get('last-modified')
+                )
+                if url in page_links:
+                    state_store.record_links(url, page_links[url])
+                if not changed and reusable:
+                    result = _unchanged_crawl_result(url)
+            return url, _count_page(result)
+
+        loop = asyncio.get_running_loop()
+        end_time = loop.time() + deadline if deadline is not None else None
+        tasks = {asyncio.create_task(crawl_one(url)): url for url in urls}
+        pending = set(tasks)
+        if frontier is not None:
+            frontier.add_seeds(urls)
+        try:
+            while pending:
+                timeout = max(0, end_time - loop.time()) if end_time is not None else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    url, result = task.result()
+                    if frontier is not None:
+                        frontier.add_links(url, page_links.pop(url, None) or [])
+                    yield url, result
+                # Sub-pages are handed out only as slots free up, so later finds still compete on priority
+                while frontier is not None and len(pending) < max(1, max_concurrency):
+                    next_url = frontier.next_url()
+                    if next_url is None:
+                        break
+                    task = asyncio.create_task(crawl_one(next_url))
+                    tasks[task] = next_url
+                    pending.add(task)
+            for task in pending:
+                registry.inc('aura_pages_total', status='timeout')
+                yield tasks[task], _failed_crawl_result(tasks[task], f"Crawl deadline of {deadline}s exceeded")
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+async def crawl_websites_async(urls, max_concurrency=5, per_host_limit=1, deadline=None, state_store=None,
+                               crawler_pool=None, fetcher=None, frontier=None, analysis_key=None):
     """
     Asynchronously crawls a list of websites using crawl4ai.
+
+    Results are returned in completion order; pass max_concurrency=1 to crawl
+    one page at a time.
     """
     results = []
-    crawler_cfg = CrawlerRunConfig(page_timeout=30000)
-    async with AsyncWebCrawler() as crawler:
-        for url in urls:
-            result = await crawler.arun(url=url, config=crawler_cfg)
-            results.append(result)
+    async for _, result in crawl_websites_concurrent(urls, max_concurrency, per_host_limit, deadline, state_store,
+                                                     crawler_pool, fetcher, frontier, analysis_key):
+        results.append(result)
     return results
 
 def extract_text_and_metadata(html_content):
     """
     Extracts clean text and metadata from HTML content.
     """
+    with span('extract_bs4'):
+        return _extract_text_and_metadata(html_content)
+
+def _extract_text_and_metadata(html_content):
     soup = BeautifulSoup(html_content, 'html.parser')
     
     # Extract title
@@ -85,26 +281,50 @@ def configure_gemini(api_key):
     """
     genai.configure(api_key=api_key)
 
+def get_gemini_model():
+    """
+    Returns the shared Gemini model client, creating it on first use.
+    """
+    global _gemini_model
+    if _gemini_model is None:
+        _gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    return _gemini_model
+
 def extract_json_from_markdown(markdown_text):
     """
-    Extracts a JSON object from a markdown code block.
+    Extracts a JSON object from a markdown code block, tolerating trailing commas and an unterminated block.
     """
     try:
-        return json.loads(markdown_text.split('```json')[1].split('```')[0])
-    except (IndexError, json.JSONDecodeError):
+        return loads_tolerant(strip_code_fence(markdown_text))
+    except ValueError:
         return None
 
-async def analyze_with_gemini(text, user_profile):
+async def analyze_with_gemini(text, user_profile, model=None, on_item=None):
     """
     Analyzes the scraped text using the Gemini API.
+
+    model can be any object with a generate_content_async(prompt) method, such
+    as an AnalysisScheduler; it defaults to the shared Gemini client. With
+    user_profile=None the page is analyzed once for every user (shared
+    analysis) and personalized afterwards.
+
+    With on_item, the response is streamed and on_item(category, item) is
+    called for each item as soon as it has been received. Valid items are
+    kept even when the rest of the response is malformed.
     """
-    model = genai.GenerativeModel('gemini-pro-latest')
+    model = model or get_gemini_model()
     
-    prompt = f"""
-    Analyze the following text based on the user's profile and identify relevant news, opportunities, and threats.
+    if user_profile is None:
+        instructions = """Extract all news, investment opportunities, and threats (risks for investors, businesses
+    or savers) from the following text. Do not filter for any particular user: relevance is decided later."""
+    else:
+        instructions = f"""Analyze the following text based on the user's profile and identify relevant news, opportunities, and threats.
 
     User Profile:
-    {json.dumps(user_profile, indent=4)}
+    {json.dumps(user_profile, separators=(',', ':'))}"""
+
+    prompt = f"""
+    {instructions}
 
     Text to Analyze:
     {text}
@@ -119,22 +339,30 @@ async def analyze_with_gemini(text, user_profile):
     ```
     """
     
-    try:
-        response = await model.generate_content_async(prompt)
-        json_response = extract_json_from_markdown(response.text)
-        if json_response:
-            return json_response
-        else:
-            return json.loads(response.text)
-    except json.JSONDecodeError:
-        print("Error decoding JSON from Gemini API response:")
-        print(response.text)
-        return {"news": [], "opportunities": [], "threats": []}
+    with span('analyze'):
+        if on_item is None:
+            response = await model.generate_content_async(prompt)
+            return parse_analysis_response(response.text)
+
+        parser = IncrementalAnalysisParser()
+        pieces = []
+        response = await model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            pieces.append(chunk.text)
+            for category, item in parser.feed(chunk.text):
+                on_item(category, item)
+        return parse_analysis_response(''.join(pieces), parser)
 
 async def main():
     """
     Main function to orchestrate the Web Intelligence Agent.
     """
+    from pipeline import run_pipeline
+    from llm_scheduler import AnalysisScheduler
+    from analysis_cache import AnalysisCache
+    from crawl_state import CrawlStateStore
+    from dedup import deduplicate_results
+
     # Get Gemini API key from environment variable
     gemini_api_key = os.environ.get("GEMINI_API_KEY")
     if not gemini_api_key:
@@ -152,33 +380,25 @@ async def main():
     user_profile = load_user_profile(profile_path)
     
     # Determine target URLs and keywords
-    target_urls, _ = determine_targets(user_profile)
+    target_urls, keywords = determine_targets(user_profile)
     
     print("Starting Web Intelligence Agent...")
     print(f"Target URLs: {target_urls}")
     
-    # Crawl websites
-    scraped_data = await crawl_websites_async(target_urls)
-    
-    all_analysis_results = []
-    
-    # Process each crawled website
-    for result in scraped_data:
-        if result.success:
-            print(f"Processing content from {result.url}...")
-            
-            # Extract text and metadata
-            extracted_data = extract_text_and_metadata(result.markdown.raw_markdown)
-            
-            # Analyze content with Gemini
-            analysis_result = await analyze_with_gemini(extracted_data['text'], user_profile)
-            
-            # Add URL to the analysis result
-            analysis_result['url'] = result.url
-            
-            all_analysis_results.append(analysis_result)
-        else:
-            print(f"Failed to crawl {result.url}: {result.error_message}")
+    # Crawl, extract and analyze each website as soon as its crawl finishes
+    scheduler = AnalysisScheduler()
+    all_analysis_results = await run_pipeline(
+        target_urls,
+        user_profile,
+        analyze_workers=scheduler.max_concurrency,
+        model=scheduler,
+        cache=AnalysisCache(os.path.join(script_dir, 'analysis_cache.db')),
+        state_store=CrawlStateStore(os.path.join(script_dir, 'crawl_state.db')),
+        keywords=keywords
+    )
+
+    # Merge copies of the same story published by several sources
+    all_analysis_results = deduplicate_results(all_analysis_results)
         
     # Output the results in JSON format
     output_json = json.dumps(all_analysis_results, indent=4)
@@ -0,0 +1,150 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Spans of the run or request currently being traced (None when nothing is traced)
+_current_trace = contextvars.ContextVar('aura_trace', default=None)
+
+class MetricsRegistry:
+    """
+    In-process counters, gauges and latency histograms rendered in the Prometheus text format.
+
+    Metrics are identified by name and labels and created on first use. Safe
+    to update from request threads, the job loop and extraction threads.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.help = {}
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets': [0] * len(self.buckets), 'count': 0, 'sum': 0.0}
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+
+    def counter_value(self, name, **labels):
+        with self.lock:
+            return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def render(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        with self.lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted((key, dict(value, buckets=list(value['buckets'])))
+                                for key, value in self.histograms.items())
+        lines = []
+        declared = set()
+
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            declare(name, 'counter')
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), value in gauges:
+            declare(name, 'gauge')
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), histogram in histograms:
+            declare(name, 'histogram')
+            for bound, count in zip(self.buckets, histogram['buckets']):
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+        return '\n'.join(lines) + '\n'
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+# Registry shared by the agent modules and the Flask app
+registry = MetricsRegistry()
+registry.describe('aura_stage_seconds', 'Time spent in each pipeline stage')
+registry.describe('aura_http_request_seconds', 'Flask request latency by route')
+registry.describe('aura_pages_total', 'Crawled pages by outcome')
+registry.describe('aura_llm_requests_total', 'Gemini requests by outcome')
+registry.describe('aura_llm_tokens_total', 'Estimated Gemini prompt and response tokens')
+registry.describe('aura_llm_json_parse_failures_total', 'Gemini responses that were not valid JSON')
+registry.describe('aura_cache_requests_total', 'Analysis cache lookups by result')
+registry.describe('aura_job_queue_depth', 'Analysis jobs queued or running')
+registry.describe('aura_last_successful_run_age_seconds', 'Seconds since the latest saved analysis run')
+registry.describe('aura_crawler_starts_total', 'Headless browsers started by the crawler pool')
+registry.describe('aura_crawler_recycled_total', 'Pooled browsers recycled by reason')
+registry.describe('aura_crawler_pool_browsers', 'Browsers currently held by the crawler pool')
+registry.describe('aura_crawler_pool_active_pages', 'Pages the pooled browsers are rendering')
+registry.describe('aura_fetch_total', 'Crawled pages by fetch tier (plain HTTP or browser)')
+registry.describe('aura_fetch_fallbacks_total', 'Pages the HTTP tier handed to the browser, by reason')
+
+def start_trace():
+    """
+    Starts collecting the spans of the current run or request and returns their list.
+
+    Spans recorded by tasks and threads started from this context are added
+    to the same list.
+    """
+    spans = []
+    _current_trace.set(spans)
+    return spans
+
+@contextmanager
+def span(stage, **labels):
+    """
+    Times a block: observes aura_stage_seconds{stage=...} and adds a span to the current trace.
+    """
+    start = time.perf_counter()
+    started_at = time.time()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        registry.observe('aura_stage_seconds', duration, stage=stage, **labels)
+        spans = _current_trace.get()
+        if spans is not None:
+            spans.append({'stage': stage, 'start': started_at, 'duration_ms': round(duration * 1000, 3)})
+
+def summarize_trace(spans):
+    """
+    Aggregates spans per stage into {'stage': {'count': n, 'total_ms': t}}.
+    """
+    summary = {}
+    for recorded in spans:
+        stage = summary.setdefault(recorded['stage'], {'count': 0, 'total_ms': 0.0})
+        stage['count'] += 1
+        stage['total_ms'] = round(stage['total_ms'] + recorded['duration_ms'], 3)
+    return summary
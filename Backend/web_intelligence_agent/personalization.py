@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+try:
+    from .main import get_gemini_model, extract_json_from_markdown, GEMINI_MODEL_NAME
+    from .analysis_cache import make_cache_key
+except ImportError:
+    from main import get_gemini_model, extract_json_from_markdown, GEMINI_MODEL_NAME
+    from analysis_cache import make_cache_key
+
+CATEGORIES = ('news', 'opportunities', 'threats')
+
+# Bump whenever the re-rank prompt changes so cached rankings are invalidated
+RERANK_PROMPT_VERSION = 'rerank-1'
+
+# Characters of each item's summary/content shown to the re-ranker
+ITEM_PREVIEW_CHARS = 300
+
+def _item_preview(item):
+    text = item.get('summary') or item.get('content') or ''
+    return {'title': item.get('title', ''), 'text': text[:ITEM_PREVIEW_CHARS]}
+
+async def rerank_batch(items, user_profile, model=None, cache=None):
+    """
+    Asks Gemini to rate how relevant each item is to the profile and returns one 0-10 rating per item.
+
+    Items the response does not rate get None.
+    """
+    model = model or get_gemini_model()
+    numbered = {str(index): _item_preview(item) for index, item in enumerate(items)}
+    cache_key = None
+    if cache is not None:
+        cache_key = make_cache_key(json.dumps(numbered, sort_keys=True), user_profile, GEMINI_MODEL_NAME,
+                                   RERANK_PROMPT_VERSION)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached['ratings']
+
+    prompt = f"""
+    Rate how relevant each item is to this user, from 0 (irrelevant) to 10 (must read).
+
+    User Profile:
+    {json.dumps(user_profile, separators=(',', ':'))}
+
+    Items:
+    {json.dumps(numbered, ensure_ascii=False, separators=(',', ':'))}
+
+    Reply with a JSON object mapping every item id to its rating:
+    ```json
+    {{"0": 7, "1": 2}}
+    ```
+    """
+    response = await model.generate_content_async(prompt)
+    try:
+        parsed = extract_json_from_markdown(response.text) or json.loads(response.text)
+    except json.JSONDecodeError:
+        print("Error decoding JSON from Gemini re-rank response:")
+        print(response.text)
+        return [None] * len(items)
+    if not isinstance(parsed, dict):
+        return [None] * len(items)
+    ratings = []
+    for index in range(len(items)):
+        try:
+            ratings.append(max(0.0, min(10.0, float(parsed.get(str(index))))))
+        except (TypeError, ValueError):
+            ratings.append(None)
+    if cache_key:
+        cache.put(cache_key, {'ratings': ratings})
+    return ratings
+
+async def rerank_results(filtered_results, user_profile, model=None, cache=None, batch_size=40, min_relevance=3):
+    """
+    Second phase of shared analysis: re-ranks the scored items of every source with a few batched Gemini calls.
+
+    Each item gets a 'relevance' (0-10); items rated below min_relevance are
+    dropped and the rest are ordered by relevance within their category.
+    Items the model did not rate are kept, after the rated ones. Costs one
+    request per batch_size items, independent of how many pages were crawled.
+    """
+    entries = [
+        (result_index, category, item)
+        for result_index, result in enumerate(filtered_results)
+        for category in CATEGORIES
+        for item in result.get(category, [])
+    ]
+    batches = [entries[start:start + batch_size] for start in range(0, len(entries), batch_size)]
+    batch_ratings = await asyncio.gather(*(
+        rerank_batch([item for _, _, item in batch], user_profile, model=model, cache=cache) for batch in batches
+    ))
+
+    reranked = [dict(result, **{category: [] for category in CATEGORIES}) for result in filtered_results]
+    for batch, ratings in zip(batches, batch_ratings):
+        for (result_index, category, item), rating in zip(batch, ratings):
+            if rating is not None and rating < min_relevance:
+                continue
+            reranked[result_index][category].append(item if rating is None else dict(item, relevance=rating))
+    for result in reranked:
+        for category in CATEGORIES:
+            result[category].sort(key=lambda item: -item.get('relevance', -1))
+    return reranked
@@ -0,0 +1,188 @@
+import asyncio
+
+try:
+    from .main import crawl_websites_concurrent, GEMINI_MODEL_NAME, ANALYSIS_PROMPT_VERSION
+    from .analysis_cache import make_cache_key, make_analysis_key
+    from .extractor import extract_page
+    from .chunking import select_relevant_chunks, analyze_chunks
+    from .batching import PageBatcher
+    from .metrics import span
+except ImportError:
+    from main import crawl_websites_concurrent, GEMINI_MODEL_NAME, ANALYSIS_PROMPT_VERSION
+    from analysis_cache import make_cache_key, make_analysis_key
+    from extractor import extract_page
+    from chunking import select_relevant_chunks, analyze_chunks
+    from batching import PageBatcher
+    from metrics import span
+
+# Marks the end of a stage's input queue
+_DONE = object()
+
+def _extract_and_select(content, keywords, interests, chunk_tokens, top_k_chunks, extracted_data=None):
+    with span('extract'):
+        # Pages of the HTTP tier were already extracted by the fetcher
+        extracted_data = dict(extracted_data) if extracted_data else extract_page(content)
+        extracted_data['chunks'] = select_relevant_chunks(
+            extracted_data['text'], keywords, interests, max_tokens=chunk_tokens, top_k=top_k_chunks
+        )
+    return extracted_data
+
+def failed_analysis_result(url, error_message):
+    """
+    Builds the analysis result recorded for a page that could not be processed.
+    """
+    return {
+        'url': url,
+        'error': error_message,
+        'news': [],
+        'opportunities': [],
+        'threats': []
+    }
+
+async def run_pipeline(urls, user_profile, crawl_concurrency=5, extract_workers=2, analyze_workers=3,
+                       queue_size=4, on_result=None, on_item=None, model=None, cache=None, state_store=None,
+                       keywords=None, chunk_tokens=1500, top_k_chunks=3, batch_tokens=None, batch_linger=1.0,
+                       crawler_pool=None, fetcher=None, frontier=None):
+    """
+    Streams pages through crawl -> extract -> analyze and returns the results in completion order.
+
+    Each stage runs its own workers and hands pages to the next one through a
+    bounded queue, so a page is extracted and analyzed as soon as its crawl
+    finishes and a slow stage holds back the one feeding it. on_result, if
+    given, is called with each analysis result as soon as it is ready, and
+    on_item(url, category, item) with each item while Gemini's response is
+    still streaming in (batched pages report their items with the result).
+    model is passed to analyze_with_gemini (e.g. a shared AnalysisScheduler). With an
+    AnalysisCache, pages whose text and profile were already analyzed skip Gemini.
+    With a CrawlStateStore, pages that did not change since the last crawl skip
+    extraction and analysis and reuse their last analysis for the same profile
+    (see make_analysis_key). With a CrawlerPool, pages are rendered by its
+    long-lived browsers, and with an HttpFetcher static pages are fetched over
+    plain HTTP instead of being rendered. With a CrawlFrontier, article links
+    discovered below the seed urls are crawled and analyzed too, within the
+    frontier's budgets.
+
+    With user_profile=None pages are analyzed without any profile (the first
+    phase of shared analysis): cached analyses are then reused by every user.
+
+    Only the top_k_chunks chunks of chunk_tokens tokens that best match
+    keywords (as returned by determine_targets) and the profile's interests are
+    sent to Gemini, one request per chunk, and their results are merged.
+
+    With batch_tokens, pages short enough to share a request are packed into
+    multi-page requests of at most batch_tokens tokens (see PageBatcher), so
+    the profile is sent once per batch; pages whose batch output cannot be
+    parsed fall back to the per-page requests.
+    """
+    extract_queue = asyncio.Queue(maxsize=queue_size)
+    analyze_queue = asyncio.Queue(maxsize=queue_size)
+    results = []
+    analysis_key = make_analysis_key(user_profile, GEMINI_MODEL_NAME, ANALYSIS_PROMPT_VERSION)
+
+    def emit(analysis_result):
+        results.append(analysis_result)
+        if on_result:
+            on_result(analysis_result)
+
+    async def crawl_stage():
+        async for url, result in crawl_websites_concurrent(urls, max_concurrency=crawl_concurrency,
+                                                           state_store=state_store, crawler_pool=crawler_pool,
+                                                           fetcher=fetcher, frontier=frontier,
+                                                           analysis_key=analysis_key):
+            await extract_queue.put((url, result))
+        for _ in range(extract_workers):
+            await extract_queue.put(_DONE)
+
+    async def extract_worker():
+        while True:
+            item = await extract_queue.get()
+            if item is _DONE:
+                break
+            url, result = item
+            if not result.success:
+                print(f"Failed to crawl {url}: {result.error_message}")
+                emit(failed_analysis_result(url, result.error_message))
+                continue
+            if getattr(result, 'unchanged', False):
+                print(f"{url} unchanged since last crawl, reusing its analysis")
+                emit(dict(state_store.get(url, analysis_key)['analysis'], unchanged=True))
+                continue
+            print(f"Processing content from {url}...")
+            # The rendered HTML carries the title and meta description; markdown is the fallback
+            content = getattr(result, 'html', None) or result.markdown.raw_markdown
+            try:
+                extracted_data = await asyncio.to_thread(
+                    _extract_and_select, content, keywords, (user_profile or {}).get('interests', []), chunk_tokens,
+                    top_k_chunks, getattr(result, 'extracted', None)
+                )
+            except Exception as e:
+                print(f"Failed to extract {url}: {e}")
+                emit(failed_analysis_result(url, str(e)))
+                continue
+            await analyze_queue.put((url, extracted_data))
+
+    batcher = None
+    if batch_tokens:
+        batcher = PageBatcher(user_profile, model=model, batch_tokens=batch_tokens, linger=batch_linger)
+    batched_pages = set()
+
+    async def analyze_page(url, extracted_data):
+        cache_key = None
+        analysis_result = None
+        text = '\n\n'.join(extracted_data['chunks'])
+        if cache is not None:
+            cache_key = make_cache_key(text, user_profile, GEMINI_MODEL_NAME, ANALYSIS_PROMPT_VERSION)
+            analysis_result = cache.get(cache_key)
+        if analysis_result is None:
+            try:
+                if batcher is not None and batcher.fits(text):
+                    analysis_result = await batcher.analyze(text)
+                if analysis_result is None:
+                    analysis_result = await analyze_chunks(
+                        extracted_data['chunks'], user_profile, model=model,
+                        on_item=(lambda category, item: on_item(url, category, item)) if on_item else None
+                    )
+            except Exception as e:
+                emit(failed_analysis_result(url, str(e)))
+                return
+            # Empty results are usually unparseable responses, so they are worth retrying next run
+            if cache_key and any(analysis_result.get(c) for c in ('news', 'opportunities', 'threats')):
+                cache.put(cache_key, analysis_result)
+        analysis_result['url'] = url
+        analysis_result['title'] = extracted_data['title']
+        if state_store is not None:
+            state_store.save_analysis(url, analysis_result, analysis_key)
+        emit(analysis_result)
+
+    async def analyze_worker():
+        while True:
+            item = await analyze_queue.get()
+            if item is _DONE:
+                break
+            url, extracted_data = item
+            if batcher is not None and batcher.fits('\n\n'.join(extracted_data['chunks'])):
+                # Short pages wait for their batch without holding up the worker
+                task = asyncio.create_task(analyze_page(url, extracted_data))
+                batched_pages.add(task)
+                task.add_done_callback(batched_pages.discard)
+            else:
+                await analyze_page(url, extracted_data)
+
+    async def analyze_stage():
+        await asyncio.gather(*(analyze_worker() for _ in range(analyze_workers)))
+        if batcher is not None:
+            batcher.close()
+            await asyncio.gather(*list(batched_pages))
+            print(f"Batched analysis: {batcher.stats}")
+
+    async def extract_stage():
+        await asyncio.gather(*(extract_worker() for _ in range(extract_workers)))
+        for _ in range(analyze_workers):
+            await analyze_queue.put(_DONE)
+
+    await asyncio.gather(
+        crawl_stage(),
+        extract_stage(),
+        analyze_stage()
+    )
+    return results
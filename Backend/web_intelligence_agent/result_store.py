@@ -0,0 +1,185 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+CATEGORIES = ('news', 'opportunities', 'threats')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    profile_key TEXT,
+    threshold REAL,
+    scoring_mode TEXT,
+    parent_run_id INTEGER,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    source_id INTEGER NOT NULL REFERENCES sources (id),
+    source_url TEXT NOT NULL,
+    category TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    score REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_kind_profile ON runs (kind, profile_key, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_kind_created ON runs (kind, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_sources_run ON sources (run_id, position);
+CREATE INDEX IF NOT EXISTS idx_items_run_category_score ON items (run_id, category, score DESC);
+CREATE INDEX IF NOT EXISTS idx_items_source_url ON items (source_url);
+"""
+
+def profile_fingerprint(user_profile):
+    """
+    Returns a stable key identifying a user profile.
+    """
+    payload = json.dumps(user_profile or {}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+class ResultStore:
+    """
+    SQLite (WAL mode) store of analysis and scoring runs, kept per profile and per run.
+
+    A run is one execution of the web intelligence agent ('analysis') or the
+    scoring agent ('scoring'). Each crawled site becomes a source row and each
+    news, opportunity or threat an item row indexed by run, category, score and
+    source URL, so reads are indexed queries and earlier runs stay available.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        # Stores created before scoring runs recorded their mode
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(runs)")}
+        if 'scoring_mode' not in columns:
+            conn.execute("ALTER TABLE runs ADD COLUMN scoring_mode TEXT")
+        conn.commit()
+
+    def _connect(self):
+        # One connection per thread; WAL lets readers proceed while a run is being written
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def save_run(self, kind, results, profile_key=None, threshold=None, parent_run_id=None, scoring_mode=None):
+        """
+        Stores a list of per-site results (the analysis_results.json format) as a new run and returns its id.
+
+        Scoring runs record the threshold and scoring mode they were scored with.
+        """
+        conn = self._connect()
+        with conn:
+            run_id = conn.execute(
+                "INSERT INTO runs (kind, profile_key, threshold, scoring_mode, parent_run_id, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, profile_key, threshold, scoring_mode, parent_run_id, time.time())
+            ).lastrowid
+            for position, result in enumerate(results):
+                url = result.get('url', '')
+                source = {key: value for key, value in result.items() if key not in CATEGORIES}
+                source_id = conn.execute(
+                    "INSERT INTO sources (run_id, position, url, data) VALUES (?, ?, ?, ?)",
+                    (run_id, position, url, json.dumps(source))
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO items (run_id, source_id, source_url, category, position, score, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (run_id, source_id, url, category, item_position,
+                         item.get('score') if isinstance(item, dict) else None, json.dumps(item))
+                        for category in CATEGORIES
+                        for item_position, item in enumerate(result.get(category, []) or [])
+                    ]
+                )
+        return run_id
+
+    def latest_run(self, kind, profile_key=None):
+        """
+        Returns the most recent run of a kind (optionally for one profile) as a dict, or None.
+        """
+        if profile_key:
+            row = self._connect().execute(
+                "SELECT * FROM runs WHERE kind = ? AND profile_key = ? ORDER BY created_at DESC, id DESC LIMIT 1",
+                (kind, profile_key)
+            ).fetchone()
+        else:
+            row = self._connect().execute(
+                "SELECT * FROM runs WHERE kind = ? ORDER BY created_at DESC, id DESC LIMIT 1", (kind,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list_runs(self, kind=None, profile_key=None, limit=20):
+        """
+        Returns the most recent runs, newest first, with their source and item counts.
+        """
+        query = ("SELECT runs.*, "
+                 "(SELECT COUNT(*) FROM sources WHERE sources.run_id = runs.id) AS source_count, "
+                 "(SELECT COUNT(*) FROM items WHERE items.run_id = runs.id) AS item_count "
+                 "FROM runs WHERE 1 = 1")
+        params = []
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        if profile_key:
+            query += " AND profile_key = ?"
+            params.append(profile_key)
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._connect().execute(query, params)]
+
+    def load_results(self, run_id):
+        """
+        Rebuilds a run's per-site results in the analysis_results.json format.
+        """
+        conn = self._connect()
+        results = []
+        by_source = {}
+        for row in conn.execute("SELECT id, data FROM sources WHERE run_id = ? ORDER BY position", (run_id,)):
+            result = json.loads(row['data'])
+            for category in CATEGORIES:
+                result[category] = []
+            by_source[row['id']] = result
+            results.append(result)
+        for row in conn.execute(
+            "SELECT source_id, category, data FROM items WHERE run_id = ? ORDER BY source_id, category, position",
+            (run_id,)
+        ):
+            by_source[row['source_id']][row['category']].append(json.loads(row['data']))
+        return results
+
+    def query_items(self, run_id, category):
+        """
+        Returns a run's items of one category sorted by score (highest first), tagged with their source_url.
+        """
+        rows = self._connect().execute(
+            "SELECT source_url, data FROM items WHERE run_id = ? AND category = ? "
+            "ORDER BY score DESC, id",
+            (run_id, category)
+        )
+        items = []
+        for row in rows:
+            item = json.loads(row['data'])
+            item['source_url'] = row['source_url']
+            items.append(item)
+        return items
+
+    def is_empty(self):
+        return self._connect().execute("SELECT 1 FROM runs LIMIT 1").fetchone() is None
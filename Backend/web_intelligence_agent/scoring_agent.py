@@ -1,6 +1,22 @@
 
 import json
 import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    from .metrics import span
+except ImportError:
+    from metrics import span
+
+# Item fields matched against the profile's interests; the LLM writes the item body to 'content'
+SCORED_FIELDS = ('title', 'summary', 'content')
+
+# Separates fields and items in the scoring corpus; it never occurs in an interest
+_SEPARATOR = '\x00'
 
 def load_analysis_results(file_path):
     """
@@ -9,7 +25,7 @@ def load_analysis_results(file_path):
     with open(file_path, 'r') as f:
         return json.load(f)
 
-def score_item(item, user_profile):
+def score_item(item, user_profile, fields=SCORED_FIELDS):
     """
     Scores an item based on the user's profile.
     """
@@ -18,35 +34,179 @@ def score_item(item, user_profile):
     
     # Simple keyword-based scoring
     for interest in interests:
-        if interest.lower() in item.get('title', '').lower() or interest.lower() in item.get('summary', '').lower():
+        if any(interest.lower() in (item.get(field) or '').lower() for field in fields):
             score += 1
             
     return score
 
-def filter_results(analysis_results, user_profile, threshold=1):
+class BatchScorer:
     """
-    Filters the analysis results based on a score threshold.
+    Scores many items at once against a profile's interests (and optionally keyword lists).
+
+    The scored fields of all items are joined into a single corpus that is
+    lowercased once; each term is then located with C-level substring search
+    over the whole corpus, jumping to the next item after a hit. Scores are identical to
+    score_item on the same fields, plus one point per matching keyword when
+    keywords (as returned by determine_targets) are given.
     """
-    filtered_results = []
-    for result in analysis_results:
-        filtered_result = {
+
+    def __init__(self, user_profile, keywords=None, fields=SCORED_FIELDS):
+        self.fields = fields
+        self.terms = [interest.lower() for interest in user_profile.get('interests', [])]
+        if keywords:
+            self.terms += sorted({keyword.lower() for keyword_list in keywords.values() for keyword in keyword_list})
+
+    def _build_corpus(self, items):
+        values = [item.get(field) or '' for item in items for field in self.fields]
+        corpus = (_SEPARATOR.join(values) + _SEPARATOR).lower()
+        lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values)) + 1
+        if len(corpus) != int(lengths.sum()):
+            # A few characters change length when lowercased; measure the lowered values instead
+            values = [value.lower() for value in values]
+            lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values)) + 1
+        ends = lengths.reshape(len(items), len(self.fields)).sum(axis=1).cumsum().tolist()
+        return corpus, ends
+
+    def match_matrix(self, items):
+        """
+        Returns a boolean (items x terms) array telling which terms occur in which items.
+        """
+        matches = np.zeros((len(items), len(self.terms)), dtype=bool)
+        if not items or not self.terms:
+            return matches
+        corpus, ends = self._build_corpus(items)
+        for column, term in enumerate(self.terms):
+            if not term:
+                # An empty interest is a substring of everything
+                matches[:, column] = True
+                continue
+            hits = []
+            position = corpus.find(term)
+            while position != -1:
+                index = bisect_right(ends, position)
+                hits.append(index)
+                position = corpus.find(term, ends[index])
+            matches[hits, column] = True
+        return matches
+
+    def score_items(self, items):
+        """
+        Returns a numpy array with the score of each item.
+        """
+        return self.match_matrix(items).sum(axis=1, dtype=np.int32)
+
+def _flatten_items(analysis_results):
+    return [
+        (result_index, category, item)
+        for result_index, result in enumerate(analysis_results)
+        for category in ['news', 'opportunities', 'threats']
+        for item in result.get(category, [])
+    ]
+
+def _build_filtered_results(analysis_results, entries, scores, threshold):
+    filtered_results = [
+        {
             'url': result['url'],
             'news': [],
             'opportunities': [],
             'threats': []
         }
-        
-        for category in ['news', 'opportunities', 'threats']:
-            for item in result.get(category, []):
-                score = score_item(item, user_profile)
-                if score >= threshold:
-                    item['score'] = score
-                    filtered_result[category].append(item)
-                    
-        filtered_results.append(filtered_result)
-        
+        for result in analysis_results
+    ]
+    for index in np.flatnonzero(scores >= threshold).tolist():
+        result_index, category, item = entries[index]
+        # Scored copies; the analysis results themselves are left untouched
+        filtered_results[result_index][category].append(dict(item, score=int(scores[index])))
     return filtered_results
 
+def filter_results(analysis_results, user_profile, threshold=1, keywords=None, scorer=None):
+    """
+    Filters the analysis results based on a score threshold.
+
+    scorer defaults to a keyword BatchScorer; pass e.g. a SemanticScorer to
+    also match items that are about an interest without naming it.
+    """
+    with span('scoring'):
+        # Score the items of every source and category in one batch
+        entries = _flatten_items(analysis_results)
+        scorer = scorer or BatchScorer(user_profile, keywords)
+        scores = scorer.score_items([item for _, _, item in entries])
+        return _build_filtered_results(analysis_results, entries, scores, threshold)
+
+class IncrementalScorer:
+    """
+    Keeps per-interest match columns for recent analysis runs so re-scoring is incremental.
+
+    For each run (identified by run_key) the items are flattened once and each
+    interest's match column is computed once per scoring mode. Changing the
+    threshold is then a pure filter over the summed columns, and editing a
+    profile only computes the columns of interests not seen before. The
+    max_runs most recently used runs are kept.
+    """
+
+    def __init__(self, max_runs=8):
+        self.max_runs = max_runs
+        self.runs = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'runs_loaded': 0, 'columns_computed': 0, 'columns_reused': 0}
+
+    def _run_entry(self, run_key, load_results):
+        with self.lock:
+            entry = self.runs.get(run_key)
+            if entry is not None:
+                self.runs.move_to_end(run_key)
+                return entry
+        analysis_results = load_results()
+        entries = _flatten_items(analysis_results)
+        entry = {
+            'analysis_results': analysis_results,
+            'entries': entries,
+            'items': [item for _, _, item in entries],
+            'columns': {}
+        }
+        with self.lock:
+            self.runs[run_key] = entry
+            self.stats['runs_loaded'] += 1
+            while len(self.runs) > self.max_runs:
+                self.runs.popitem(last=False)
+        return entry
+
+    def scores(self, run_key, load_results, user_profile, mode='keyword', scorer_factory=None):
+        """
+        Returns (entry, scores) for a run, computing only the interest columns not cached yet.
+
+        load_results is only called when the run is not cached. scorer_factory
+        builds the scorer for a profile (default BatchScorer); its match_matrix
+        columns must follow the profile's interests.
+        """
+        entry = self._run_entry(run_key, load_results)
+        interests = user_profile.get('interests', [])
+        columns = entry['columns']
+        missing = [interest for interest in dict.fromkeys(interest.lower() for interest in interests)
+                   if (mode, interest) not in columns]
+        if missing:
+            scorer = (scorer_factory or BatchScorer)({'interests': missing})
+            matrix = scorer.match_matrix(entry['items'])
+            with self.lock:
+                for column, interest in enumerate(missing):
+                    columns[(mode, interest)] = matrix[:, column]
+        with self.lock:
+            self.stats['columns_computed'] += len(missing)
+            self.stats['columns_reused'] += len(interests) - len(missing)
+        scores = np.zeros(len(entry['items']), dtype=np.int32)
+        # Duplicate interests count twice, as in score_item
+        for interest in interests:
+            scores += columns[(mode, interest.lower())]
+        return entry, scores
+
+    def filter(self, run_key, load_results, user_profile, threshold=1, mode='keyword', scorer_factory=None):
+        """
+        Filters a run's results like filter_results, reusing cached interest columns.
+        """
+        with span('scoring_incremental'):
+            entry, scores = self.scores(run_key, load_results, user_profile, mode, scorer_factory)
+            return _build_filtered_results(entry['analysis_results'], entry['entries'], scores, threshold)
+
 def main():
     """
     Main function to orchestrate the Scoring Agent.
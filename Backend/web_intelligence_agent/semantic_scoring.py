@@ -0,0 +1,195 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+try:
+    from .scoring_agent import BatchScorer, SCORED_FIELDS
+except ImportError:
+    from scoring_agent import BatchScorer, SCORED_FIELDS
+
+# Spelled-out forms of common interests, so "artificial intelligence" is close to "AI". The hashing
+# embedder only sees shared character n-grams, so without these an interest mostly matches items that
+# share its wording (recall 0.16 instead of 0.65 on the calibration set of benchmarks/scoring_benchmark.py)
+INTEREST_EXPANSIONS = {
+    'ai': 'artificial intelligence machine learning deep learning generative ai llm automation',
+    'fintech': 'financial technology digital payments mobile banking neobank e-wallet blockchain',
+    'real estate': 'property housing land construction mortgage immobilier rental',
+    'startups': 'startup venture capital seed funding early-stage companies entrepreneurship',
+    'crypto': 'cryptocurrency bitcoin blockchain digital assets tokens'
+}
+
+class HashingEmbedder:
+    """
+    Stateless CPU embedder: hashed character n-grams reduced by a fixed sparse random projection.
+
+    This is lexical similarity (shared word fragments), not a learned
+    embedding; meaning only comes in through the interest expansions. Nothing
+    is fitted on the corpus, so an item's embedding never changes and can be
+    cached by content hash across runs and processes.
+    """
+
+    # Best F1 (0.69: precision 0.74, recall 0.65, keyword matches included) on the labelled calibration
+    # set of benchmarks/scoring_benchmark.py --semantic; at 0.35 recall falls to 0.48 for no gain in precision
+    similarity_threshold = 0.25
+
+    def __init__(self, dimensions=256, seed=0):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.random_projection import SparseRandomProjection
+
+        self.name = f'hashing-char-3-5-{dimensions}-{seed}'
+        self.vectorizer = HashingVectorizer(analyzer='char_wb', ngram_range=(3, 5), n_features=2 ** 18,
+                                            alternate_sign=False, norm='l2')
+        self.projection = SparseRandomProjection(n_components=dimensions, dense_output=True, random_state=seed)
+        self.projection.fit(self.vectorizer.transform(['']))
+
+    def embed(self, texts):
+        vectors = np.asarray(self.projection.transform(self.vectorizer.transform(texts)), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+class SentenceTransformerEmbedder:
+    """
+    Local sentence-transformers model, used when that optional package is installed.
+    """
+
+    # Usual cut-off for normalized sentence embeddings; check it with benchmarks/scoring_benchmark.py --semantic
+    similarity_threshold = 0.35
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = f'sentence-transformers-{model_name}'
+        self.model = SentenceTransformer(model_name, device='cpu')
+
+    def embed(self, texts):
+        return np.asarray(self.model.encode(list(texts), batch_size=64, normalize_embeddings=True),
+                          dtype=np.float32)
+
+def make_embedder(model_name=None):
+    """
+    Returns a sentence-transformers embedder for model_name if available, else the hashing embedder.
+    """
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except ImportError:
+            print(f"sentence-transformers is not installed, falling back to hashing embeddings for {model_name}")
+    return HashingEmbedder()
+
+def item_text(item, fields=SCORED_FIELDS):
+    """
+    Returns the text of an item that gets embedded.
+    """
+    return ' '.join(item.get(field) or '' for field in fields).strip()
+
+class EmbeddingIndex:
+    """
+    Persistent index of item embeddings keyed by a hash of the embedded text.
+
+    Embeddings are stored as one float32 matrix in a .npz file next to their
+    keys; only items whose text was never seen before are embedded, in one batch.
+    """
+
+    def __init__(self, index_path, embedder=None):
+        self.index_path = index_path
+        self.embedder = embedder or make_embedder(os.environ.get('SEMANTIC_MODEL'))
+        self.lock = threading.Lock()
+        self.keys = []
+        self.rows = {}
+        self.matrix = None
+        # Texts embedded by this process (the others came from the index file or an earlier call)
+        self.embedded = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        with np.load(self.index_path, allow_pickle=False) as data:
+            if str(data['embedder']) != self.embedder.name:
+                print(f"Embedding index {self.index_path} was built with another embedder, rebuilding it")
+                return
+            self.keys = data['keys'].tolist()
+            self.matrix = data['matrix']
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+
+    def save(self):
+        """
+        Writes the index to disk atomically.
+        """
+        with self.lock:
+            if self.matrix is None:
+                return
+            tmp_path = f"{self.index_path}.tmp.npz"
+            np.savez(tmp_path, keys=np.array(self.keys), matrix=self.matrix, embedder=np.array(self.embedder.name))
+            os.replace(tmp_path, self.index_path)
+
+    def embed_texts(self, texts):
+        """
+        Returns the (len(texts) x dimensions) embedding matrix, embedding only unseen texts.
+        """
+        keys = [hashlib.sha1(text.encode('utf-8')).hexdigest() for text in texts]
+        with self.lock:
+            missing = list(dict.fromkeys(key for key in keys if key not in self.rows))
+            if missing:
+                text_by_key = dict(zip(keys, texts))
+                vectors = self.embedder.embed([text_by_key[key] for key in missing])
+                self.embedded += len(missing)
+                self.matrix = vectors if self.matrix is None else np.vstack([self.matrix, vectors])
+                for key in missing:
+                    self.rows[key] = len(self.keys)
+                    self.keys.append(key)
+            rows = [self.rows[key] for key in keys]
+            matrix = self.matrix
+        if missing:
+            self.save()
+        if not rows:
+            return np.zeros((0, 0), dtype=np.float32)
+        return matrix[rows]
+
+class SemanticScorer:
+    """
+    Scores items by the number of interests they match by keyword or by similarity.
+
+    An interest counts when it occurs in the item (exactly as BatchScorer) or
+    when the cosine similarity between the item's embedding and the embedding
+    of the interest plus its expansions reaches similarity_threshold (by
+    default the one calibrated for the index's embedder), so scores stay
+    comparable with the keyword scorer's thresholds.
+    """
+
+    def __init__(self, user_profile, index, similarity_threshold=None, fields=SCORED_FIELDS,
+                 expansions=INTEREST_EXPANSIONS):
+        self.index = index
+        self.fields = fields
+        self.similarity_threshold = (index.embedder.similarity_threshold if similarity_threshold is None
+                                     else similarity_threshold)
+        self.interests = user_profile.get('interests', [])
+        self.keyword_scorer = BatchScorer(user_profile, fields=fields)
+        self.interest_matrix = index.embedder.embed([
+            f"{interest} {expansions.get(interest.lower(), '')}".strip() for interest in self.interests
+        ]) if self.interests else None
+
+    def similarities(self, items):
+        """
+        Returns the (items x interests) cosine similarity matrix.
+        """
+        if not items or self.interest_matrix is None:
+            return np.zeros((len(items), len(self.interests)), dtype=np.float32)
+        item_matrix = self.index.embed_texts([item_text(item, self.fields) for item in items])
+        return item_matrix @ self.interest_matrix.T
+
+    def match_matrix(self, items):
+        """
+        Returns a boolean (items x interests) array telling which interests each item matches.
+        """
+        matches = self.keyword_scorer.match_matrix(items)
+        matches |= self.similarities(items) >= self.similarity_threshold
+        return matches
+
+    def score_items(self, items):
+        """
+        Returns a numpy array with the score of each item.
+        """
+        return self.match_matrix(items).sum(axis=1, dtype=np.int32)
@@ -0,0 +1,6 @@
+"""
+Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import app, shutdown_app
+
+__all__ = ['app', 'shutdown_app']
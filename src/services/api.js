@@ -64,12 +64,13 @@ export const updateUserProfile = async (profileData) => {
  * Run web intelligence analysis
  * @param {Object} options - Options for analysis
  * @param {Object} options.user_profile - Optional user profile override
+ * @param {Function} options.onResult - Optional callback for each analyzed URL
  * @returns {Promise} Analysis results
  */
-export const runWebIntelligence = async (options = {}) => {
+export const runWebIntelligence = async ({ onResult, ...options } = {}) => {
   try {
     const response = await apiClient.post('/intelligence/analyze', options)
-    return response.data
+    return await waitForJob(response.data.job_id, { onResult })
   } catch (error) {
     throw error
   }
@@ -130,17 +131,79 @@ export const getScoringResults = async () => {
  * @param {Object} options - Options for analysis
  * @param {Object} options.user_profile - Optional user profile override
  * @param {number} options.threshold - Score threshold (default: 1)
+ * @param {Function} options.onResult - Optional callback for each analyzed URL
  * @returns {Promise} Complete analysis results
  */
-export const runFullAnalysis = async (options = {}) => {
+export const runFullAnalysis = async ({ onResult, ...options } = {}) => {
   try {
     const response = await apiClient.post('/intelligence/full-analysis', options)
+    return await waitForJob(response.data.job_id, { onResult })
+  } catch (error) {
+    throw error
+  }
+}
+
+// ============================================
+// Background Job APIs
+// ============================================
+
+/**
+ * Get the status of a background analysis job
+ * @param {string} jobId - Job ID returned when the analysis was submitted
+ * @returns {Promise} Job status, progress and result
+ */
+export const getJob = async (jobId) => {
+  try {
+    const response = await apiClient.get(`/jobs/${jobId}`)
     return response.data
   } catch (error) {
     throw error
   }
 }
 
+/**
+ * Subscribe to a job's Server-Sent Events progress stream
+ * @param {string} jobId - Job ID
+ * @param {Object} handlers - { onResult, onItem, onStatus } callbacks (onItem gets { url, category, item }
+ *   for each item while a page is still being analyzed)
+ * @returns {EventSource} The event source (call close() to unsubscribe)
+ */
+export const subscribeToJob = (jobId, { onResult, onItem, onStatus } = {}) => {
+  const source = new EventSource(`${API_BASE_URL}/jobs/${jobId}/events`)
+  source.addEventListener('result', (event) => onResult && onResult(JSON.parse(event.data)))
+  source.addEventListener('item', (event) => onItem && onItem(JSON.parse(event.data)))
+  source.addEventListener('status', (event) => {
+    const status = JSON.parse(event.data)
+    if (onStatus) onStatus(status)
+    if (status.status === 'succeeded' || status.status === 'failed') source.close()
+  })
+  return source
+}
+
+/**
+ * Wait for a background job to finish, streaming per-URL results if requested
+ * @param {string} jobId - Job ID
+ * @param {Object} options - { onResult, interval } (poll interval in ms, default: 2000)
+ * @returns {Promise} The job result, shaped like the former synchronous response
+ */
+export const waitForJob = async (jobId, { onResult, interval = 2000 } = {}) => {
+  const source = onResult ? subscribeToJob(jobId, { onResult }) : null
+  try {
+    while (true) {
+      const { data: job } = await getJob(jobId)
+      if (job.status === 'succeeded') {
+        return { success: true, ...job.result }
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Analysis job failed')
+      }
+      await new Promise((resolve) => setTimeout(resolve, interval))
+    }
+  } finally {
+    if (source) source.close()
+  }
+}
+
 // ============================================
 // Personalized Content APIs
 // ============================================
@@ -235,6 +298,9 @@ export default {
   runScoringAgent,
   getScoringResults,
   runFullAnalysis,
+  getJob,
+  subscribeToJob,
+  waitForJob,
   getPersonalizedNews,
   getPersonalizedOpportunities,
   getPersonalizedThreats,